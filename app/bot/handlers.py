@@ -3,16 +3,43 @@
 для управления мониторингом сайтов.
 """
 
-from aiogram import Router
+from aiogram import Bot, Router
+from aiogram.exceptions import TelegramBadRequest
 from aiogram.filters import Command
-from aiogram.types import Message, CallbackQuery
+from aiogram.types import BufferedInputFile, InlineKeyboardMarkup, Message, CallbackQuery
 
 from app.db.database import AsyncSessionLocal
 from app.db import crud
-from app.bot.keyboards import site_item_kb
-from app.bot.utils import normalize_url, validate_url
+from app.db.queries import cached_checks_page, cached_report, cached_sites_page
+from app.bot.keyboards import (
+    HISTORY_PAGE_PREFIX,
+    PAGE_PREV,
+    SITES_PAGE_PREFIX,
+    history_page_kb,
+    parse_page_callback,
+    sites_page_kb,
+)
+from app.bot.utils import (
+    decode_check_cursor,
+    encode_check_cursor,
+    format_timings,
+    normalize_url,
+    shorten,
+    validate_url,
+)
 from app.core.logger import get_logger
 from app.core.config import settings
+from app.core.scheduler import schedule_site, unschedule_site
+from app.services.assertions import ASSERTION_KINDS, validate_assertion
+from app.services.importer import (
+    EXPORT_FORMATS,
+    ImportFormatError,
+    detect_format,
+    export_sites,
+    import_sites,
+)
+from app.services.monitor import PROBE_MODES
+from app.services.subscriptions import subscriptions
 
 router = Router()
 logger = get_logger()
@@ -25,7 +52,10 @@ async def cmd_start(message: Message):
     """
     await message.answer(
         "Привет! Я бот для мониторинга сайтов. "
-        "Используй /add <url> [interval], /list, /remove <id>, /report, /history <id>"
+        "Используй /add <url> [interval], /list, /remove <id>, /report, /history <id>, "
+        "/probe <id> <mode>, /assert <id> <kind> <value>, "
+        "/subscribe <id> [threshold], /unsubscribe <id>, "
+        "/import (файл CSV/JSON с подписью), /export [csv|json]"
     )
 
 
@@ -49,43 +79,169 @@ async def cmd_add(message: Message):
 
     interval = int(args[2]) if len(args) > 2 else settings.DEFAULT_INTERVAL
 
+    chat_id = message.chat.id
     async with AsyncSessionLocal() as session:
-        site = await crud.create_site(session, url, interval)
+        site = await crud.create_site(session, url, interval, owner_chat_id=chat_id)
+        # Добавивший сайт чат сразу получает оповещения о нём
+        await crud.subscribe(session, site.id, chat_id)
+    subscriptions.add(site.id, chat_id)
+
+    # Сразу заводим задачу проверки, не дожидаясь сверки планировщика
+    schedule_site(site)
 
     await message.answer(
         f"Сайт добавлен: {site.id} — {site.url} (интервал {site.interval}s)"
     )
 
 
+async def render_sites_page(
+    after_id: int | None = None,
+    before_id: int | None = None,
+) -> tuple[str, InlineKeyboardMarkup | None]:
+    """
+    Готовит текст и клавиатуру одной страницы списка сайтов.
+
+    Args:
+        after_id (int | None): Показать сайты с ID больше этого.
+        before_id (int | None): Показать сайты с ID меньше этого.
+
+    Returns:
+        tuple[str, InlineKeyboardMarkup | None]: Текст страницы и клавиатура.
+    """
+    sites, more = await cached_sites_page(after_id, before_id)
+    if not sites and (after_id or before_id is not None):
+        # Сайты страницы удалены — показываем начало списка
+        after_id, before_id = None, None
+        sites, more = await cached_sites_page()
+    if not sites:
+        return "Список пуст", None
+
+    if before_id is not None:
+        has_prev, has_next = more, True
+    else:
+        has_prev, has_next = bool(after_id), more
+
+    lines = []
+    for s in sites:
+        cert = f", сертификат до {s.cert_not_after:%Y-%m-%d}" if s.cert_not_after else ""
+        lines.append(f"{s.id}: {shorten(s.url)} (интервал {s.interval}s{cert})")
+    keyboard = sites_page_kb(
+        [s.id for s in sites],
+        str(sites[0].id) if has_prev else None,
+        str(sites[-1].id) if has_next else None,
+    )
+    return "Сайты:\n" + "\n".join(lines), keyboard
+
+
+async def render_history_page(
+    site_id: int,
+    before: tuple | None = None,
+    after: tuple | None = None,
+) -> tuple[str, InlineKeyboardMarkup | None]:
+    """
+    Готовит текст и клавиатуру одной страницы истории проверок сайта.
+
+    Args:
+        site_id (int): Идентификатор сайта.
+        before (tuple | None): Показать проверки старше курсора (checked_at, id).
+        after (tuple | None): Показать проверки новее курсора (checked_at, id).
+
+    Returns:
+        tuple[str, InlineKeyboardMarkup | None]: Текст страницы и клавиатура.
+    """
+    checks, more = await cached_checks_page(site_id, before, after)
+    if not checks and (before is not None or after is not None):
+        before, after = None, None
+        checks, more = await cached_checks_page(site_id)
+    if not checks:
+        return "Нет проверок для этого сайта", None
+
+    if after is not None:
+        has_newer, has_older = more, True
+    else:
+        has_newer, has_older = before is not None, more
+
+    text = "Последние проверки:\n" if not has_newer else "Проверки:\n"
+    for c in checks:
+        text += (
+            f"{c.checked_at} — "
+            f"{'UP' if c.is_available else 'DOWN'} — "
+            f"status={c.status_code} — "
+            f"time={c.response_time} — "
+            f"bytes={c.bytes_transferred} — "
+            f"{format_timings(c.timings)}"
+            f"{' — content FAILED' if c.content_ok is False else ''}"
+            f"{f' — {c.failure_class}' if c.failure_class not in (None, 'content') else ''}"
+            f"{f' — attempts={c.attempts}' if c.attempts and c.attempts > 1 else ''}\n"
+        )
+    keyboard = history_page_kb(
+        site_id,
+        encode_check_cursor(checks[0].checked_at, checks[0].id) if has_newer else None,
+        encode_check_cursor(checks[-1].checked_at, checks[-1].id) if has_older else None,
+    )
+    return text, keyboard
+
+
+async def edit_page(call: CallbackQuery, text: str, keyboard: InlineKeyboardMarkup | None):
+    """
+    Заменяет страницу в сообщении с кнопками листания.
+    """
+    try:
+        await call.message.edit_text(text, reply_markup=keyboard)
+    except TelegramBadRequest as e:
+        # Повторное нажатие на ту же кнопку — страница не изменилась
+        if "message is not modified" not in str(e):
+            raise
+    await call.answer()
+
+
 @router.message(Command("list"))
 async def cmd_list(message: Message):
     """
     Команда /list — показать список отслеживаемых сайтов.
+
+    Сайты выводятся одним сообщением по LIST_PAGE_SIZE на странице;
+    кнопки листания меняют страницу в том же сообщении.
     """
-    async with AsyncSessionLocal() as session:
-        sites = await crud.list_sites(session)
+    text, keyboard = await render_sites_page()
+    await message.answer(text, reply_markup=keyboard)
 
-    if not sites:
-        await message.answer("Список пуст")
-        return
 
-    for s in sites:
-        await message.answer(
-            f"{s.id}: {s.url} (интервал {s.interval}s)",
-            reply_markup=site_item_kb(s.id),
-        )
+@router.callback_query(lambda c: c.data and c.data.startswith(f"{SITES_PAGE_PREFIX}:"))
+async def cb_sites_page(call: CallbackQuery):
+    """
+    Листание списка сайтов.
+    """
+    _, direction, cursor = parse_page_callback(call.data)
+    if direction == PAGE_PREV:
+        text, keyboard = await render_sites_page(before_id=int(cursor))
+    else:
+        text, keyboard = await render_sites_page(after_id=int(cursor))
+    await edit_page(call, text, keyboard)
 
 
 @router.callback_query(lambda c: c.data and c.data.startswith("del:"))
 async def cb_delete(call: CallbackQuery):
     """
     Обработка колбэка "Удалить сайт" из списка.
+
+    Страница списка перерисовывается с того же места без удалённого сайта.
     """
     site_id = int(call.data.split(":")[1])
     async with AsyncSessionLocal() as session:
         await crud.delete_site(session, site_id)
+    unschedule_site(site_id)
+    subscriptions.drop_site(site_id)
 
-    await call.message.edit_text(f"Сайт {site_id} удалён")
+    # Первая кнопка удаления на странице — первый сайт страницы
+    markup = call.message.reply_markup
+    first_id = site_id
+    if markup and markup.inline_keyboard and markup.inline_keyboard[0]:
+        first = markup.inline_keyboard[0][0].callback_data or ""
+        if first.startswith("del:"):
+            first_id = int(first.split(":")[1])
+    text, keyboard = await render_sites_page(after_id=first_id - 1)
+    await edit_page(call, f"Сайт {site_id} удалён\n\n{text}", keyboard)
 
 
 @router.message(Command("remove"))
@@ -101,15 +257,224 @@ async def cmd_remove(message: Message):
     site_id = int(parts[1])
     async with AsyncSessionLocal() as session:
         await crud.delete_site(session, site_id)
+    unschedule_site(site_id)
+    subscriptions.drop_site(site_id)
 
     await message.answer(f"Сайт {site_id} удалён")
 
 
+async def document_chunks(bot: Bot, file_path: str):
+    """
+    Читает файл с серверов Telegram кусками, не сохраняя его целиком.
+
+    Args:
+        bot (Bot): Бот.
+        file_path (str): Путь файла из `bot.get_file`.
+
+    Yields:
+        bytes: Куски файла.
+    """
+    url = bot.session.api.file_url(bot.token, file_path)
+    async for chunk in bot.session.stream_content(url, timeout=settings.CHECK_TIMEOUT * 6):
+        yield chunk
+
+
+@router.message(Command("import"))
+async def cmd_import(message: Message, bot: Bot):
+    """
+    Команда /import — добавить или обновить сайты из файла.
+
+    Формат:
+        файл .csv (url[,interval[,probe_mode]]), .json (массив адресов или объектов)
+        или .jsonl с подписью /import
+    """
+    document = message.document
+    fmt = detect_format(document.file_name) if document else None
+    if fmt is None:
+        await message.answer(
+            "Пришлите файл .csv, .json или .jsonl с подписью /import. "
+            "CSV: url[,interval[,probe_mode]]; JSON: массив адресов или объектов "
+            '{"url", "interval", "probe_mode"}'
+        )
+        return
+    if document.file_size and document.file_size > settings.IMPORT_MAX_BYTES:
+        await message.answer(f"Файл больше {settings.IMPORT_MAX_BYTES // 1024 // 1024} МБ")
+        return
+
+    chat_id = message.chat.id
+
+    def on_batch(sites, added):
+        # Новые сайты чат получает с подпиской, как при /add
+        for site in added:
+            subscriptions.add(site.id, chat_id)
+        for site in sites:
+            schedule_site(site)
+
+    file = await bot.get_file(document.file_id)
+    try:
+        report = await import_sites(
+            document_chunks(bot, file.file_path),
+            fmt,
+            AsyncSessionLocal,
+            owner_chat_id=chat_id,
+            on_batch=on_batch,
+        )
+    except ImportFormatError as e:
+        await message.answer(f"Импорт прерван: {e}")
+        return
+
+    text = (
+        f"Импорт завершён: записей {report.total}, сохранено {report.imported} "
+        f"(новых {report.added}), повторов {report.duplicates}, ошибок {report.invalid}"
+    )
+    if report.errors:
+        text += "\n" + "\n".join(report.errors)
+    await message.answer(text)
+
+
+@router.message(Command("export"))
+async def cmd_export(message: Message):
+    """
+    Команда /export — выгрузить список сайтов файлом.
+
+    Формат:
+        /export [csv|json]
+    """
+    parts = message.text.split()
+    fmt = parts[1].lower() if len(parts) > 1 else "csv"
+    if fmt not in EXPORT_FORMATS:
+        await message.answer(f"Использование: /export [{'|'.join(EXPORT_FORMATS)}]")
+        return
+
+    data = await export_sites(AsyncSessionLocal, fmt)
+    await message.answer_document(BufferedInputFile(data, filename=f"sites.{fmt}"))
+
+
+@router.message(Command("probe"))
+async def cmd_probe(message: Message):
+    """
+    Команда /probe — выбрать способ проверки сайта.
+
+    Формат:
+        /probe <site_id> <get|head|stream|conditional>
+    """
+    parts = message.text.split()
+    if len(parts) < 3 or parts[2] not in PROBE_MODES:
+        await message.answer(f"Использование: /probe <site_id> <{'|'.join(PROBE_MODES)}>")
+        return
+
+    site_id = int(parts[1])
+    async with AsyncSessionLocal() as session:
+        site = await crud.set_probe_mode(session, site_id, parts[2])
+
+    if site is None:
+        await message.answer("Сайт не найден")
+        return
+
+    schedule_site(site)
+    await message.answer(f"Сайт {site.id} проверяется способом {site.probe_mode}")
+
+
+@router.message(Command("assert"))
+async def cmd_assert(message: Message):
+    """
+    Команда /assert — проверка содержимого страницы.
+
+    Формат:
+        /assert <site_id> <contains|not_contains|regex|not_regex|sha256> <value>
+        /assert <site_id> off
+    """
+    usage = (
+        f"Использование: /assert <site_id> <{'|'.join(ASSERTION_KINDS)}> <value> "
+        f"или /assert <site_id> off"
+    )
+    parts = message.text.split(maxsplit=3)
+    if len(parts) < 3 or (parts[2] != "off" and len(parts) < 4):
+        await message.answer(usage)
+        return
+
+    site_id = int(parts[1])
+    kind, value = (None, None) if parts[2] == "off" else (parts[2], parts[3])
+    if kind is not None:
+        error = validate_assertion(kind, value)
+        if error:
+            await message.answer(f"Неверная проверка: {error}")
+            return
+
+    async with AsyncSessionLocal() as session:
+        site = await crud.set_assertion(session, site_id, kind, value)
+
+    if site is None:
+        await message.answer("Сайт не найден")
+        return
+
+    schedule_site(site)
+    if kind is None:
+        await message.answer(f"Проверка содержимого сайта {site.id} снята")
+    else:
+        await message.answer(f"Сайт {site.id}: тело ответа проверяется ({kind} {value})")
+
+
+@router.message(Command("subscribe"))
+async def cmd_subscribe(message: Message):
+    """
+    Команда /subscribe — получать оповещения о сайте в этот чат.
+
+    Формат:
+        /subscribe <site_id> [failure_threshold]
+    """
+    parts = message.text.split()
+    if len(parts) < 2:
+        await message.answer("Использование: /subscribe <site_id> [failure_threshold]")
+        return
+
+    site_id = int(parts[1])
+    threshold = int(parts[2]) if len(parts) > 2 else None
+    chat_id = message.chat.id
+    async with AsyncSessionLocal() as session:
+        site = await crud.get_site(session, site_id)
+        if site is None:
+            await message.answer("Сайт не найден")
+            return
+        await crud.subscribe(session, site_id, chat_id, threshold)
+    subscriptions.add(site_id, chat_id, threshold)
+
+    threshold = threshold or settings.ALERT_FAILURE_THRESHOLD
+    await message.answer(
+        f"Оповещения о {site.url} придут после {threshold} неудачных проверок подряд"
+    )
+
+
+@router.message(Command("unsubscribe"))
+async def cmd_unsubscribe(message: Message):
+    """
+    Команда /unsubscribe — перестать получать оповещения о сайте.
+
+    Формат:
+        /unsubscribe <site_id>
+    """
+    parts = message.text.split()
+    if len(parts) < 2:
+        await message.answer("Использование: /unsubscribe <site_id>")
+        return
+
+    site_id = int(parts[1])
+    chat_id = message.chat.id
+    async with AsyncSessionLocal() as session:
+        removed = await crud.unsubscribe(session, site_id, chat_id)
+    subscriptions.remove(site_id, chat_id)
+
+    await message.answer("Подписка отменена" if removed else "Подписки на этот сайт нет")
+
+
 @router.message(Command("history"))
 async def cmd_history(message: Message):
     """
     Команда /history — последние проверки сайта.
 
+    Проверки выводятся одним сообщением по HISTORY_PAGE_SIZE на странице;
+    кнопки листания меняют страницу в том же сообщении.
+
     Формат:
         /history <site_id>
     """
@@ -118,42 +483,47 @@ async def cmd_history(message: Message):
         await message.answer("Использование: /history <site_id>")
         return
 
-    site_id = int(parts[1])
-    async with AsyncSessionLocal() as session:
-        checks = await crud.last_checks(session, site_id, limit=10)
-
-    if not checks:
-        await message.answer("Нет проверок для этого сайта")
-        return
+    text, keyboard = await render_history_page(int(parts[1]))
+    await message.answer(text, reply_markup=keyboard)
 
-    text = "Последние проверки:\n"
-    for c in checks:
-        text += (
-            f"{c.checked_at} — "
-            f"{'UP' if c.is_available else 'DOWN'} — "
-            f"status={c.status_code} — "
-            f"time={c.response_time}\n"
-        )
 
-    await message.answer(text)
+@router.callback_query(lambda c: c.data and c.data.startswith(f"{HISTORY_PAGE_PREFIX}:"))
+async def cb_history_page(call: CallbackQuery):
+    """
+    Листание истории проверок сайта.
+    """
+    prefix, direction, cursor = parse_page_callback(call.data)
+    site_id = int(prefix.split(":")[1])
+    position = decode_check_cursor(cursor)
+    if direction == PAGE_PREV:
+        text, keyboard = await render_history_page(site_id, after=position)
+    else:
+        text, keyboard = await render_history_page(site_id, before=position)
+    await edit_page(call, text, keyboard)
 
 
 @router.message(Command("report"))
 async def cmd_report(message: Message):
     """
-    Команда /report — общий отчёт по всем сайтам.
+    Команда /report — отчёт по сайтам за последние REPORT_WINDOW_HOURS часов.
+
+    Формат:
+        /report [site_id ...]
     """
-    async with AsyncSessionLocal() as session:
-        sites = await crud.list_sites(session)
+    parts = message.text.split()
+    site_ids = [int(p) for p in parts[1:]] or None
 
-        text = "Отчёт по сайтам:\n"
-        for s in sites:
-            st = await crud.stats_for_site(session, s.id)
-            text += (
-                f"{s.id}: {s.url} — "
-                f"Uptime={st['uptime']}% — "
-                f"Avg response={st['average_response']}s\n"
-            )
+    # Одинаковые отчёты нескольких админов считаются один раз
+    sites, stats = await cached_report(site_ids)
 
-    await message.answer(text)
+    empty = {"uptime": None, "average_response": None}
+    text = "Отчёт по сайтам:\n"
+    for s in sites:
+        st = stats.get(s.id, empty)
+        text += (
+            f"{s.id}: {s.url} — "
+            f"Uptime={st['uptime']}% — "
+            f"Avg response={st['average_response']}s\n"
+        )
 
+    await message.answer(text)
@@ -1,6 +1,12 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
 DELETE_PREFIX = "del"
+SITES_PAGE_PREFIX = "sites"
+HISTORY_PAGE_PREFIX = "hist"
+
+# Направления листания в callback_data
+PAGE_PREV = "p"
+PAGE_NEXT = "n"
 
 def site_item_kb(site_id: int) -> InlineKeyboardMarkup:
     return InlineKeyboardMarkup(
@@ -13,3 +19,103 @@ def site_item_kb(site_id: int) -> InlineKeyboardMarkup:
             ]
         ]
     )
+
+
+def pager_row(
+    prefix: str,
+    prev_cursor: str | None,
+    next_cursor: str | None,
+    prev_text: str = "« Назад",
+    next_text: str = "Вперёд »",
+) -> list[InlineKeyboardButton]:
+    """
+    Строит ряд кнопок листания.
+
+    callback_data имеет вид "<prefix>:<p|n>:<cursor>" и не должна
+    превышать 64 байт (ограничение Telegram).
+
+    Args:
+        prefix (str): Префикс колбэка (может содержать ":").
+        prev_cursor (str | None): Курсор предыдущей страницы (None — кнопки нет).
+        next_cursor (str | None): Курсор следующей страницы (None — кнопки нет).
+        prev_text (str): Текст кнопки назад.
+        next_text (str): Текст кнопки вперёд.
+
+    Returns:
+        list[InlineKeyboardButton]: Кнопки (пустой список, если листать некуда).
+    """
+    row = []
+    if prev_cursor is not None:
+        row.append(InlineKeyboardButton(
+            text=prev_text, callback_data=f"{prefix}:{PAGE_PREV}:{prev_cursor}"
+        ))
+    if next_cursor is not None:
+        row.append(InlineKeyboardButton(
+            text=next_text, callback_data=f"{prefix}:{PAGE_NEXT}:{next_cursor}"
+        ))
+    return row
+
+
+def parse_page_callback(data: str) -> tuple[str, str, str]:
+    """
+    Разбирает callback_data кнопки листания.
+
+    Args:
+        data (str): Данные колбэка.
+
+    Returns:
+        tuple[str, str, str]: Префикс, направление и курсор.
+    """
+    prefix, direction, cursor = data.rsplit(":", 2)
+    return prefix, direction, cursor
+
+
+def sites_page_kb(
+    site_ids: list[int],
+    prev_cursor: str | None,
+    next_cursor: str | None,
+) -> InlineKeyboardMarkup:
+    """
+    Клавиатура страницы /list: удаление сайтов страницы и листание.
+
+    Args:
+        site_ids (list[int]): Сайты страницы.
+        prev_cursor (str | None): Курсор предыдущей страницы.
+        next_cursor (str | None): Курсор следующей страницы.
+
+    Returns:
+        InlineKeyboardMarkup: Клавиатура.
+    """
+    # По две кнопки удаления в ряд, чтобы страница оставалась компактной
+    buttons = [
+        InlineKeyboardButton(text=f"Удалить {site_id}", callback_data=f"{DELETE_PREFIX}:{site_id}")
+        for site_id in site_ids
+    ]
+    rows = [buttons[i:i + 2] for i in range(0, len(buttons), 2)]
+    pager = pager_row(SITES_PAGE_PREFIX, prev_cursor, next_cursor)
+    if pager:
+        rows.append(pager)
+    return InlineKeyboardMarkup(inline_keyboard=rows)
+
+
+def history_page_kb(
+    site_id: int,
+    newer_cursor: str | None,
+    older_cursor: str | None,
+) -> InlineKeyboardMarkup | None:
+    """
+    Клавиатура страницы /history: листание к более новым и старым проверкам.
+
+    Args:
+        site_id (int): Идентификатор сайта.
+        newer_cursor (str | None): Курсор более новых проверок.
+        older_cursor (str | None): Курсор более старых проверок.
+
+    Returns:
+        InlineKeyboardMarkup | None: Клавиатура или None, если проверки умещаются на одной странице.
+    """
+    pager = pager_row(
+        f"{HISTORY_PAGE_PREFIX}:{site_id}", newer_cursor, older_cursor,
+        prev_text="« Новее", next_text="Старее »",
+    )
+    return InlineKeyboardMarkup(inline_keyboard=[pager]) if pager else None
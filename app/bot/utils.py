@@ -1,5 +1,8 @@
+from datetime import datetime
 from urllib.parse import urlparse
 
+from app.services.http_client import unpack_timings
+
 
 def normalize_url(url: str) -> str:
     """
@@ -32,3 +35,68 @@ def validate_url(url: str) -> bool:
         return all([p.scheme in ("http", "https"), p.netloc])
     except Exception:
         return False
+
+
+def format_timings(packed: str | None) -> str:
+    """
+    Форматирует фазы запроса для вывода в чат.
+
+    Args:
+        packed (str | None): Фазы, упакованные `PhaseTimer.pack`.
+
+    Returns:
+        str: Строка вида "connect=12.3ms ttfb=40.1ms" или "-", если фаз нет.
+    """
+    phases = unpack_timings(packed)
+    if not phases:
+        return "-"
+    return " ".join(f"{name}={value:.1f}ms" for name, value in phases.items())
+
+
+# Формат времени в курсоре истории: компактно, чтобы уложиться в 64 байта callback_data
+_CURSOR_TIME = "%Y%m%d%H%M%S%f"
+
+
+def encode_check_cursor(checked_at: datetime, check_id: int) -> str:
+    """
+    Кодирует позицию проверки в курсор для кнопок листания /history.
+
+    Args:
+        checked_at (datetime): Время проверки.
+        check_id (int): Идентификатор проверки.
+
+    Returns:
+        str: Курсор вида "20240101120000000000.42".
+    """
+    return f"{checked_at:{_CURSOR_TIME}}.{check_id}"
+
+
+def decode_check_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Разбирает курсор, построенный `encode_check_cursor`.
+
+    Args:
+        cursor (str): Курсор.
+
+    Returns:
+        tuple[datetime, int]: Время и идентификатор проверки.
+
+    Raises:
+        ValueError: Если курсор повреждён.
+    """
+    stamp, check_id = cursor.split(".")
+    return datetime.strptime(stamp, _CURSOR_TIME), int(check_id)
+
+
+def shorten(text: str, limit: int = 80) -> str:
+    """
+    Обрезает строку для вывода в списке.
+
+    Args:
+        text (str): Исходная строка.
+        limit (int): Максимальная длина.
+
+    Returns:
+        str: Строка не длиннее `limit` символов.
+    """
+    return text if len(text) <= limit else text[:limit - 1] + "…"
@@ -10,11 +10,164 @@ class Settings(BaseSettings):
         DATABASE_URL (str): URL подключения к базе данных.
         CHECK_TIMEOUT (int): Таймаут проверки сайта (секунды).
         DEFAULT_INTERVAL (int): Интервал проверки сайтов по умолчанию (секунды).
+        MAX_CONCURRENT_CHECKS (int): Общее число одновременных проверок.
+        MAX_CHECKS_PER_HOST (int): Максимум одновременных проверок одного хоста.
+        CHECK_QUEUE_SIZE (int): Размер очереди проверок (при заполнении постановка ждёт).
+        HTTP_MAX_CONNECTIONS (int): Максимум соединений в пуле HTTP-клиента.
+        HTTP_MAX_KEEPALIVE (int): Максимум простаивающих keep-alive соединений.
+        HTTP_KEEPALIVE_EXPIRY (float): Время жизни простаивающего соединения (секунды).
+        HTTP2_ENABLED (bool): Использовать HTTP/2 (требуется пакет h2).
+        DNS_CACHE_SIZE (int): Максимум хостов в кэше DNS (0 — без кэша,
+            время DNS всё равно меряется отдельно от соединения).
+        DNS_CACHE_TTL (int): TTL записи кэша DNS, если резолвер его не сообщил,
+            и верхняя граница TTL (секунды).
+        WRITE_BATCH_SIZE (int): Размер пачки при записи результатов проверок.
+        WRITE_FLUSH_INTERVAL (float): Максимальная задержка записи результатов (секунды).
+        WRITE_BUFFER_LIMIT (int): Максимум результатов в буфере записи.
+        WRITE_MAX_RETRIES (int): Повторов записи пачки после ошибки БД, затем пачка отбрасывается.
+        SCHEDULE_JITTER (float): Джиттер запуска проверки (доля интервала сайта).
+        SCHEDULER_SYNC_INTERVAL (int): Период сверки задач планировщика с БД (секунды).
+        REPORT_WINDOW_HOURS (int): Окно статистики для /report (часы, от начала часа).
+        REPORT_FROM_ROLLUPS (bool): Строить /report по предагрегированной статистике
+            (иначе — одним сгруппированным запросом по сырым проверкам).
+        RETENTION_RAW_DAYS (int): Сколько дней хранить сырые проверки (0 — всегда).
+        RETENTION_HOURLY_DAYS (int): Сколько дней хранить часовые корзины (0 — всегда).
+        RETENTION_DAILY_DAYS (int): Сколько дней хранить суточные корзины (0 — всегда).
+        RETENTION_BATCH_SIZE (int): Сколько сырых проверок удалять за один коммит.
+        RETENTION_INTERVAL (int): Период запуска очистки (секунды).
+        CHECKS_PARTITIONING (str): Секционирование checks в PostgreSQL:
+            "" (выключено), "daily" или "weekly".
+        CHECKS_PARTITIONS_AHEAD (int): На сколько периодов вперёд создавать секции.
+        ALERT_CHAT_ID (int): Чат, получающий оповещения обо всех сайтах
+            помимо подписчиков (0 — нет такого чата).
+        ALERT_FAILURE_THRESHOLD (int): Неудачных проверок подряд до оповещения
+            о падении (для подписок без своего порога).
+        ALERT_FLAP_WINDOW (int): Число последних проверок для поиска «мигания» (до 31).
+        ALERT_FLAP_HIGH (float): Доля смен результата в окне, с которой сайт «мигает».
+        ALERT_FLAP_LOW (float): Доля смен результата, ниже которой «мигание» закончилось.
+        ALERT_STATE_FLUSH_INTERVAL (float): Период сохранения состояний оповещений (секунды).
+        NOTIFY_GLOBAL_RATE (float): Сообщений в секунду на весь бот.
+        NOTIFY_CHAT_RATE (float): Сообщений в секунду в один чат.
+        NOTIFY_CHAT_BURST (int): Допустимый всплеск сообщений в один чат.
+        NOTIFY_DIGEST_DELAY (float): Задержка первого сообщения в чат для сбора
+            одновременных уведомлений в одну сводку (секунды).
+        NOTIFY_QUEUE_LIMIT (int): Максимум неотправленных уведомлений.
+        WORKER_MODE (bool): Проверки выполняют отдельные процессы `python -m app.worker`,
+            основной процесс только обслуживает Telegram.
+        WORKER_PARTITIONS (int): Число секций сайтов, делимых между воркерами.
+        WORKER_LEASE_TTL (int): Время жизни аренды секции воркером (секунды).
+        OFFLOAD_MODE (str): Где выполнять CPU-работу проверок: "process" (пул процессов),
+            "thread" (пул потоков) или "inline" (в цикле событий).
+        OFFLOAD_WORKERS (int): Размер пула CPU-работы (0 — по числу ядер).
+        OFFLOAD_QUEUE_LIMIT (int): Максимум задач в пуле CPU-работы.
+        OFFLOAD_INLINE_BYTES (int): Ответы меньше этого размера обрабатываются на месте.
+        LOOP_LAG_INTERVAL (float): Период замера задержки цикла событий (секунды, 0 — не мерить).
+        LOOP_LAG_WARN (float): Задержка цикла событий, о которой пишется предупреждение (секунды).
+        ASSERT_MAX_BYTES (int): Сколько байт тела ответа читать для проверки содержимого.
+        ASSERT_REGEX_TIMEOUT (float): Предельное время поиска по регулярному выражению
+            в пуле CPU-работы (секунды); дольше — проверка провалена.
+        CERT_CACHE_SIZE (int): Максимум хостов в кэше сертификатов TLS.
+        CERT_EXPIRY_DAYS (str): Пороги оповещений о сроке сертификата
+            (дней до окончания через запятую).
+        METRICS_HOST (str): Адрес HTTP-эндпоинта метрик /metrics.
+        METRICS_PORT (int): Порт эндпоинта метрик (0 — не запускать).
+        METRICS_PER_SITE (bool): Считать проверки по каждому сайту (метка site_id).
+        QUERY_CACHE_TTL (float): Время жизни кэша запросов бота: список сайтов
+            и последние проверки (секунды, 0 — без кэша).
+        QUERY_CACHE_STATS_TTL (float): Время жизни кэша статистики /report (секунды).
+        QUERY_CACHE_SIZE (int): Максимум записей в кэше запросов бота.
+        LIST_PAGE_SIZE (int): Сайтов на странице /list.
+        HISTORY_PAGE_SIZE (int): Проверок на странице /history.
+        IMPORT_BATCH_SIZE (int): Сайтов в одной записи в базу при импорте.
+        IMPORT_MAX_BYTES (int): Максимальный размер файла импорта
+            (Bot API отдаёт ботам файлы до 20 МБ).
+        ADAPTIVE_INTERVALS (bool): Подстраивать интервал проверки по результатам
+            (см. `app.services.adaptive`).
+        ADAPTIVE_CONFIRM_INTERVAL (float): Интервал подтверждения падения и восстановления (секунды).
+        ADAPTIVE_CONFIRM_CHECKS (int): Проверок подряд для подтверждения смены состояния.
+        ADAPTIVE_MAX_INTERVAL (float): Верхняя граница увеличенного интервала (секунды).
+        ADAPTIVE_STABLE_AFTER (int): Успехов подряд до увеличения интервала
+            стабильного сайта (0 — не увеличивать).
+        ADAPTIVE_STABLE_FACTOR (float): Во сколько раз увеличивается интервал стабильного сайта.
+        CHECK_RETRY_BUDGETS (str): Бюджеты времени повторов неудачной проверки
+            (секунды через запятую, по одному на повтор; пусто — без повторов).
+        CHECK_RETRY_CONNECT_TIMEOUT (float): Таймаут подключения в повторах (секунды).
+        CHECK_RETRY_DELAY (float): Пауза перед повтором (секунды).
+        CHECK_RETRY_ON (str): Причины неудач, после которых проверка повторяется
+            (dns, connect, tls, timeout, http — только 5xx).
     """
     BOT_TOKEN: str
     DATABASE_URL: str = 'sqlite+aiosqlite:///./site_monitor.db'
     CHECK_TIMEOUT: int = 10
     DEFAULT_INTERVAL: int = 60
+    MAX_CONCURRENT_CHECKS: int = 100
+    MAX_CHECKS_PER_HOST: int = 4
+    CHECK_QUEUE_SIZE: int = 1000
+    HTTP_MAX_CONNECTIONS: int = 200
+    HTTP_MAX_KEEPALIVE: int = 100
+    HTTP_KEEPALIVE_EXPIRY: float = 120.0
+    HTTP2_ENABLED: bool = False
+    DNS_CACHE_SIZE: int = 4096
+    DNS_CACHE_TTL: int = 300
+    WRITE_BATCH_SIZE: int = 500
+    WRITE_FLUSH_INTERVAL: float = 1.0
+    WRITE_BUFFER_LIMIT: int = 50000
+    WRITE_MAX_RETRIES: int = 3
+    SCHEDULE_JITTER: float = 0.1
+    SCHEDULER_SYNC_INTERVAL: int = 30
+    REPORT_WINDOW_HOURS: int = 24
+    REPORT_FROM_ROLLUPS: bool = True
+    RETENTION_RAW_DAYS: int = 30
+    RETENTION_HOURLY_DAYS: int = 90
+    RETENTION_DAILY_DAYS: int = 0
+    RETENTION_BATCH_SIZE: int = 5000
+    RETENTION_INTERVAL: int = 3600
+    CHECKS_PARTITIONING: str = ""
+    CHECKS_PARTITIONS_AHEAD: int = 7
+    ALERT_CHAT_ID: int = 0
+    ALERT_FAILURE_THRESHOLD: int = 3
+    ALERT_FLAP_WINDOW: int = 20
+    ALERT_FLAP_HIGH: float = 0.5
+    ALERT_FLAP_LOW: float = 0.25
+    ALERT_STATE_FLUSH_INTERVAL: float = 10.0
+    NOTIFY_GLOBAL_RATE: float = 25.0
+    NOTIFY_CHAT_RATE: float = 1.0
+    NOTIFY_CHAT_BURST: int = 3
+    NOTIFY_DIGEST_DELAY: float = 1.0
+    NOTIFY_QUEUE_LIMIT: int = 10000
+    WORKER_MODE: bool = False
+    WORKER_PARTITIONS: int = 64
+    WORKER_LEASE_TTL: int = 30
+    OFFLOAD_MODE: str = "process"
+    OFFLOAD_WORKERS: int = 0
+    OFFLOAD_QUEUE_LIMIT: int = 256
+    OFFLOAD_INLINE_BYTES: int = 16384
+    LOOP_LAG_INTERVAL: float = 0.5
+    LOOP_LAG_WARN: float = 0.1
+    ASSERT_MAX_BYTES: int = 1048576
+    ASSERT_REGEX_TIMEOUT: float = 2.0
+    CERT_CACHE_SIZE: int = 4096
+    CERT_EXPIRY_DAYS: str = "30,14,7,1"
+    METRICS_HOST: str = "127.0.0.1"
+    METRICS_PORT: int = 9108
+    METRICS_PER_SITE: bool = True
+    QUERY_CACHE_TTL: float = 30.0
+    QUERY_CACHE_STATS_TTL: float = 60.0
+    QUERY_CACHE_SIZE: int = 1024
+    LIST_PAGE_SIZE: int = 10
+    HISTORY_PAGE_SIZE: int = 10
+    IMPORT_BATCH_SIZE: int = 1000
+    IMPORT_MAX_BYTES: int = 20 * 1024 * 1024
+    ADAPTIVE_INTERVALS: bool = False
+    ADAPTIVE_CONFIRM_INTERVAL: float = 15.0
+    ADAPTIVE_CONFIRM_CHECKS: int = 3
+    ADAPTIVE_MAX_INTERVAL: float = 1800.0
+    ADAPTIVE_STABLE_AFTER: int = 0
+    ADAPTIVE_STABLE_FACTOR: float = 2.0
+    CHECK_RETRY_BUDGETS: str = "3,5"
+    CHECK_RETRY_CONNECT_TIMEOUT: float = 2.0
+    CHECK_RETRY_DELAY: float = 0.5
+    CHECK_RETRY_ON: str = "dns,connect,timeout,http"
 
     class Config:
         env_file = ".env"  # загружаем настройки из файла .env
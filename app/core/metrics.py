@@ -0,0 +1,394 @@
+"""
+Метрики в текстовом формате Prometheus.
+
+Счётчики и гистограммы обновляются в горячем пути (проверки,
+планировщик, запись в БД), поэтому устроены максимально просто:
+словарь по кортежу меток и бинарный поиск корзины, без блокировок
+(всё происходит в одном цикле событий). Значения, которые уже
+считают сами сервисы (глубина очередей, размеры кэшей), читаются
+функциями в момент запроса `/metrics` и в горячем пути не стоят ничего.
+
+Метрики отдаёт маленькое ASGI-приложение под uvicorn на METRICS_HOST:METRICS_PORT.
+"""
+
+import asyncio
+import bisect
+import contextlib
+import math
+import socket
+from collections.abc import Callable
+
+from app.core.logger import get_logger
+
+logger = get_logger()
+
+# Корзины гистограмм длительностей по умолчанию (секунды)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Metric:
+    """
+    Базовая метрика с именем, описанием и именами меток.
+
+    Args:
+        name (str): Имя метрики.
+        help (str): Описание.
+        labels (tuple[str, ...]): Имена меток.
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+
+    def samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> list[str]:
+        """
+        Возвращает строки метрики в текстовом формате Prometheus.
+        """
+        return [
+            f"# HELP {self.name} {self.help}",
+            f"# TYPE {self.name} {self.type}",
+            *self.samples(),
+        ]
+
+
+class Counter(Metric):
+    """
+    Монотонный счётчик.
+    """
+
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1.0) -> None:
+        """
+        Увеличивает счётчик для набора меток.
+
+        Args:
+            *labels: Значения меток в порядке `labels`.
+            amount (float): Приращение.
+        """
+        self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0.0)
+
+    def remove(self, *labels) -> None:
+        """
+        Удаляет ряд (например, удалённого сайта).
+        """
+        self._values.pop(labels, None)
+
+    def samples(self) -> list[str]:
+        return [
+            f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+            for key, value in self._values.items()
+        ]
+
+
+class Histogram(Metric):
+    """
+    Гистограмма с фиксированными корзинами.
+
+    Args:
+        name (str): Имя метрики.
+        help (str): Описание.
+        labels (tuple[str, ...]): Имена меток.
+        buckets (tuple[float, ...]): Верхние границы корзин по возрастанию.
+    """
+
+    type = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Метки -> [счётчики корзин (последняя — +Inf), сумма, количество]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        """
+        Учитывает одно наблюдение.
+
+        Args:
+            value (float): Значение.
+            *labels: Значения меток в порядке `labels`.
+        """
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def count(self, *labels) -> int:
+        series = self._series.get(labels)
+        return series[2] if series else 0
+
+    def samples(self) -> list[str]:
+        lines = []
+        for key, (counts, total, count) in self._series.items():
+            cumulative = 0
+            for bound, n in zip((*self.buckets, math.inf), counts):
+                cumulative += n
+                le = _format_labels(self.labels, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {count}")
+        return lines
+
+
+class CallbackMetric(Metric):
+    """
+    Метрика, значение которой читается функцией в момент запроса.
+
+    Args:
+        name (str): Имя метрики.
+        help (str): Описание.
+        read (Callable): Функция, возвращающая число или словарь
+            {кортеж значений меток: число}.
+        type (str): "gauge" или "counter".
+        labels (tuple[str, ...]): Имена меток (если `read` возвращает словарь).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        read: Callable[[], float | dict[tuple, float]],
+        type: str = "gauge",
+        labels: tuple[str, ...] = (),
+    ):
+        super().__init__(name, help, labels)
+        self.type = type
+        self._read = read
+
+    def samples(self) -> list[str]:
+        values = self._read()
+        if not isinstance(values, dict):
+            values = {(): values}
+        return [
+            f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}"
+            for key, value in values.items()
+        ]
+
+
+class Registry:
+    """
+    Набор метрик процесса.
+    """
+
+    def __init__(self):
+        self._metrics: dict[str, Metric] = {}
+
+    def register(self, metric: Metric) -> Metric:
+        """
+        Добавляет метрику; метрика с тем же именем заменяется.
+
+        Returns:
+            Metric: Та же метрика.
+        """
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels: tuple[str, ...] = ()) -> Counter:
+        return self.register(Counter(name, help, labels))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self.register(Histogram(name, help, labels, buckets))
+
+    def gauge_func(
+        self,
+        name: str,
+        help: str,
+        read: Callable[[], float | dict[tuple, float]],
+        labels: tuple[str, ...] = (),
+    ) -> CallbackMetric:
+        return self.register(CallbackMetric(name, help, read, "gauge", labels))
+
+    def counter_func(
+        self, name: str, help: str, read: Callable[[], float]
+    ) -> CallbackMetric:
+        return self.register(CallbackMetric(name, help, read, "counter"))
+
+    def render(self) -> str:
+        """
+        Возвращает все метрики в текстовом формате Prometheus.
+
+        Ошибка чтения одной метрики не мешает остальным.
+        """
+        lines = []
+        for metric in self._metrics.values():
+            try:
+                lines.extend(metric.render())
+            except Exception as err:
+                lines.append(f"# {metric.name} failed: {err!r}")
+        return "\n".join(lines) + "\n"
+
+
+# Метрики процесса
+registry = Registry()
+
+# Метрики горячего пути: их обновляют сервисы
+CHECKS = registry.counter(
+    "site_checks_total", "Checks by site and outcome (up, down, error)", ("site_id", "outcome")
+)
+CHECK_DURATION = registry.histogram(
+    "check_duration_seconds", "Wall time of a check by outcome", ("outcome",)
+)
+CHECK_PHASE = registry.histogram(
+    "check_phase_seconds", "Request phase durations (dns, connect, tls, ttfb, transfer)", ("phase",)
+)
+CHECK_RETRIES = registry.counter(
+    "check_retries_total", "Check retries by failure class of the failed attempt",
+    ("failure_class",),
+)
+CHECK_RETRY_OUTCOMES = registry.counter(
+    "check_retry_outcomes_total",
+    "Retried checks that recovered or confirmed the failure", ("outcome",),
+)
+SCHEDULER_LAG = registry.histogram(
+    "scheduler_lag_seconds", "Check start time minus its due time",
+    buckets=(0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+DB_WRITE = registry.histogram(
+    "db_write_seconds", "Time to write one batch of checks to the database"
+)
+DB_WRITE_ROWS = registry.counter("db_write_rows_total", "Check rows written to the database")
+LOOP_LAG = registry.histogram(
+    "event_loop_lag_seconds", "How late the event loop woke up a periodic timer",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0),
+)
+
+
+async def metrics_app(scope, receive, send) -> None:
+    """
+    ASGI-приложение: GET /metrics отдаёт метрики, остальное — 404.
+    """
+    if scope["type"] != "http":
+        return
+    if scope["path"] != "/metrics":
+        status, body, content_type = 404, b"not found\n", b"text/plain"
+    else:
+        status = 200
+        body = registry.render().encode()
+        content_type = b"text/plain; version=0.0.4; charset=utf-8"
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", content_type), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+_server = None
+_server_task: asyncio.Task | None = None
+
+
+async def start_metrics_server(host: str, port: int, attempts: int = 1) -> int | None:
+    """
+    Запускает HTTP-сервер метрик в текущем цикле событий.
+
+    Порт занимается заранее: если заняты все `attempts` портов подряд,
+    начиная с `port`, метрики этого процесса не публикуются, но сам
+    процесс работает дальше.
+
+    Args:
+        host (str): Адрес, на котором слушать.
+        port (int): Первый порт (0 — не запускать).
+        attempts (int): Сколько портов подряд пробовать.
+
+    Returns:
+        int | None: Занятый порт или None, если сервер не запущен.
+    """
+    global _server, _server_task
+    if not port or _server_task is not None:
+        return None
+    try:
+        import uvicorn
+    except ImportError:
+        logger.warning("uvicorn is not installed, metrics endpoint is disabled")
+        return None
+
+    sock = None
+    for candidate in range(port, port + max(attempts, 1)):
+        sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        try:
+            sock.bind((host, candidate))
+            port = candidate
+            break
+        except OSError as err:
+            sock.close()
+            sock = None
+            error = err
+    if sock is None:
+        logger.warning(f"Metrics endpoint is disabled, cannot bind {host}:{port}: {error}")
+        return None
+
+    class _Server(uvicorn.Server):
+        # Сигналы остановки обрабатывает само приложение, а не сервер метрик
+        def install_signal_handlers(self) -> None:
+            pass
+
+        def capture_signals(self):
+            return contextlib.nullcontext()
+
+    config = uvicorn.Config(
+        metrics_app, log_config=None, access_log=False, lifespan="off", loop="none"
+    )
+    _server = _Server(config)
+    _server_task = asyncio.create_task(_server.serve(sockets=[sock]), name="metrics-server")
+    logger.info(f"Metrics endpoint: http://{host}:{port}/metrics")
+    return port
+
+
+async def stop_metrics_server() -> None:
+    """
+    Останавливает HTTP-сервер метрик.
+    """
+    global _server, _server_task
+    if _server_task is None:
+        return
+    _server.should_exit = True
+    await asyncio.gather(_server_task, return_exceptions=True)
+    _server, _server_task = None, None
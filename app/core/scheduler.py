@@ -1,58 +1,506 @@
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.interval import IntervalTrigger
+"""
+Планировщик проверок сайтов.
 
+Хранит для каждого сайта компактное состояние (интервал и время
+следующей проверки) и min-кучу сроков. Постановка и перенос проверки
+стоят O(log n), удаление — O(1) (устаревшие элементы кучи пропускаются
+при извлечении и периодически вычищаются).
+
+В адаптивном режиме (ADAPTIVE_INTERVALS) интервал сайта временно
+меняется по результатам проверок (см. `app.services.adaptive`):
+интервал из БД остаётся базовым, поверх него хранится текущий.
+"""
+
+import asyncio
+import heapq
+import random
+import time
+from collections.abc import Awaitable, Callable
+
+from app.core.config import settings
 from app.core.logger import get_logger
+from app.core.metrics import CHECKS, SCHEDULER_LAG, registry
 from app.db.database import AsyncSessionLocal
 from app.db import crud
-from app.services.monitor import check_site
-from app.services.notifier import notify_user
+from app.db.models import Site
+from app.services.adaptive import AdaptiveIntervals
+from app.services.monitor import (
+    add_check_listener,
+    alerts,
+    cert_alerts,
+    engine,
+    forget_validators,
+    prune_validators,
+)
+from app.services.subscriptions import subscriptions
 
 logger = get_logger()
-scheduler = AsyncIOScheduler()
 
+# Минимальное число устаревших элементов кучи, после которого она пересобирается
+_COMPACT_MIN_STALE = 1024
+
+
+class _Entry:
+    """Состояние сайта в планировщике."""
+
+    __slots__ = ("interval", "due", "override")
+
+    def __init__(self, interval: float, due: float | None = None):
+        self.interval = interval
+        self.due = due
+        # Временный интервал адаптивного режима (None — базовый)
+        self.override: float | None = None
 
-async def job_wrapper(site_id: int, chat_id: int | None = None) -> None:
+
+class HeapScheduler:
     """
-    Задача для планировщика: проверяет сайт и отправляет уведомление при сбое.
+    Планировщик периодических задач на min-куче сроков.
 
     Args:
-        site_id (int): Идентификатор сайта в БД.
-        chat_id (int | None): ID чата для отправки уведомлений (если указан).
+        dispatch (Callable): Корутина, вызываемая с ID сайта и его сроком, когда срок подошёл.
+        jitter (float): Случайная добавка к каждому следующему сроку (доля интервала).
+        clock (Callable): Источник монотонного времени.
     """
-    async with AsyncSessionLocal() as session:
-        site = await crud.get_site(session, site_id)
-        if not site or not site.is_active:
+
+    def __init__(
+        self,
+        dispatch: Callable[[int, float], Awaitable[None]],
+        jitter: float = 0.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._dispatch = dispatch
+        self.jitter = jitter
+        self._clock = clock
+        self._heap: list[tuple[float, int]] = []
+        self._entries: dict[int, _Entry] = {}
+        self._stale = 0
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+
+        self.dispatched = 0
+        self.lag_observed = 0
+        self.adjusted = 0
+        self.lag_last = 0.0
+        self.lag_max = 0.0
+        self._lag_sum = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, site_id: int) -> bool:
+        return site_id in self._entries
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    @property
+    def heap_size(self) -> int:
+        """Число элементов кучи, включая устаревшие."""
+        return len(self._heap)
+
+    def add(self, site_id: int, interval: float, delay: float | None = None) -> None:
+        """
+        Заводит или обновляет расписание сайта.
+
+        Если интервал не изменился, текущий срок сохраняется. Первый срок
+        нового сайта выбирается случайно в пределах интервала, чтобы
+        проверки не стартовали разом. Новый интервал сбрасывает временный.
+
+        Args:
+            site_id (int): Идентификатор сайта.
+            interval (float): Интервал проверки в секундах.
+            delay (float | None): Задержка до первой проверки (по умолчанию случайная).
+        """
+        entry = self._entries.get(site_id)
+        if entry is not None and entry.interval == interval and delay is None:
             return
 
-        res = await check_site(session, site)
+        if delay is None:
+            delay = random.uniform(0, interval)
+        if entry is None:
+            self._entries[site_id] = _Entry(interval)
+        else:
+            entry.interval = interval
+            if entry.override is not None:
+                entry.override = None
+                self.adjusted -= 1
+        self.reschedule(site_id, delay)
 
-        # Уведомляем пользователя, если сайт недоступен
-        if not res["is_available"] and chat_id:
-            await notify_user(chat_id, f"[ALERT] {site.url} is down")
+    def adjust(self, site_id: int, interval: float | None) -> None:
+        """
+        Задаёт временный интервал сайта поверх базового и отсчитывает
+        от текущего момента следующую проверку с новым интервалом.
 
+        Args:
+            site_id (int): Идентификатор сайта.
+            interval (float | None): Временный интервал (None — вернуть базовый).
+        """
+        entry = self._entries.get(site_id)
+        if entry is None or entry.override == interval:
+            return
+        self.adjusted += (interval is not None) - (entry.override is not None)
+        entry.override = interval
+        self.reschedule(site_id, entry.interval if interval is None else interval)
 
-async def schedule_all() -> None:
+    def reschedule(self, site_id: int, delay: float) -> None:
+        """
+        Переносит следующую проверку сайта.
+
+        Args:
+            site_id (int): Идентификатор сайта.
+            delay (float): Задержка до следующей проверки в секундах.
+        """
+        entry = self._entries.get(site_id)
+        if entry is None:
+            return
+        if entry.due is not None:
+            self._stale += 1
+        entry.due = self._clock() + delay
+        self._push(entry.due, site_id)
+
+    def remove(self, site_id: int) -> None:
+        """
+        Удаляет сайт из расписания.
+
+        Args:
+            site_id (int): Идентификатор сайта.
+        """
+        entry = self._entries.pop(site_id, None)
+        if entry is not None:
+            if entry.override is not None:
+                self.adjusted -= 1
+            self._stale += 1
+            self._maybe_compact()
+
+    def interval_of(self, site_id: int) -> float | None:
+        """
+        Возвращает базовый интервал сайта в расписании или None.
+        """
+        entry = self._entries.get(site_id)
+        return entry.interval if entry else None
+
+    def pop_due(self, now: float) -> list[tuple[int, float]]:
+        """
+        Извлекает сайты, срок проверки которых наступил, и назначает им следующий срок.
+
+        Args:
+            now (float): Текущее время часов планировщика.
+
+        Returns:
+            list[tuple[int, float]]: Пары (ID сайта, срок, на который была назначена проверка).
+        """
+        due_sites = []
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            due, site_id = heapq.heappop(heap)
+            entry = self._entries.get(site_id)
+            if entry is None or entry.due != due:
+                self._stale -= 1
+                continue
+
+            interval = entry.interval if entry.override is None else entry.override
+            next_due = due + interval
+            if self.jitter:
+                next_due += random.uniform(0, interval * self.jitter)
+            if next_due <= now:
+                # Проверка опоздала больше чем на интервал — не догоняем пропущенные
+                next_due = now + interval
+            entry.due = next_due
+            heapq.heappush(heap, (next_due, site_id))
+            due_sites.append((site_id, due))
+        return due_sites
+
+    async def run(self) -> None:
+        """
+        Основной цикл: спит до ближайшего срока и передаёт наступившие проверки в dispatch.
+        """
+        self._wakeup = asyncio.Event()
+        while True:
+            timeout = None
+            if self._heap:
+                timeout = max(self._heap[0][0] - self._clock(), 0)
+            if timeout != 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+            self._wakeup.clear()
+
+            for n, (site_id, due) in enumerate(self.pop_due(self._clock()), 1):
+                if n % 256 == 0:
+                    # Отдаём управление циклу событий при больших пачках
+                    await asyncio.sleep(0)
+                self.dispatched += 1
+                try:
+                    await self._dispatch(site_id, due)
+                except Exception as err:
+                    logger.exception(f"Dispatch failed for site {site_id}: {err}")
+
+    def observe_lag(self, lag: float) -> None:
+        """
+        Учитывает задержку запуска проверки относительно её срока.
+
+        Вызывается движком перед самой проверкой, поэтому задержка включает
+        и ожидание в очереди движка.
+
+        Args:
+            lag (float): Задержка (секунды).
+        """
+        self.lag_last = lag
+        self.lag_max = max(self.lag_max, lag)
+        self._lag_sum += lag
+        self.lag_observed += 1
+        SCHEDULER_LAG.observe(lag)
+
+    def start(self) -> None:
+        """
+        Запускает цикл планировщика в фоне.
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self.run(), name="scheduler")
+
+    async def stop(self) -> None:
+        """
+        Останавливает цикл планировщика.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> dict[str, float | int]:
+        """
+        Возвращает показатели планировщика.
+
+        Returns:
+            dict[str, float | int]: Число сайтов, размер кучи, число сайтов
+            с временным интервалом и задержка запуска проверок относительно
+            срока (последняя, средняя, максимальная).
+        """
+        return {
+            "sites": len(self._entries),
+            "heap_size": self.heap_size,
+            "adjusted": self.adjusted,
+            "dispatched": self.dispatched,
+            "lag_last": self.lag_last,
+            "lag_avg": self._lag_sum / self.lag_observed if self.lag_observed else 0.0,
+            "lag_max": self.lag_max,
+        }
+
+    def _push(self, due: float, site_id: int) -> None:
+        if self._wakeup is not None and (not self._heap or due < self._heap[0][0]):
+            # Новый срок раньше ближайшего — будим цикл
+            self._wakeup.set()
+        heapq.heappush(self._heap, (due, site_id))
+        self._maybe_compact()
+
+    def _maybe_compact(self) -> None:
+        if self._stale > _COMPACT_MIN_STALE and self._stale > len(self._entries):
+            self._heap = [(e.due, i) for i, e in self._entries.items()]
+            heapq.heapify(self._heap)
+            self._stale = 0
+
+
+# Сайты, для которых заведено расписание: id -> объект сайта
+_sites: dict[int, Site] = {}
+
+# Расписание ведёт этот процесс (включается в schedule_all). Бот в режиме
+# WORKER_MODE проверок не выполняет, и schedule_site/unschedule_site в нём
+# ничего не делают: сайты подхватит сверка в воркерах
+_scheduling = False
+
+# Секции сайтов этого процесса в режиме воркеров (None — проверяются все сайты)
+_partitions: frozenset[int] | None = None
+_partitions_total = 1
+
+
+def set_partitions(partitions: frozenset[int] | None, total: int = 1) -> None:
+    """
+    Ограничивает расписание сайтами из заданных секций (`site_id % total`).
+
+    Args:
+        partitions (frozenset[int] | None): Секции процесса (None — все сайты).
+        total (int): Общее число секций.
     """
-    Планирует задачи для всех сайтов из базы данных.
+    global _partitions, _partitions_total
+    _partitions = partitions
+    _partitions_total = total
+    # Валидаторы условных запросов ушедших секций больше не понадобятся
+    prune_validators(_owns)
+
+
+def _owns(site_id: int) -> bool:
+    return _partitions is None or site_id % _partitions_total in _partitions
+
+
+async def job_wrapper(site_id: int, due: float) -> None:
+    """
+    Задача для планировщика: ставит проверку сайта в движок мониторинга.
+
+    Движок соблюдает общие лимиты параллельности и лимиты на хост,
+    а при заполненной очереди притормаживает планировщик.
+
+    Args:
+        site_id (int): Идентификатор сайта в БД.
+        due (float): Срок проверки (для задержки запуска в движке).
+    """
+    site = _sites.get(site_id)
+    if not site or not site.is_active:
+        return
+    await engine.submit(site, due)
+
+
+scheduler = HeapScheduler(job_wrapper, jitter=settings.SCHEDULE_JITTER)
+# Задержку запуска меряет движок: перед проверкой, после ожидания в очереди
+engine.lag_observer = scheduler.observe_lag
+
+# Подстройка интервалов по результатам проверок (ADAPTIVE_INTERVALS)
+adaptive = AdaptiveIntervals(
+    confirm_interval=settings.ADAPTIVE_CONFIRM_INTERVAL,
+    confirm_checks=settings.ADAPTIVE_CONFIRM_CHECKS,
+    max_interval=settings.ADAPTIVE_MAX_INTERVAL,
+    stable_after=settings.ADAPTIVE_STABLE_AFTER,
+    stable_factor=settings.ADAPTIVE_STABLE_FACTOR,
+)
+
+
+def adapt_interval(site, result: dict) -> None:
+    """
+    Подстраивает интервал сайта после проверки.
+
+    Args:
+        site: Проверенный сайт.
+        result (dict): Результат `check_site`.
+    """
+    interval = scheduler.interval_of(site.id)
+    if interval is None:
+        return
+    scheduler.adjust(site.id, adaptive.observe(site.id, interval, result["is_available"]))
+
+
+if settings.ADAPTIVE_INTERVALS:
+    add_check_listener(adapt_interval)
+
+registry.gauge_func("scheduler_sites", "Sites on the schedule", lambda: len(scheduler))
+registry.gauge_func(
+    "scheduler_heap_size", "Entries in the scheduler heap", lambda: scheduler.heap_size
+)
+registry.gauge_func(
+    "scheduler_adjusted_sites", "Sites checked at an adaptive interval",
+    lambda: scheduler.adjusted,
+)
+
+
+def schedule_site(site: Site) -> None:
+    """
+    Заводит или обновляет расписание проверки сайта.
+    Ничего не делает, если расписание ведёт другой процесс.
+
+    Args:
+        site (Site): Сайт для проверки.
+    """
+    if not _scheduling:
+        return
+    if not site.is_active or not _owns(site.id):
+        unschedule_site(site.id)
+        return
+
+    interval = site.interval or settings.DEFAULT_INTERVAL
+    _sites[site.id] = site
+    if scheduler.interval_of(site.id) != interval:
+        scheduler.add(site.id, interval)
+        logger.debug(f"Scheduled job for {site.url} every {interval}s")
+
+
+def unschedule_site(site_id: int) -> None:
+    """
+    Снимает сайт с расписания, если он там есть.
+
+    Args:
+        site_id (int): Идентификатор сайта.
+    """
+    # Валидаторы могли остаться и без расписания (например, после /probe)
+    forget_validators(site_id)
+    if not _scheduling or _sites.pop(site_id, None) is None:
+        return
+    scheduler.remove(site_id)
+    adaptive.forget(site_id)
+    alerts.forget(site_id)
+    cert_alerts.forget(site_id)
+    for outcome in ("up", "down", "error"):
+        CHECKS.remove(site_id, outcome)
+    logger.info(f"Unscheduled job for site {site_id}")
+
+
+async def sync_sites() -> None:
+    """
+    Сверяет расписание со списком сайтов в базе данных:
+    заводит новые сайты, обновляет изменившиеся и снимает удалённые.
+    В режиме воркеров читаются только сайты своих секций.
     """
     async with AsyncSessionLocal() as session:
-        sites = await crud.list_sites(session)
+        if _partitions is None:
+            sites = await crud.list_sites(session)
+        else:
+            sites = await crud.list_sites_in_partitions(
+                session, _partitions, _partitions_total
+            )
 
+    current = {s.id for s in sites}
+    for site_id in list(_sites):
+        if site_id not in current:
+            unschedule_site(site_id)
     for s in sites:
-        scheduler.add_job(
-            job_wrapper,
-            IntervalTrigger(seconds=s.interval),
-            args=[s.id],
-            id=str(s.id),
-            replace_existing=True,
-        )
-        logger.info(f"Scheduled job for {s.url} every {s.interval}s")
+        schedule_site(s)
+
+
+async def _sync_loop() -> None:
+    while True:
+        await asyncio.sleep(settings.SCHEDULER_SYNC_INTERVAL)
+        try:
+            await sync_sites()
+            # Подписки могли поменяться в другом процессе
+            await subscriptions.load(AsyncSessionLocal)
+        except Exception as err:
+            logger.exception(f"Failed to sync scheduled sites: {err}")
+
+
+_sync_task: asyncio.Task | None = None
+
+
+async def schedule_all() -> None:
+    """
+    Планирует проверки всех сайтов из базы данных и периодическую
+    сверку, которая подхватывает добавленные и удалённые сайты
+    и изменения подписок без перезапуска.
+    """
+    global _scheduling, _sync_task
+    _scheduling = True
+    await sync_sites()
+    await subscriptions.load(AsyncSessionLocal)
+    logger.info(f"Scheduled {len(scheduler)} sites")
+    if _sync_task is None:
+        _sync_task = asyncio.create_task(_sync_loop(), name="scheduler-sync")
 
 
 def start_scheduler() -> None:
     """
     Запускает планировщик.
     """
-    scheduler.start(paused=False)
+    scheduler.start()
     logger.info("Scheduler started")
 
+
+async def stop_scheduler() -> None:
+    """
+    Останавливает планировщик и периодическую сверку.
+    """
+    global _scheduling, _sync_task
+    _scheduling = False
+    if _sync_task is not None:
+        _sync_task.cancel()
+        await asyncio.gather(_sync_task, return_exceptions=True)
+        _sync_task = None
+    await scheduler.stop()
+    logger.info(f"Scheduler stopped, stats: {scheduler.stats()}")
@@ -0,0 +1,178 @@
+"""
+Кэш запросов бота к БД.
+
+Результаты чтений (список сайтов, последние проверки, статистика)
+хранятся в памяти процесса с TTL и помечаются тегами; записи в БД
+через `crud` сбрасывают записи с затронутыми тегами. Одновременные
+одинаковые запросы выполняются один раз (single-flight): остальные
+ждут результата первого.
+
+Кэш живёт в процессе: записи из других процессов (воркеров) он
+видит только по истечении TTL.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable, Iterable
+from typing import Any
+
+from app.core.config import settings
+from app.core.metrics import registry
+
+# Теги: список сайтов, последние проверки сайта, статистика
+SITES = "sites"
+STATS = "stats"
+
+
+def checks_tag(site_id: int) -> tuple[str, int]:
+    """
+    Возвращает тег последних проверок сайта.
+    """
+    return ("checks", site_id)
+
+
+class QueryCache:
+    """
+    Кэш результатов запросов с TTL, тегами и объединением одинаковых запросов.
+
+    Args:
+        ttl (float): Время жизни записи по умолчанию (секунды, 0 — не кэшировать,
+            но объединять одновременные запросы).
+        max_size (int): Максимум записей (вытесняются давно не читанные).
+        clock (Callable): Источник монотонного времени.
+    """
+
+    def __init__(self, ttl: float, max_size: int, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._clock = clock
+        # Ключ -> (срок, значение, теги)
+        self._entries: OrderedDict[Hashable, tuple[float, Any, tuple]] = OrderedDict()
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        # Версии тегов: запрос, начатый до сброса тега, не сохраняет результат
+        self._versions: dict[Hashable, int] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        load: Callable[[], Awaitable[Any]],
+        tags: Iterable[Hashable] = (),
+        ttl: float | None = None,
+    ) -> Any:
+        """
+        Возвращает результат из кэша или выполняет запрос.
+
+        Args:
+            key (Hashable): Ключ запроса (имя и параметры).
+            load (Callable): Корутина-функция, выполняющая запрос.
+            tags (Iterable[Hashable]): Теги, сброс которых делает результат устаревшим.
+            ttl (float | None): Время жизни записи (по умолчанию `ttl` кэша).
+
+        Returns:
+            Any: Результат запроса. Его нельзя менять — он общий для всех читателей.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires, value, _ = entry
+            if expires > self._clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+
+        task = self._inflight.get(key)
+        if task is None:
+            self.misses += 1
+            tags = tuple(tags)
+            task = asyncio.create_task(self._load_and_store(key, load, tags, ttl))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._forget(key, t))
+        else:
+            # Такой же запрос уже выполняется — ждём его результат
+            self.coalesced += 1
+        # Отмена одного читателя не должна прерывать запрос для остальных
+        return await asyncio.shield(task)
+
+    async def _load_and_store(
+        self, key: Hashable, load: Callable[[], Awaitable[Any]], tags: tuple, ttl: float | None
+    ) -> Any:
+        versions = [self._versions.get(tag, 0) for tag in tags]
+        value = await load()
+        ttl = self.ttl if ttl is None else ttl
+        fresh = all(self._versions.get(tag, 0) == v for tag, v in zip(tags, versions))
+        if fresh and ttl > 0 and self.max_size > 0:
+            self._entries[key] = (self._clock() + ttl, value, tags)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return value
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        self._inflight.pop(key, None)
+        if not task.cancelled():
+            # Помечаем исключение полученным, даже если ждать было некому
+            task.exception()
+
+    def invalidate(self, *tags: Hashable) -> int:
+        """
+        Сбрасывает записи с любым из тегов.
+
+        Args:
+            *tags (Hashable): Теги.
+
+        Returns:
+            int: Количество сброшенных записей.
+        """
+        tags = set(tags)
+        for tag in tags:
+            self._versions[tag] = self._versions.get(tag, 0) + 1
+        stale = [key for key, (_, _, entry_tags) in self._entries.items() if tags & set(entry_tags)]
+        for key in stale:
+            del self._entries[key]
+        self.invalidations += len(stale)
+        return len(stale)
+
+    def clear(self) -> None:
+        """
+        Очищает кэш.
+        """
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        """
+        Возвращает показатели кэша.
+
+        Returns:
+            dict[str, int]: Размер, попадания, промахи, объединённые запросы
+            и сброшенные записи.
+        """
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "invalidations": self.invalidations,
+        }
+
+
+# Общий кэш запросов бота
+query_cache = QueryCache(ttl=settings.QUERY_CACHE_TTL, max_size=settings.QUERY_CACHE_SIZE)
+
+registry.counter_func("query_cache_hits_total", "Bot query cache hits", lambda: query_cache.hits)
+registry.counter_func(
+    "query_cache_misses_total", "Bot query cache misses (queries sent to the database)",
+    lambda: query_cache.misses,
+)
+registry.counter_func(
+    "query_cache_coalesced_total", "Bot queries that waited for an identical running query",
+    lambda: query_cache.coalesced,
+)
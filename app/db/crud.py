@@ -1,14 +1,72 @@
-from sqlalchemy import select, delete
+from datetime import datetime, timedelta
+
+from sqlalchemy import select, delete, insert, update, func, case, or_, and_
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models import Site, Check
+from app.db.models import (
+    Site, Check, CheckRollup, SiteAlertState, Subscription, PartitionLease, MonitorWorker,
+)
+from app.db import partitions
+from app.db.cache import SITES, STATS, checks_tag, query_cache
+from app.core.config import settings
 from app.core.logger import get_logger
 
 logger = get_logger()
 
+# Размеры корзин предагрегированной статистики
+ROLLUP_PERIODS = ("hour", "day")
+
+
+def _dialect_insert(session: AsyncSession, table):
+    """
+    Возвращает INSERT с поддержкой ON CONFLICT для диалекта сессии.
+    """
+    if session.bind.dialect.name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
 
-async def create_site(session: AsyncSession, url: str, interval: int) -> Site:
+def bucket_start(moment: datetime, period: str) -> datetime:
+    """
+    Возвращает начало корзины статистики, в которую попадает момент времени.
+
+    Args:
+        moment (datetime): Время проверки.
+        period (str): "hour" или "day".
+
+    Returns:
+        datetime: Начало часа или суток.
+    """
+    if period == "hour":
+        return moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def report_since(hours: int, now: datetime | None = None) -> datetime:
+    """
+    Возвращает начало окна отчёта /report.
+
+    Окно начинается с начала часа, в который попадает момент `hours` часов
+    назад, и длится до текущего момента. Граница совпадает с границей
+    часовых корзин, поэтому отчёт по корзинам (`rollup_stats`) и по сырым
+    проверкам (`stats_for_sites`) считается по одним и тем же проверкам.
+
+    Args:
+        hours (int): Длина окна (часы).
+        now (datetime | None): Текущий момент (по умолчанию datetime.now()).
+
+    Returns:
+        datetime: Начало окна.
+    """
+    now = now or datetime.now()
+    return bucket_start(now - timedelta(hours=hours), "hour")
+
+
+async def create_site(
+    session: AsyncSession, url: str, interval: int, owner_chat_id: int | None = None
+) -> Site:
     """
     Создаёт новый сайт или возвращает существующий при попытке дубликата.
 
@@ -16,15 +74,17 @@ async def create_site(session: AsyncSession, url: str, interval: int) -> Site:
         session (AsyncSession): Сессия базы данных.
         url (str): Адрес сайта.
         interval (int): Интервал проверки в секундах.
+        owner_chat_id (int | None): Чат, из которого сайт добавлен.
 
     Returns:
         Site: Созданный или найденный сайт.
     """
-    site = Site(url=url, interval=interval)
+    site = Site(url=url, interval=interval, owner_chat_id=owner_chat_id)
     session.add(site)
     try:
         await session.commit()
         await session.refresh(site)
+        query_cache.invalidate(SITES, STATS)
         logger.info(f'Site added: {url}')
         return site
     except IntegrityError:
@@ -35,6 +95,74 @@ async def create_site(session: AsyncSession, url: str, interval: int) -> Site:
         return existing
 
 
+async def upsert_sites(
+    session: AsyncSession,
+    rows: list[dict],
+    owner_chat_id: int | None = None,
+) -> tuple[list[Site], list[Site]]:
+    """
+    Добавляет или обновляет пачку сайтов одним коммитом через ON CONFLICT (url).
+
+    У существующего сайта меняются только поля, явно заданные в строке;
+    новые сайты без интервала получают DEFAULT_INTERVAL. Чат `owner_chat_id`
+    подписывается на новые сайты в той же транзакции, как при /add.
+
+    Args:
+        session (AsyncSession): Сессия базы данных.
+        rows (list[dict]): Сайты: ключ url и, необязательно, interval и probe_mode.
+            Адреса в пачке должны быть уникальны.
+        owner_chat_id (int | None): Чат, из которого сайты добавлены (только для новых).
+
+    Returns:
+        tuple[list[Site], list[Site]]: Все сайты пачки после записи и новые из них.
+    """
+    if not rows:
+        return [], []
+
+    urls = [row["url"] for row in rows]
+    existing = set(
+        (await session.execute(select(Site.url).where(Site.url.in_(urls)))).scalars().all()
+    )
+
+    # executemany требует одинаковых ключей: группируем строки по набору полей
+    groups: dict[tuple[str, ...], list[dict]] = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row)), []).append(row)
+
+    for keys, group in groups.items():
+        stmt = _dialect_insert(session, Site)
+        updated = {key: stmt.excluded[key] for key in keys if key != "url"}
+        if updated:
+            stmt = stmt.on_conflict_do_update(index_elements=["url"], set_=updated)
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=["url"])
+        await session.execute(stmt, [
+            {"interval": settings.DEFAULT_INTERVAL, **row, "owner_chat_id": owner_chat_id}
+            for row in group
+        ])
+
+    result = await session.execute(
+        select(Site)
+        .where(Site.url.in_(urls))
+        .execution_options(populate_existing=True)
+    )
+    sites = result.scalars().all()
+    added = [site for site in sites if site.url not in existing]
+
+    if owner_chat_id is not None and added:
+        now = datetime.now()
+        stmt = _dialect_insert(session, Subscription).on_conflict_do_nothing(
+            index_elements=["site_id", "chat_id"]
+        )
+        await session.execute(stmt, [
+            {"site_id": site.id, "chat_id": owner_chat_id, "created_at": now}
+            for site in added
+        ])
+    await session.commit()
+    query_cache.invalidate(SITES, STATS)
+    return sites, added
+
+
 async def list_sites(session: AsyncSession) -> list[Site]:
     """
     Возвращает список всех сайтов.
@@ -49,6 +177,68 @@ async def list_sites(session: AsyncSession) -> list[Site]:
     return result.scalars().all()
 
 
+async def list_sites_page(
+    session: AsyncSession,
+    limit: int,
+    after_id: int | None = None,
+    before_id: int | None = None,
+) -> tuple[list[Site], bool]:
+    """
+    Возвращает страницу сайтов по возрастанию ID (keyset-пагинация).
+
+    Страница ищется по индексу первичного ключа от курсора, а не через
+    OFFSET, поэтому цена запроса не зависит от номера страницы.
+
+    Args:
+        session (AsyncSession): Сессия базы данных.
+        limit (int): Размер страницы.
+        after_id (int | None): Вернуть сайты с ID больше этого (следующая страница).
+        before_id (int | None): Вернуть сайты с ID меньше этого (предыдущая страница).
+
+    Returns:
+        tuple[list[Site], bool]: Сайты страницы и признак того, что в направлении
+        листания есть ещё сайты.
+    """
+    query = select(Site)
+    if before_id is not None:
+        query = query.where(Site.id < before_id).order_by(Site.id.desc())
+    else:
+        if after_id is not None:
+            query = query.where(Site.id > after_id)
+        query = query.order_by(Site.id)
+
+    # Лишняя строка показывает, есть ли следующая страница
+    result = await session.execute(query.limit(limit + 1))
+    sites = list(result.scalars().all())
+    more = len(sites) > limit
+    sites = sites[:limit]
+    if before_id is not None:
+        sites.reverse()
+    return sites, more
+
+
+async def list_sites_in_partitions(
+    session: AsyncSession, partitions: set[int], total: int
+) -> list[Site]:
+    """
+    Возвращает сайты из заданных секций (`site_id % total`).
+
+    Args:
+        session (AsyncSession): Сессия базы данных.
+        partitions (set[int]): Номера секций.
+        total (int): Общее число секций.
+
+    Returns:
+        list[Site]: Список сайтов.
+    """
+    if not partitions:
+        return []
+    result = await session.execute(
+        select(Site).where((Site.id % total).in_(sorted(partitions)))
+    )
+    return result.scalars().all()
+
+
 async def get_site(session: AsyncSession, site_id: int) -> Site | None:
     """
     Получает сайт по его ID.
@@ -72,8 +262,13 @@ async def delete_site(session: AsyncSession, site_id: int) -> None:
         session (AsyncSession): Сессия базы данных.
         site_id (int): Идентификатор сайта.
     """
+    await session.execute(delete(CheckRollup).where(CheckRollup.site_id == site_id))
+    await session.execute(delete(SiteAlertState).where(SiteAlertState.site_id == site_id))
+    await session.execute(delete(Subscription).where(Subscription.site_id == site_id))
+    await session.execute(delete(Check).where(Check.site_id == site_id))
     await session.execute(delete(Site).where(Site.id == site_id))
     await session.commit()
+    query_cache.invalidate(SITES, STATS, checks_tag(site_id))
     logger.info(f'Site deleted: {site_id}')
 
 
@@ -83,6 +278,7 @@ async def create_check(
     status_code: int | None,
     response_time: float | None,
     is_available: bool,
+    **fields,
 ) -> Check:
     """
     Добавляет запись о проверке сайта.
@@ -93,6 +289,7 @@ async def create_check(
         status_code (int | None): Код ответа HTTP.
         response_time (float | None): Время ответа.
         is_available (bool): Флаг доступности.
+        **fields: Значения остальных колонок таблицы checks.
 
     Returns:
         Check: Добавленная запись проверки.
@@ -102,34 +299,556 @@ async def create_check(
         status_code=status_code,
         response_time=response_time,
         is_available=is_available,
+        checked_at=datetime.now(),
+        **fields,
     )
     session.add(check)
+    await update_rollups(session, [{
+        "site_id": check.site_id,
+        "response_time": response_time,
+        "is_available": is_available,
+        "checked_at": check.checked_at,
+    }])
     await session.commit()
+    query_cache.invalidate(checks_tag(check.site_id))
     await session.refresh(check)
     return check
 
 
-async def last_checks(session: AsyncSession, site_id: int, limit: int = 10) -> list[Check]:
+async def create_checks(session: AsyncSession, rows: list[dict]) -> None:
+    """
+    Добавляет пачку записей о проверках одной вставкой и одним коммитом
+    вместе с обновлением предагрегированной статистики.
+
+    Args:
+        session (AsyncSession): Сессия базы данных.
+        rows (list[dict]): Значения колонок таблицы checks.
+    """
+    if not rows:
+        return
+    await session.execute(insert(Check), rows)
+    await update_rollups(session, rows)
+    await session.commit()
+    # Статистика за окно отчёта не сбрасывается на каждую запись, её устаревание
+    # ограничено QUERY_CACHE_STATS_TTL
+    query_cache.invalidate(*{checks_tag(row["site_id"]) for row in rows})
+
+
+async def update_rollups(session: AsyncSession, rows: list[dict]) -> None:
+    """
+    Прибавляет проверки к часовым и суточным корзинам статистики (без коммита).
+
+    Args:
+        session (AsyncSession): Сессия базы данных.
+        rows (list[dict]): Проверки с ключами site_id, is_available,
+            response_time и checked_at.
+    """
+    deltas: dict[tuple, list] = {}
+    for row in rows:
+        for period in ROLLUP_PERIODS:
+            key = (row["site_id"], period, bucket_start(row["checked_at"], period))
+            delta = deltas.setdefault(key, [0, 0, 0.0, 0])
+            delta[0] += 1
+            delta[1] += 1 if row["is_available"] else 0
+            delta[2] += row["response_time"] or 0
+            delta[3] += 0 if row["response_time"] is None else 1
+
+    if not deltas:
+        return
+
+    stmt = _dialect_insert(session, CheckRollup)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["site_id", "period", "bucket"],
+        set_={
+            "total": CheckRollup.total + stmt.excluded.total,
+            "up": CheckRollup.up + stmt.excluded.up,
+            "response_sum": CheckRollup.response_sum + stmt.excluded.response_sum,
+            "response_count": CheckRollup.response_count + stmt.excluded.response_count,
+        },
+    )
+    await session.execute(stmt, [
+        {
+            "site_id": site_id,
+            "period": period,
+            "bucket": bucket,
+            "total": total,
+            "up": up,
+            "response_sum": response_sum,
+            "response_count": response_count,
+        }
+        for (site_id, period, bucket), (total, up, response_sum, response_count)
+        in deltas.items()
+    ])
+
+
+async def set_probe_mode(session: AsyncSession, site_id: int, probe_mode: str) -> Site | None:
+    """
+    Меняет способ проверки сайта.
+
+    Args:
+        session (AsyncSession): Сессия базы данных.
+        site_id (int): Идентификатор сайта.
+        probe_mode (str): Способ проверки ("get", "head", "stream", "conditional").
+
+    Returns:
+        Site | None: Обновлённый сайт или None, если сайта нет.
+    """
+    site = await get_site(session, site_id)
+    if site is None:
+        return None
+    site.probe_mode = probe_mode
+    await session.commit()
+    query_cache.invalidate(SITES)
+    return site
+
+
+async def set_assertion(
+    session: AsyncSession, site_id: int, assert_type: str | None, assert_value: str | None
+) -> Site | None:
+    """
+    Задаёт или снимает проверку содержимого сайта.
+
+    Args:
+        session (AsyncSession): Сессия базы данных.
+        site_id (int): Идентификатор сайта.
+        assert_type (str | None): Вид проверки (None — снять проверку).
+        assert_value (str | None): Строка, регулярное выражение или SHA-256.
+
+    Returns:
+        Site | None: Обновлённый сайт или None, если сайта нет.
+    """
+    site = await get_site(session, site_id)
+    if site is None:
+        return None
+    site.assert_type = assert_type
+    site.assert_value = assert_value if assert_type else None
+    await session.commit()
+    query_cache.invalidate(SITES)
+    return site
+
+
+async def set_cert_state(
+    session: AsyncSession, site_id: int, not_after: datetime | None, alerted_days: int | None
+) -> None:
+    """
+    Сохраняет срок сертификата сайта и последний порог, о котором оповестили.
+
+    Args:
+        session (AsyncSession): Сессия базы данных.
+        site_id (int): Идентификатор сайта.
+        not_after (datetime | None): Окончание срока сертификата (UTC).
+        alerted_days (int | None): Порог в днях (None — оповещений ещё не было).
+    """
+    await session.execute(
+        update(Site)
+        .where(Site.id == site_id)
+        .values(cert_not_after=not_after, cert_alerted_days=alerted_days)
+    )
+    await session.commit()
+    query_cache.invalidate(SITES)
+
+
+async def subscribe(
+    session: AsyncSession, site_id: int, chat_id: int, failure_threshold: int | None = None
+) -> None:
+    """
+    Подписывает чат на оповещения о сайте или меняет порог существующей подписки.
+
+    Args:
+        session (AsyncSession): Сессия базы данных.
+        site_id (int): Идентификатор сайта.
+        chat_id (int): ID чата.
+        failure_threshold (int | None): Неудачных проверок подряд до оповещения.
+    """
+    stmt = _dialect_insert(session, Subscription).values(
+        site_id=site_id,
+        chat_id=chat_id,
+        failure_threshold=failure_threshold,
+        created_at=datetime.now(),
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["site_id", "chat_id"],
+        set_={"failure_threshold": stmt.excluded.failure_threshold},
+    )
+    await session.execute(stmt)
+    await session.commit()
+
+
+async def unsubscribe(session: AsyncSession, site_id: int, chat_id: int) -> bool:
+    """
+    Отписывает чат от оповещений о сайте.
+
+    Args:
+        session (AsyncSession): Сессия базы данных.
+        site_id (int): Идентификатор сайта.
+        chat_id (int): ID чата.
+
+    Returns:
+        bool: True, если подписка была.
+    """
+    result = await session.execute(
+        delete(Subscription).where(
+            Subscription.site_id == site_id, Subscription.chat_id == chat_id
+        )
+    )
+    await session.commit()
+    return result.rowcount > 0
+
+
+async def list_subscriptions(session: AsyncSession) -> list[Subscription]:
+    """
+    Возвращает все подписки на оповещения.
+
+    Args:
+        session (AsyncSession): Сессия базы данных.
+
+    Returns:
+        list[Subscription]: Подписки.
+    """
+    result = await session.execute(select(Subscription))
+    return list(result.scalars().all())
+
+
+async def load_alert_states(session: AsyncSession) -> list[SiteAlertState]:
+    """
+    Возвращает сохранённые состояния оповещений всех сайтов.
+
+    Args:
+        session (AsyncSession): Сессия базы данных.
+
+    Returns:
+        list[SiteAlertState]: Состояния оповещений.
+    """
+    result = await session.execute(select(SiteAlertState))
+    return list(result.scalars().all())
+
+
+async def save_alert_states(session: AsyncSession, rows: list[dict]) -> None:
+    """
+    Сохраняет состояния оповещений пачкой (вставка или обновление).
+
+    Args:
+        session (AsyncSession): Сессия базы данных.
+        rows (list[dict]): Значения колонок таблицы site_alert_states.
+    """
+    if not rows:
+        return
+    stmt = _dialect_insert(session, SiteAlertState)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["site_id"],
+        set_={
+            name: stmt.excluded[name]
+            for name in ("state", "failures", "history", "samples", "failing_since", "changed_at")
+        },
+    )
+    await session.execute(stmt, rows)
+    await session.commit()
+
+
+async def heartbeat_worker(session: AsyncSession, worker_id: str, now: datetime) -> None:
+    """
+    Отмечает воркер живым (создаёт запись при первом сигнале).
+
+    Args:
+        session (AsyncSession): Сессия базы данных.
+        worker_id (str): ID воркера.
+        now (datetime): Текущее время.
+    """
+    stmt = _dialect_insert(session, MonitorWorker).values(
+        id=worker_id, started_at=now, heartbeat_at=now
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["id"], set_={"heartbeat_at": stmt.excluded.heartbeat_at}
+    )
+    await session.execute(stmt)
+    await session.commit()
+
+
+async def live_workers(session: AsyncSession, since: datetime) -> list[str]:
+    """
+    Возвращает ID воркеров, подававших сигнал после `since`, по порядку.
+
+    Args:
+        session (AsyncSession): Сессия базы данных.
+        since (datetime): Граница времени последнего сигнала.
+
+    Returns:
+        list[str]: ID живых воркеров.
+    """
+    result = await session.execute(
+        select(MonitorWorker.id)
+        .where(MonitorWorker.heartbeat_at >= since)
+        .order_by(MonitorWorker.id)
+    )
+    return list(result.scalars().all())
+
+
+async def delete_worker(session: AsyncSession, worker_id: str) -> None:
+    """
+    Удаляет запись воркера и освобождает все его секции.
+
+    Args:
+        session (AsyncSession): Сессия базы данных.
+        worker_id (str): ID воркера.
+    """
+    await session.execute(
+        update(PartitionLease)
+        .where(PartitionLease.owner == worker_id)
+        .values(owner=None, expires_at=None)
+    )
+    await session.execute(delete(MonitorWorker).where(MonitorWorker.id == worker_id))
+    await session.commit()
+
+
+async def ensure_partition_rows(session: AsyncSession, total: int) -> None:
+    """
+    Заводит строки аренды для секций 0..total-1, которых ещё нет.
+
+    Args:
+        session (AsyncSession): Сессия базы данных.
+        total (int): Общее число секций.
+    """
+    stmt = _dialect_insert(session, PartitionLease).on_conflict_do_nothing(
+        index_elements=["partition"]
+    )
+    await session.execute(stmt, [{"partition": p} for p in range(total)])
+    await session.commit()
+
+
+async def renew_leases(
+    session: AsyncSession, owner: str, expires_at: datetime
+) -> set[int]:
+    """
+    Продлевает все аренды воркера.
+
+    Args:
+        session (AsyncSession): Сессия базы данных.
+        owner (str): ID воркера.
+        expires_at (datetime): Новое время окончания аренды.
+
+    Returns:
+        set[int]: Секции, которыми воркер владеет после продления.
+    """
+    await session.execute(
+        update(PartitionLease)
+        .where(PartitionLease.owner == owner)
+        .values(expires_at=expires_at)
+    )
+    result = await session.execute(
+        select(PartitionLease.partition).where(PartitionLease.owner == owner)
+    )
+    await session.commit()
+    return set(result.scalars().all())
+
+
+async def free_partitions(session: AsyncSession, now: datetime) -> list[int]:
+    """
+    Возвращает свободные секции и секции с истёкшей арендой.
+
+    Args:
+        session (AsyncSession): Сессия базы данных.
+        now (datetime): Текущее время.
+
+    Returns:
+        list[int]: Номера секций.
+    """
+    result = await session.execute(
+        select(PartitionLease.partition).where(
+            or_(PartitionLease.owner.is_(None), PartitionLease.expires_at < now)
+        )
+    )
+    return list(result.scalars().all())
+
+
+async def acquire_lease(
+    session: AsyncSession, partition: int, owner: str, now: datetime, expires_at: datetime
+) -> bool:
+    """
+    Пытается взять секцию в аренду, если она свободна или аренда истекла.
+
+    Условие проверяется в самом UPDATE, поэтому из нескольких воркеров,
+    одновременно претендующих на секцию, её получает ровно один.
+
+    Args:
+        session (AsyncSession): Сессия базы данных.
+        partition (int): Номер секции.
+        owner (str): ID воркера.
+        now (datetime): Текущее время.
+        expires_at (datetime): Время окончания аренды.
+
+    Returns:
+        bool: True, если секция получена.
+    """
+    result = await session.execute(
+        update(PartitionLease)
+        .where(
+            PartitionLease.partition == partition,
+            or_(PartitionLease.owner.is_(None), PartitionLease.expires_at < now),
+        )
+        .values(owner=owner, expires_at=expires_at)
+    )
+    await session.commit()
+    return result.rowcount == 1
+
+
+async def release_leases(session: AsyncSession, owner: str, partitions: set[int]) -> None:
+    """
+    Освобождает секции воркера.
+
+    Args:
+        session (AsyncSession): Сессия базы данных.
+        owner (str): ID воркера.
+        partitions (set[int]): Номера секций.
+    """
+    if not partitions:
+        return
+    await session.execute(
+        update(PartitionLease)
+        .where(PartitionLease.owner == owner, PartitionLease.partition.in_(sorted(partitions)))
+        .values(owner=None, expires_at=None)
+    )
+    await session.commit()
+
+
+async def delete_checks_before(session: AsyncSession, cutoff: datetime, limit: int) -> int:
+    """
+    Удаляет не более `limit` проверок старше `cutoff` одним коммитом.
+
+    Args:
+        session (AsyncSession): Сессия базы данных.
+        cutoff (datetime): Проверки до этого момента удаляются.
+        limit (int): Максимум строк за один вызов.
+
+    Returns:
+        int: Количество удалённых строк.
+    """
+    ids = select(Check.id).where(Check.checked_at < cutoff).limit(limit).scalar_subquery()
+    result = await session.execute(delete(Check).where(Check.id.in_(ids)))
+    await session.commit()
+    return result.rowcount
+
+
+async def delete_rollups_before(session: AsyncSession, period: str, cutoff: datetime) -> int:
+    """
+    Удаляет корзины статистики заданного размера, начавшиеся раньше `cutoff`.
+
+    Args:
+        session (AsyncSession): Сессия базы данных.
+        period (str): "hour" или "day".
+        cutoff (datetime): Граница удаления.
+
+    Returns:
+        int: Количество удалённых строк.
+    """
+    result = await session.execute(
+        delete(CheckRollup).where(CheckRollup.period == period, CheckRollup.bucket < cutoff)
+    )
+    await session.commit()
+    return result.rowcount
+
+
+async def last_checks(
+    session: AsyncSession,
+    site_id: int,
+    limit: int = 10,
+    since: datetime | None = None,
+) -> list[Check]:
     """
     Возвращает последние проверки сайта.
 
+    Для секционированной таблицы запрос сначала ограничивается последними
+    секциями и расширяет окно, только если проверок не хватает.
+
     Args:
         session (AsyncSession): Сессия базы данных.
         site_id (int): Идентификатор сайта.
         limit (int): Ограничение на количество записей.
+        since (datetime | None): Нижняя граница времени проверки.
 
     Returns:
         list[Check]: Последние проверки.
     """
-    result = await session.execute(
+    if since is None and partitions.partitioning_enabled(session):
+        now = datetime.now()
+        for window in partitions.lookup_windows(
+            settings.CHECKS_PARTITIONING, settings.RETENTION_RAW_DAYS
+        ):
+            checks = await last_checks(session, site_id, limit, since=now - window)
+            if len(checks) >= limit:
+                return checks
+        if settings.RETENTION_RAW_DAYS:
+            # Последнее окно уже покрывает весь срок хранения
+            return checks
+
+    query = (
         select(Check)
         .where(Check.site_id == site_id)
-        .order_by(Check.checked_at.desc())
+        .order_by(Check.checked_at.desc(), Check.id.desc())
         .limit(limit)
     )
+    if since is not None:
+        query = query.where(Check.checked_at >= since)
+
+    result = await session.execute(query)
     return result.scalars().all()
 
 
+async def checks_page(
+    session: AsyncSession,
+    site_id: int,
+    limit: int,
+    before: tuple[datetime, int] | None = None,
+    after: tuple[datetime, int] | None = None,
+) -> tuple[list[Check], bool]:
+    """
+    Возвращает страницу проверок сайта от новых к старым (keyset-пагинация).
+
+    Курсор — пара (checked_at, id) крайней проверки соседней страницы;
+    запрос идёт по индексу (site_id, checked_at) от курсора.
+
+    Args:
+        session (AsyncSession): Сессия базы данных.
+        site_id (int): Идентификатор сайта.
+        limit (int): Размер страницы.
+        before (tuple[datetime, int] | None): Вернуть проверки старше курсора.
+        after (tuple[datetime, int] | None): Вернуть проверки новее курсора.
+
+    Returns:
+        tuple[list[Check], bool]: Проверки страницы и признак того, что в направлении
+        листания есть ещё проверки.
+    """
+    if before is None and after is None:
+        # Первая страница: окна секций учитывает last_checks
+        checks = list(await last_checks(session, site_id, limit + 1))
+        return checks[:limit], len(checks) > limit
+
+    query = select(Check).where(Check.site_id == site_id)
+    if after is not None:
+        checked_at, check_id = after
+        query = query.where(
+            or_(
+                Check.checked_at > checked_at,
+                and_(Check.checked_at == checked_at, Check.id > check_id),
+            )
+        ).order_by(Check.checked_at, Check.id)
+    else:
+        checked_at, check_id = before
+        query = query.where(
+            or_(
+                Check.checked_at < checked_at,
+                and_(Check.checked_at == checked_at, Check.id < check_id),
+            )
+        ).order_by(Check.checked_at.desc(), Check.id.desc())
+
+    result = await session.execute(query.limit(limit + 1))
+    checks = list(result.scalars().all())
+    more = len(checks) > limit
+    checks = checks[:limit]
+    if after is not None:
+        checks.reverse()
+    return checks, more
+
+
 async def stats_for_site(session: AsyncSession, site_id: int) -> dict[str, float | None]:
     """
     Считает статистику по сайту: аптайм и среднее время отклика.
@@ -150,3 +869,98 @@ async def stats_for_site(session: AsyncSession, site_id: int) -> dict[str, float
     avg = sum((c.response_time or 0) for c in checks) / total
 
     return {"uptime": up / total * 100, "average_response": avg}
+
+
+async def stats_for_sites(
+    session: AsyncSession,
+    site_ids: list[int] | None = None,
+    since: datetime | None = None,
+) -> dict[int, dict[str, float | None]]:
+    """
+    Считает аптайм и среднее время отклика сразу по многим сайтам
+    одним сгруппированным запросом по сырым проверкам.
+
+    Формулы совпадают со `stats_for_site`, но учитываются все проверки
+    начиная с `since`, а не последние 1000. Запрос переносим между
+    SQLite и PostgreSQL.
+
+    Args:
+        session (AsyncSession): Сессия базы данных.
+        site_ids (list[int] | None): Сайты для отчёта (по умолчанию все).
+        since (datetime | None): Начало окна включительно (по умолчанию все проверки);
+            для совпадения с `rollup_stats` передавайте границу часа (`report_since`).
+
+    Returns:
+        dict[int, dict[str, float | None]]: Статистика по ID сайта.
+    """
+    query = (
+        select(
+            Check.site_id,
+            func.count(),
+            func.sum(case((Check.is_available, 1), else_=0)),
+            func.sum(func.coalesce(Check.response_time, 0)),
+        )
+        .group_by(Check.site_id)
+    )
+    if site_ids is not None:
+        query = query.where(Check.site_id.in_(site_ids))
+    if since is not None:
+        query = query.where(Check.checked_at >= since)
+
+    result = await session.execute(query)
+    return {
+        site_id: _stats(total, up, response_sum)
+        for site_id, total, up, response_sum in result.all()
+    }
+
+
+async def rollup_stats(
+    session: AsyncSession,
+    since: datetime,
+    site_ids: list[int] | None = None,
+    period: str = "hour",
+) -> dict[int, dict[str, float | None]]:
+    """
+    Считает аптайм и среднее время отклика по предагрегированной статистике
+    одним сгруппированным запросом — по одной строке на сайт.
+
+    Формулы совпадают со `stats_for_site`: среднее время отклика делится
+    на общее число проверок, неудачные проверки считаются как 0. Окно
+    другое: все проверки начиная с `since`, а не последние 1000.
+
+    Args:
+        session (AsyncSession): Сессия базы данных.
+        since (datetime): Начало окна (округляется вниз до корзины).
+        site_ids (list[int] | None): Сайты для отчёта (по умолчанию все).
+        period (str): Размер корзин: "hour" или "day".
+
+    Returns:
+        dict[int, dict[str, float | None]]: Статистика по ID сайта.
+    """
+    query = (
+        select(
+            CheckRollup.site_id,
+            func.sum(CheckRollup.total),
+            func.sum(CheckRollup.up),
+            func.sum(CheckRollup.response_sum),
+        )
+        .where(
+            CheckRollup.period == period,
+            CheckRollup.bucket >= bucket_start(since, period),
+        )
+        .group_by(CheckRollup.site_id)
+    )
+    if site_ids is not None:
+        query = query.where(CheckRollup.site_id.in_(site_ids))
+
+    result = await session.execute(query)
+    return {
+        site_id: _stats(total, up, response_sum)
+        for site_id, total, up, response_sum in result.all()
+    }
+
+
+def _stats(total: int | None, up: int | None, response_sum: float | None) -> dict[str, float | None]:
+    if not total:
+        return {"uptime": None, "average_response": None}
+    return {"uptime": up / total * 100, "average_response": (response_sum or 0) / total}
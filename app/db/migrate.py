@@ -0,0 +1,46 @@
+"""
+Применение миграций Alembic при старте приложения.
+"""
+
+from pathlib import Path
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import inspect
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.logger import get_logger
+
+logger = get_logger()
+
+ALEMBIC_INI = Path(__file__).resolve().parents[2] / "alembic.ini"
+
+# Ревизия, соответствующая схеме, которую раньше создавал create_all
+BASELINE_REVISION = "0001"
+
+
+def _upgrade(connection: Connection) -> None:
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / "migrations"))
+    config.attributes["connection"] = connection
+
+    tables = inspect(connection).get_table_names()
+    if "sites" in tables and "alembic_version" not in tables:
+        # База создана до перехода на Alembic — помечаем исходную схему
+        logger.info(f"Stamping existing database with revision {BASELINE_REVISION}")
+        command.stamp(config, BASELINE_REVISION)
+
+    command.upgrade(config, "head")
+
+
+async def upgrade_db(engine: AsyncEngine) -> None:
+    """
+    Приводит схему базы данных к последней ревизии.
+
+    Args:
+        engine (AsyncEngine): Движок базы данных.
+    """
+    async with engine.begin() as conn:
+        await conn.run_sync(_upgrade)
+    logger.info("Database schema is up to date")
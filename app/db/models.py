@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, String, Boolean, DateTime, Float, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 
@@ -14,6 +14,14 @@ class Site(Base):
         url (str): URL сайта (уникальный, обязательный).
         interval (int): Интервал проверки сайта в секундах (по умолчанию 60).
         is_active (bool): Флаг активности сайта.
+        probe_mode (str): Способ проверки: "get", "head", "stream" или "conditional".
+        owner_chat_id (int): Чат, из которого сайт добавлен (None — неизвестен).
+        assert_type (str): Вид проверки содержимого (см. `app.services.assertions`,
+            None — без проверки).
+        assert_value (str): Строка, регулярное выражение или SHA-256 для проверки.
+        cert_not_after (datetime): Окончание срока сертификата TLS (UTC).
+        cert_alerted_days (int): Последний порог (дней до окончания срока),
+            о котором отправлено оповещение.
         checks (list[Check]): Связанные проверки сайта.
     """
     __tablename__ = "sites"
@@ -22,6 +30,12 @@ class Site(Base):
     url = Column(String, unique=True, nullable=False)
     interval = Column(Integer, default=60)
     is_active = Column(Boolean, default=True)
+    probe_mode = Column(String(16), nullable=False, default="get", server_default="get")
+    owner_chat_id = Column(BigInteger, nullable=True)
+    assert_type = Column(String(16), nullable=True)
+    assert_value = Column(String(512), nullable=True)
+    cert_not_after = Column(DateTime, nullable=True)
+    cert_alerted_days = Column(Integer, nullable=True)
 
     # Связь с таблицей checks, каскадное удаление
     checks = relationship("Check", back_populates="site", cascade="all, delete-orphan")
@@ -38,9 +52,20 @@ class Check(Base):
         response_time (float): Время ответа сервера в секундах.
         is_available (bool): Доступность сайта.
         checked_at (datetime): Дата и время проверки.
+        bytes_transferred (int): Байт получено за проверку (заголовки и тело).
+        timings (str): Фазы запроса в мс: "dns,connect,tls,ttfb,transfer"
+            (пусто — фаза не измерялась, например при переиспользованном соединении).
+        content_ok (bool): Результат проверки содержимого (None — не проверялось).
+        attempts (int): Число попыток проверки (больше 1 — были повторы после неудачи).
+        failure_class (str): Причина неудачи последней попытки: "dns", "connect", "tls",
+            "timeout", "http", "content" или "error" (None — сайт доступен).
         site (Site): Связанный объект сайта.
     """
     __tablename__ = "checks"
+    __table_args__ = (
+        # Последние проверки сайта: WHERE site_id = ? ORDER BY checked_at DESC
+        Index("ix_checks_site_id_checked_at", "site_id", "checked_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     site_id = Column(Integer, ForeignKey("sites.id"))
@@ -48,7 +73,119 @@ class Check(Base):
     response_time = Column(Float, nullable=True)
     is_available = Column(Boolean, default=False)
     checked_at = Column(DateTime, default=datetime.now)
+    bytes_transferred = Column(Integer, nullable=True)
+    timings = Column(String(64), nullable=True)
+    content_ok = Column(Boolean, nullable=True)
+    attempts = Column(Integer, nullable=True)
+    failure_class = Column(String(16), nullable=True)
 
     # Обратная связь с Site
     site = relationship("Site", back_populates="checks")
 
+
+class CheckRollup(Base):
+    """
+    Предагрегированная статистика проверок сайта за час или сутки.
+
+    Обновляется при записи проверок, поэтому отчёты читают
+    несколько строк на сайт вместо сырых проверок.
+
+    Атрибуты:
+        site_id (int): Внешний ключ на таблицу sites.
+        period (str): Размер корзины: "hour" или "day".
+        bucket (datetime): Начало часа или суток.
+        total (int): Число проверок.
+        up (int): Число успешных проверок.
+        response_sum (float): Сумма времени ответа (None считается как 0).
+        response_count (int): Число проверок с известным временем ответа.
+    """
+    __tablename__ = "check_rollups"
+    __table_args__ = (
+        Index("ix_check_rollups_period_bucket", "period", "bucket"),
+    )
+
+    site_id = Column(Integer, ForeignKey("sites.id"), primary_key=True)
+    period = Column(String(4), primary_key=True)
+    bucket = Column(DateTime, primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+    up = Column(Integer, nullable=False, default=0)
+    response_sum = Column(Float, nullable=False, default=0.0)
+    response_count = Column(Integer, nullable=False, default=0)
+
+
+class SiteAlertState(Base):
+    """
+    Состояние оповещений по сайту (см. `app.services.alerts`).
+
+    Атрибуты:
+        site_id (int): Внешний ключ на таблицу sites.
+        state (str): "unknown", "up", "down" или "flapping".
+        failures (int): Неудачных проверок подряд.
+        history (int): Битовая маска последних результатов (1 — сайт доступен).
+        samples (int): Сколько результатов учтено в маске.
+        failing_since (datetime): Время первой неудачной проверки текущей серии.
+        changed_at (datetime): Время последней смены состояния.
+    """
+    __tablename__ = "site_alert_states"
+
+    site_id = Column(Integer, ForeignKey("sites.id"), primary_key=True)
+    state = Column(String(10), nullable=False, default="unknown")
+    failures = Column(Integer, nullable=False, default=0)
+    history = Column(Integer, nullable=False, default=0)
+    samples = Column(Integer, nullable=False, default=0)
+    failing_since = Column(DateTime, nullable=True)
+    changed_at = Column(DateTime, nullable=True)
+
+
+class Subscription(Base):
+    """
+    Подписка чата на оповещения о сайте.
+
+    Атрибуты:
+        site_id (int): Внешний ключ на таблицу sites.
+        chat_id (int): ID чата Telegram.
+        failure_threshold (int): Неудачных проверок подряд до оповещения
+            (None — ALERT_FAILURE_THRESHOLD).
+        created_at (datetime): Дата и время подписки.
+    """
+    __tablename__ = "subscriptions"
+
+    site_id = Column(Integer, ForeignKey("sites.id"), primary_key=True)
+    chat_id = Column(BigInteger, primary_key=True)
+    failure_threshold = Column(Integer, nullable=True)
+    created_at = Column(DateTime, default=datetime.now)
+
+
+class PartitionLease(Base):
+    """
+    Аренда секции сайтов процессом мониторинга (режим воркеров).
+
+    Сайт относится к секции `site_id % WORKER_PARTITIONS`; проверяет его
+    только воркер, владеющий арендой секции.
+
+    Атрибуты:
+        partition (int): Номер секции.
+        owner (str): ID воркера-владельца (None — секция свободна).
+        expires_at (datetime): Время окончания аренды, если её не продлить.
+    """
+    __tablename__ = "partition_leases"
+
+    partition = Column(Integer, primary_key=True, autoincrement=False)
+    owner = Column(String(64), nullable=True)
+    expires_at = Column(DateTime, nullable=True)
+
+
+class MonitorWorker(Base):
+    """
+    Живой воркер мониторинга: по числу живых воркеров делятся секции.
+
+    Атрибуты:
+        id (str): ID воркера (хост, PID и случайный суффикс).
+        started_at (datetime): Время запуска.
+        heartbeat_at (datetime): Время последнего сигнала о жизни.
+    """
+    __tablename__ = "monitor_workers"
+
+    id = Column(String(64), primary_key=True)
+    started_at = Column(DateTime, nullable=False)
+    heartbeat_at = Column(DateTime, nullable=False, index=True)
@@ -0,0 +1,172 @@
+"""
+Секционирование таблицы проверок по времени (только PostgreSQL).
+
+В режиме CHECKS_PARTITIONING = "daily" или "weekly" таблица `checks`
+секционирована по диапазону `checked_at`. Секции создаются заранее
+на CHECKS_PARTITIONS_AHEAD периодов вперёд, а старые данные удаляются
+целыми секциями (DROP TABLE) вместо построчного DELETE.
+"""
+
+import re
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.logger import get_logger
+
+logger = get_logger()
+
+PARENT_TABLE = "checks"
+
+_BOUND_RE = re.compile(r"TO \('([^']+)'\)")
+
+
+def partitioning_enabled(session: AsyncSession) -> bool:
+    """
+    Проверяет, включено ли секционирование для диалекта сессии.
+    """
+    return bool(settings.CHECKS_PARTITIONING) and session.bind.dialect.name == "postgresql"
+
+
+def period_length(granularity: str) -> timedelta:
+    """
+    Возвращает длину секции.
+
+    Args:
+        granularity (str): "daily" или "weekly".
+    """
+    return timedelta(days=7 if granularity == "weekly" else 1)
+
+
+def period_start(moment: datetime, granularity: str) -> datetime:
+    """
+    Возвращает начало секции, в которую попадает момент времени
+    (недельные секции начинаются с понедельника).
+
+    Args:
+        moment (datetime): Момент времени.
+        granularity (str): "daily" или "weekly".
+    """
+    start = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if granularity == "weekly":
+        start -= timedelta(days=start.weekday())
+    return start
+
+
+def partition_name(start: datetime) -> str:
+    """
+    Возвращает имя секции по её началу, например `checks_p20261018`.
+    """
+    return f"{PARENT_TABLE}_p{start:%Y%m%d}"
+
+
+def upper_bound(partition_bound: str) -> datetime | None:
+    """
+    Разбирает верхнюю границу секции из `pg_get_expr(relpartbound)`.
+
+    Args:
+        partition_bound (str): Например "FOR VALUES FROM (MINVALUE) TO ('2026-10-18 00:00:00')".
+
+    Returns:
+        datetime | None: Верхняя граница или None, если её нет (MAXVALUE, DEFAULT).
+    """
+    match = _BOUND_RE.search(partition_bound)
+    return datetime.fromisoformat(match.group(1)) if match else None
+
+
+def lookup_windows(granularity: str, retention_days: int) -> list[timedelta]:
+    """
+    Возвращает расширяющиеся окна поиска последних проверок: запрос сначала
+    затрагивает одну-две последние секции и расширяется, только если строк мало.
+
+    Args:
+        granularity (str): "daily" или "weekly".
+        retention_days (int): Срок хранения сырых проверок (0 — без ограничения).
+    """
+    period = period_length(granularity)
+    windows = [period, period * 7, period * 31]
+    if retention_days:
+        limit = timedelta(days=retention_days)
+        windows = [w for w in windows if w < limit] + [limit]
+    return windows
+
+
+async def partition_bounds(session: AsyncSession) -> list[tuple[str, datetime | None]]:
+    """
+    Возвращает секции таблицы проверок и их верхние границы.
+
+    Args:
+        session (AsyncSession): Сессия базы данных.
+
+    Returns:
+        list[tuple[str, datetime | None]]: Пары (имя секции, верхняя граница).
+    """
+    result = await session.execute(text(
+        "SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) "
+        "FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+        f"WHERE i.inhparent = '{PARENT_TABLE}'::regclass"
+    ))
+    return [(name, upper_bound(bound or "")) for name, bound in result.all()]
+
+
+async def ensure_partitions(session: AsyncSession, now: datetime | None = None) -> list[str]:
+    """
+    Создаёт недостающие секции вплоть до CHECKS_PARTITIONS_AHEAD периодов вперёд.
+
+    Args:
+        session (AsyncSession): Сессия базы данных.
+        now (datetime | None): Текущее время.
+
+    Returns:
+        list[str]: Имена созданных секций.
+    """
+    granularity = settings.CHECKS_PARTITIONING
+    step = period_length(granularity)
+    start = period_start(now or datetime.now(), granularity)
+    horizon = start + step * (settings.CHECKS_PARTITIONS_AHEAD + 1)
+
+    # Продолжаем с конца последней существующей секции, чтобы диапазоны не пересекались
+    uppers = [end for _, end in await partition_bounds(session) if end is not None]
+    if uppers:
+        start = max(start, max(uppers))
+
+    created = []
+    while start < horizon:
+        end = start + step
+        await session.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(start)} "
+            f"PARTITION OF {PARENT_TABLE} "
+            f"FOR VALUES FROM ('{start.isoformat(' ')}') TO ('{end.isoformat(' ')}')"
+        ))
+        created.append(partition_name(start))
+        start = end
+    await session.commit()
+
+    if created:
+        logger.info(f"Created check partitions: {', '.join(created)}")
+    return created
+
+
+async def drop_partitions_before(session: AsyncSession, cutoff: datetime) -> list[str]:
+    """
+    Удаляет секции, все строки которых старше `cutoff`.
+
+    Args:
+        session (AsyncSession): Сессия базы данных.
+        cutoff (datetime): Граница хранения.
+
+    Returns:
+        list[str]: Имена удалённых секций.
+    """
+    dropped = []
+    for name, end in await partition_bounds(session):
+        if end is not None and end <= cutoff:
+            await session.execute(text(f'DROP TABLE IF EXISTS "{name}"'))
+            dropped.append(name)
+    await session.commit()
+
+    if dropped:
+        logger.info(f"Dropped check partitions: {', '.join(dropped)}")
+    return dropped
@@ -0,0 +1,101 @@
+"""
+Чтения бота через кэш запросов (см. `app.db.cache`).
+
+Каждая функция открывает сессию, только если результата нет в кэше
+и такой же запрос сейчас не выполняется.
+"""
+
+from datetime import datetime
+
+from app.core.config import settings
+from app.db import crud
+from app.db.cache import SITES, STATS, checks_tag, query_cache
+from app.db.database import AsyncSessionLocal
+from app.db.models import Check, Site
+
+
+async def cached_sites_page(
+    after_id: int | None = None,
+    before_id: int | None = None,
+) -> tuple[list[Site], bool]:
+    """
+    Возвращает страницу списка сайтов (см. `crud.list_sites_page`).
+
+    Args:
+        after_id (int | None): Курсор следующей страницы.
+        before_id (int | None): Курсор предыдущей страницы.
+
+    Returns:
+        tuple[list[Site], bool]: Сайты страницы (общий список, не изменять)
+        и признак продолжения.
+    """
+    limit = settings.LIST_PAGE_SIZE
+
+    async def load():
+        async with AsyncSessionLocal() as session:
+            return await crud.list_sites_page(session, limit, after_id, before_id)
+
+    return await query_cache.get_or_load(
+        ("sites_page", after_id, before_id, limit), load, tags=(SITES,)
+    )
+
+
+async def cached_checks_page(
+    site_id: int,
+    before: tuple[datetime, int] | None = None,
+    after: tuple[datetime, int] | None = None,
+) -> tuple[list[Check], bool]:
+    """
+    Возвращает страницу проверок сайта (см. `crud.checks_page`).
+
+    Args:
+        site_id (int): Идентификатор сайта.
+        before (tuple[datetime, int] | None): Курсор более старых проверок.
+        after (tuple[datetime, int] | None): Курсор более новых проверок.
+
+    Returns:
+        tuple[list[Check], bool]: Проверки страницы (общий список, не изменять)
+        и признак продолжения.
+    """
+    limit = settings.HISTORY_PAGE_SIZE
+
+    async def load():
+        async with AsyncSessionLocal() as session:
+            return await crud.checks_page(session, site_id, limit, before, after)
+
+    return await query_cache.get_or_load(
+        ("checks_page", site_id, before, after, limit), load, tags=(checks_tag(site_id),)
+    )
+
+
+async def cached_report(
+    site_ids: list[int] | None = None,
+) -> tuple[list[Site], dict[int, dict[str, float | None]]]:
+    """
+    Возвращает сайты и их статистику за последние REPORT_WINDOW_HOURS часов.
+
+    Окно начинается с начала часа (`crud.report_since`), поэтому
+    отчёт по корзинам и по сырым проверкам считается по одним проверкам.
+
+    Args:
+        site_ids (list[int] | None): Сайты для отчёта (по умолчанию все).
+
+    Returns:
+        tuple[list[Site], dict[int, dict]]: Сайты отчёта и статистика по ID сайта.
+    """
+    async def load():
+        since = crud.report_since(settings.REPORT_WINDOW_HOURS)
+        async with AsyncSessionLocal() as session:
+            sites = await crud.list_sites(session)
+            if settings.REPORT_FROM_ROLLUPS:
+                stats = await crud.rollup_stats(session, since, site_ids)
+            else:
+                stats = await crud.stats_for_sites(session, site_ids, since)
+        if site_ids is not None:
+            sites = [s for s in sites if s.id in site_ids]
+        return sites, stats
+
+    key = ("report", tuple(sorted(site_ids)) if site_ids is not None else None)
+    return await query_cache.get_or_load(
+        key, load, tags=(SITES, STATS), ttl=settings.QUERY_CACHE_STATS_TTL
+    )
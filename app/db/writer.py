@@ -0,0 +1,271 @@
+"""
+Буферизованная запись результатов проверок.
+
+Результаты копятся в памяти и записываются одной пакетной вставкой
+при достижении порога по размеру или по времени. Размер буфера
+ограничен: при переполнении новые строки отбрасываются и учитываются
+в счётчике `dropped`.
+
+Пачка, нарушившая ограничение БД (например, проверка сайта, удалённого
+во время проверки), делится пополам, пока не останутся отдельные строки:
+они отбрасываются и учитываются в счётчике `rejected`, остальные
+записываются. Пачка, не записанная по другой причине, возвращается
+в буфер не больше `max_retries` раз подряд, затем тоже отбрасывается.
+"""
+
+import asyncio
+import time
+from datetime import datetime
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.db import crud
+from app.db.database import AsyncSessionLocal
+from app.db.models import Check
+from app.core.metrics import DB_WRITE, DB_WRITE_ROWS, registry
+
+logger = get_logger()
+
+# Колонки строки проверки: у всех строк пачки должен быть одинаковый набор ключей
+_CHECK_COLUMNS = tuple(c.name for c in Check.__table__.columns if c.name != "id")
+
+
+class CheckWriter:
+    """
+    Фоновый писатель строк таблицы `checks`.
+
+    Args:
+        session_factory (async_sessionmaker): Фабрика сессий БД.
+        batch_size (int): Порог по размеру, при котором буфер сбрасывается.
+        flush_interval (float): Максимальное время ожидания строки в буфере (секунды).
+        max_buffer (int): Максимальное число строк в буфере.
+        max_retries (int): Сколько раз подряд повторять запись пачки после ошибки.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        batch_size: int,
+        flush_interval: float,
+        max_buffer: int,
+        max_retries: int = 3,
+    ):
+        self._session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max(max_buffer, batch_size)
+        self.max_retries = max(max_retries, 0)
+
+        self._buffer: list[dict] = []
+        self._wakeup = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+        # Неудачных попыток записать пачку в начале буфера подряд
+        self._failures = 0
+
+        self.buffered = 0
+        self.flushed = 0
+        self.dropped = 0
+        self.rejected = 0
+        self.flushes = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    @property
+    def pending(self) -> int:
+        """Число строк в буфере, ещё не записанных в БД."""
+        return len(self._buffer)
+
+    def add(
+        self,
+        site_id: int,
+        status_code: int | None,
+        response_time: float | None,
+        is_available: bool,
+        **fields,
+    ) -> bool:
+        """
+        Добавляет результат проверки в буфер. Не блокирует вызывающего.
+
+        Args:
+            site_id (int): Идентификатор сайта.
+            status_code (int | None): Код ответа HTTP.
+            response_time (float | None): Время ответа.
+            is_available (bool): Флаг доступности.
+            **fields: Значения остальных колонок таблицы checks.
+
+        Returns:
+            bool: False, если буфер переполнен и строка отброшена.
+        """
+        if len(self._buffer) >= self.max_buffer:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                logger.warning(f"Check buffer is full, {self.dropped} rows dropped so far")
+            return False
+
+        row = dict.fromkeys(_CHECK_COLUMNS)
+        row.update(fields)
+        row.update(
+            site_id=site_id,
+            status_code=status_code,
+            response_time=response_time,
+            is_available=is_available,
+            checked_at=datetime.now(),
+        )
+        self._buffer.append(row)
+        self.buffered += 1
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+        return True
+
+    async def flush(self) -> int:
+        """
+        Записывает всё содержимое буфера в БД пакетными вставками.
+
+        Returns:
+            int: Количество записанных строк.
+        """
+        written = 0
+        async with self._flush_lock:
+            while self._buffer:
+                batch = self._buffer[:self.batch_size]
+                del self._buffer[:self.batch_size]
+                failed: list[dict] = []
+                try:
+                    written += await self._write(batch)
+                except IntegrityError as err:
+                    logger.warning(f"Batch of {len(batch)} checks violates a constraint, splitting: {err.orig}")
+                    written += await self._write_split(batch, failed)
+                except Exception as err:
+                    logger.exception(f"Failed to flush {len(batch)} checks: {err}")
+                    failed = batch
+                if failed:
+                    self._retry(failed)
+                    break
+                self._failures = 0
+        return written
+
+    async def _write(self, batch: list[dict]) -> int:
+        started = time.perf_counter()
+        async with self._session_factory() as session:
+            await crud.create_checks(session, batch)
+        DB_WRITE.observe(time.perf_counter() - started)
+        DB_WRITE_ROWS.inc(amount=len(batch))
+        self.flushed += len(batch)
+        self.flushes += 1
+        return len(batch)
+
+    async def _write_split(self, batch: list[dict], failed: list[dict]) -> int:
+        # Делим пачку пополам, пока нарушающие ограничение строки не останутся по одной
+        if len(batch) == 1:
+            self.rejected += 1
+            logger.warning(f"Rejected check for site {batch[0]['site_id']}: constraint violation")
+            return 0
+        middle = len(batch) // 2
+        written = 0
+        for half in (batch[:middle], batch[middle:]):
+            try:
+                written += await self._write(half)
+            except IntegrityError:
+                written += await self._write_split(half, failed)
+            except Exception as err:
+                logger.exception(f"Failed to flush {len(half)} checks: {err}")
+                failed.extend(half)
+        return written
+
+    def _retry(self, batch: list[dict]) -> None:
+        # Возвращаем пачку в буфер до следующего сброса, но не больше max_retries раз подряд
+        self._failures += 1
+        if self._failures > self.max_retries:
+            logger.error(f"Rejecting {len(batch)} checks after {self._failures} failed writes")
+            self._failures = 0
+            self.rejected += len(batch)
+            return
+        self._requeue(batch)
+
+    def _requeue(self, batch: list[dict]) -> None:
+        # Возвращаем строки в начало буфера, пока хватает места
+        room = self.max_buffer - len(self._buffer)
+        kept = batch[:max(room, 0)]
+        self.dropped += len(batch) - len(kept)
+        self._buffer[:0] = kept
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self) -> None:
+        """
+        Запускает фоновый сброс буфера.
+        """
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run(), name="check-writer")
+            logger.info(
+                f"Check writer started (batch {self.batch_size}, "
+                f"every {self.flush_interval}s)"
+            )
+
+    async def stop(self) -> None:
+        """
+        Останавливает фоновый сброс и записывает остаток буфера.
+        """
+        if self._task is not None:
+            # Не отменяем задачу, чтобы не потерять пачку посреди записи
+            self._stopping = True
+            self._wakeup.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+        logger.info(f"Check writer stopped, stats: {self.stats()}")
+
+    def stats(self) -> dict[str, int]:
+        """
+        Возвращает счётчики писателя.
+
+        Returns:
+            dict[str, int]: Строк в буфере, всего принято, записано, отброшено
+                при переполнении, отклонено БД.
+        """
+        return {
+            "pending": self.pending,
+            "buffered": self.buffered,
+            "flushed": self.flushed,
+            "dropped": self.dropped,
+            "rejected": self.rejected,
+            "flushes": self.flushes,
+        }
+
+
+# Общий писатель результатов проверок
+check_writer = CheckWriter(
+    AsyncSessionLocal,
+    batch_size=settings.WRITE_BATCH_SIZE,
+    flush_interval=settings.WRITE_FLUSH_INTERVAL,
+    max_buffer=settings.WRITE_BUFFER_LIMIT,
+    max_retries=settings.WRITE_MAX_RETRIES,
+)
+
+registry.gauge_func(
+    "check_writer_buffer", "Check rows waiting in the write buffer",
+    lambda: check_writer.pending,
+)
+registry.counter_func(
+    "check_writer_dropped_total", "Check rows dropped because the buffer was full",
+    lambda: check_writer.dropped,
+)
+registry.counter_func(
+    "check_writer_rejected_total", "Check rows rejected by the database or after repeated write errors",
+    lambda: check_writer.rejected,
+)
@@ -11,10 +11,15 @@ from aiogram.fsm.storage.memory import MemoryStorage
 
 from app.core.config import settings
 from app.core.logger import get_logger
+from app.core.metrics import start_metrics_server, stop_metrics_server
 from app.bot.handlers import router
-from app.db.database import engine, Base
-from app.core.scheduler import start_scheduler, schedule_all
-from app.services.monitor import start_monitor  # импортируем монитор
+from app.db.database import engine
+from app.db.migrate import upgrade_db
+from app.core.scheduler import start_scheduler, stop_scheduler, schedule_all
+from app.services.monitor import alerts, start_monitor, stop_monitor
+from app.services.notifier import notifications
+from app.services.offload import loop_lag
+from app.services.retention import retention_loop
 
 logger = get_logger()
 
@@ -22,10 +27,9 @@ logger = get_logger()
 async def init_db():
     """
     Инициализация базы данных:
-    создаёт все таблицы при старте приложения.
+    применяет миграции Alembic при старте приложения.
     """
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    await upgrade_db(engine)
 
 
 async def start_bot():
@@ -37,14 +41,34 @@ async def start_bot():
     dp = Dispatcher(storage=MemoryStorage())
     dp.include_router(router)
 
+    try:
+        await dp.start_polling(bot)
+    finally:
+        await bot.session.close()
+
+
+async def run_monitor():
+    """
+    Запуск мониторинга: единственный конвейер проверок —
+    планировщик с задачей на каждый сайт, выполняющий проверки через движок.
+    """
+    # Состояния оповещений переживают перезапуск: не повторяем уже отправленное
+    await alerts.load()
+    notifications.start()
+    start_monitor()
+
     # Планируем все задачи в мониторинг и запускаем планировщик
     await schedule_all()
     start_scheduler()
+    retention = asyncio.create_task(retention_loop(), name="retention")
 
     try:
-        await dp.start_polling(bot)
+        await asyncio.Event().wait()
     finally:
-        await bot.session.close()
+        retention.cancel()
+        await stop_scheduler()
+        await stop_monitor()
+        await notifications.stop()
 
 
 async def main():
@@ -53,12 +77,24 @@ async def main():
     запускает БД, бота и монитор параллельно.
     """
     await init_db()
+    # Задержка цикла показывает, мешают ли проверки боту
+    loop_lag.start()
+    await start_metrics_server(settings.METRICS_HOST, settings.METRICS_PORT)
 
-    # Запускаем бота и монитор параллельно
-    await asyncio.gather(
-        start_bot(),
-        start_monitor(),  # сервис мониторинга
-    )
+    try:
+        if settings.WORKER_MODE:
+            # Проверки выполняют воркеры (`python -m app.worker`), здесь только бот
+            await start_bot()
+            return
+
+        # Запускаем бота и монитор параллельно
+        await asyncio.gather(
+            start_bot(),
+            run_monitor(),  # сервис мониторинга
+        )
+    finally:
+        await stop_metrics_server()
+        await loop_lag.stop()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,116 @@
+"""
+Адаптивные интервалы проверок.
+
+Сайт с постоянным интервалом тратит одинаковую долю бюджета проверок
+и когда он стабилен, и когда лежит сутками. `AdaptiveIntervals` по серии
+одинаковых результатов подряд выбирает временный интервал сайта:
+
+    - после смены состояния (первая неудача или первый успех после
+      неудач) — частые проверки `confirm_interval`, пока падение или
+      восстановление не подтвердится `confirm_checks` проверками;
+    - сайт лежит дольше — интервал удваивается с каждой неудачей
+      до `max_interval`;
+    - сайт стабилен `stable_after` проверок подряд — интервал
+      увеличивается в `stable_factor` раз (не больше `max_interval`).
+
+Планировщик (`app.core.scheduler`) применяет интервал поверх базового
+`Site.interval`; базовый интервал больше `max_interval` не увеличивается.
+"""
+
+# Ограничение показателя степени при удвоении интервала
+_MAX_BACKOFF_STEPS = 30
+
+
+class AdaptiveIntervals:
+    """
+    Выбор временного интервала сайта по результатам проверок подряд.
+
+    Состояние сайта — одно число: положительное — успехов подряд,
+    отрицательное — неудач подряд.
+
+    Args:
+        confirm_interval (float): Интервал подтверждения падения и восстановления (секунды).
+        confirm_checks (int): Сколько проверок подряд подтверждают смену состояния.
+        max_interval (float): Верхняя граница увеличенного интервала (секунды).
+        stable_after (int): Успехов подряд до увеличения интервала (0 — не увеличивать).
+        stable_factor (float): Во сколько раз увеличивается интервал стабильного сайта.
+    """
+
+    def __init__(
+        self,
+        confirm_interval: float,
+        confirm_checks: int,
+        max_interval: float,
+        stable_after: int = 0,
+        stable_factor: float = 2.0,
+    ):
+        self.confirm_interval = confirm_interval
+        self.confirm_checks = max(confirm_checks, 0)
+        self.max_interval = max_interval
+        self.stable_after = stable_after
+        self.stable_factor = max(stable_factor, 1.0)
+        self._streaks: dict[int, int] = {}
+        # Сайты, восстановление которых ещё не подтверждено
+        self._recovering: set[int] = set()
+
+    def __len__(self) -> int:
+        return len(self._streaks)
+
+    def observe(self, site_id: int, interval: float, is_available: bool) -> float | None:
+        """
+        Учитывает результат проверки и возвращает интервал до следующей.
+
+        Args:
+            site_id (int): Идентификатор сайта.
+            interval (float): Базовый интервал сайта (секунды).
+            is_available (bool): Результат проверки.
+
+        Returns:
+            float | None: Временный интервал или None, если нужен базовый.
+        """
+        prev = self._streaks.get(site_id, 0)
+        if is_available:
+            streak = prev + 1 if prev > 0 else 1
+            if prev < 0:
+                self._recovering.add(site_id)
+        else:
+            streak = prev - 1 if prev < 0 else -1
+            self._recovering.discard(site_id)
+        self._streaks[site_id] = streak
+
+        if streak > self.confirm_checks:
+            self._recovering.discard(site_id)
+        adapted = self.interval_for(interval, streak, site_id in self._recovering)
+        return None if adapted == interval else adapted
+
+    def interval_for(self, interval: float, streak: int, recovering: bool = False) -> float:
+        """
+        Возвращает интервал для серии результатов.
+
+        Args:
+            interval (float): Базовый интервал (секунды).
+            streak (int): Успехов (> 0) или неудач (< 0) подряд.
+            recovering (bool): Серия успехов началась после неудач.
+
+        Returns:
+            float: Интервал до следующей проверки (секунды).
+        """
+        ceiling = max(self.max_interval, interval)
+        if streak < 0:
+            failures = -streak
+            if failures <= self.confirm_checks:
+                return min(self.confirm_interval, interval)
+            steps = min(failures - self.confirm_checks, _MAX_BACKOFF_STEPS)
+            return min(interval * 2 ** steps, ceiling)
+        if recovering:
+            return min(self.confirm_interval, interval)
+        if self.stable_after and streak >= self.stable_after:
+            return min(interval * self.stable_factor, ceiling)
+        return interval
+
+    def forget(self, site_id: int) -> None:
+        """
+        Удаляет состояние сайта (сайт снят с расписания).
+        """
+        self._streaks.pop(site_id, None)
+        self._recovering.discard(site_id)
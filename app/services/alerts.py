@@ -0,0 +1,412 @@
+"""
+Оповещения о смене состояния сайтов.
+
+Для каждого сайта в памяти живёт небольшой автомат состояний:
+
+- UP → DOWN после N неудачных проверок подряд (одно оповещение; если у
+  подписчиков разные пороги, каждый получает его на своём пороге);
+- DOWN → UP на первой удачной проверке (одно оповещение с длительностью простоя);
+- любое → FLAPPING, если результаты слишком часто меняются в окне
+  последних проверок (одно оповещение, дальше тишина до стабилизации).
+
+Пока сайт лежит или «мигает», повторные сбои оповещений не порождают.
+Изменённые состояния периодически сохраняются в БД пачкой,
+чтобы перезапуск не сбрасывал счётчики и не повторял оповещения.
+"""
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.logger import get_logger
+from app.db import crud
+
+logger = get_logger()
+
+UNKNOWN = "unknown"
+UP = "up"
+DOWN = "down"
+FLAPPING = "flapping"
+
+# История результатов хранится битовой маской в колонке INTEGER
+MAX_FLAP_WINDOW = 31
+
+
+class AlertState:
+    """Состояние оповещений одного сайта."""
+
+    __slots__ = ("state", "failures", "history", "samples", "failing_since", "changed_at")
+
+    def __init__(
+        self,
+        state: str = UNKNOWN,
+        failures: int = 0,
+        history: int = 0,
+        samples: int = 0,
+        failing_since: datetime | None = None,
+        changed_at: datetime | None = None,
+    ):
+        self.state = state
+        self.failures = failures
+        self.history = history
+        self.samples = samples
+        self.failing_since = failing_since
+        self.changed_at = changed_at
+
+    def flip_ratio(self, window: int) -> float:
+        """
+        Возвращает долю смен результата между соседними проверками в окне.
+
+        Args:
+            window (int): Размер окна (число последних проверок).
+
+        Returns:
+            float: От 0 (результат не менялся) до 1 (менялся на каждой проверке).
+        """
+        n = min(self.samples, window)
+        if n < 2:
+            return 0.0
+        # Бит i маски — результат i-й с конца проверки; xor соседних битов — смена
+        flips = (self.history ^ (self.history >> 1)) & ((1 << (n - 1)) - 1)
+        return bin(flips).count("1") / (window - 1)
+
+
+@dataclass
+class AlertEvent:
+    """
+    Событие, о котором нужно оповестить.
+
+    Атрибуты:
+        kind (str): "down", "recovered", "flapping" или "stable".
+        site_id (int): Идентификатор сайта.
+        failures (int): Неудачных проверок подряд на момент события
+            (для "recovered" — за весь простой).
+        downtime (timedelta | None): Длительность простоя (для "recovered").
+        min_threshold (int): Для "down" — оповещаются подписчики с порогом
+            от min_threshold до failures.
+    """
+    kind: str
+    site_id: int
+    failures: int = 0
+    downtime: timedelta | None = None
+    min_threshold: int = 1
+
+    def concerns(self, threshold: int) -> bool:
+        """
+        Проверяет, касается ли событие подписчика с заданным порогом.
+
+        Args:
+            threshold (int): Порог неудачных проверок подписчика.
+
+        Returns:
+            bool: True, если подписчика нужно оповестить.
+        """
+        if self.kind == DOWN:
+            return self.min_threshold <= threshold <= self.failures
+        if self.kind == "recovered":
+            # О восстановлении узнают те, кто получил оповещение о падении
+            return threshold <= self.failures
+        return True
+
+
+def format_duration(delta: timedelta) -> str:
+    """
+    Форматирует длительность вида "1h 5m 3s".
+
+    Args:
+        delta (timedelta): Длительность.
+
+    Returns:
+        str: Длительность с точностью до секунды.
+    """
+    seconds = max(int(delta.total_seconds()), 0)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    parts = [f"{hours}h"] if hours else []
+    if minutes or hours:
+        parts.append(f"{minutes}m")
+    parts.append(f"{seconds}s")
+    return " ".join(parts)
+
+
+def format_alert(url: str, event: AlertEvent) -> str:
+    """
+    Возвращает текст оповещения.
+
+    Args:
+        url (str): Адрес сайта.
+        event (AlertEvent): Событие.
+
+    Returns:
+        str: Текст для отправки в Telegram.
+    """
+    if event.kind == DOWN:
+        return f"[ALERT] {url} is down ({event.failures} failed checks in a row)"
+    if event.kind == "recovered":
+        downtime = format_duration(event.downtime) if event.downtime else "unknown"
+        return f"[RECOVERED] {url} is up again, downtime {downtime}"
+    if event.kind == FLAPPING:
+        return f"[FLAPPING] {url} keeps going up and down, alerts are paused"
+    return f"[RECOVERED] {url} is stable again"
+
+
+class AlertTracker:
+    """
+    Автоматы состояний оповещений всех сайтов.
+
+    Args:
+        notify (Callable): Корутина `notify(site, event)`, рассылающая оповещение.
+        session_factory (async_sessionmaker): Фабрика сессий БД.
+        failure_threshold (int): Неудачных проверок подряд до оповещения о падении.
+        flap_window (int): Число последних проверок для поиска «мигания».
+        flap_high (float): Доля смен результата, с которой сайт считается «мигающим».
+        flap_low (float): Доля смен результата, ниже которой «мигание» закончилось.
+        flush_interval (float): Период сохранения изменённых состояний (секунды).
+        thresholds (Callable | None): Функция `thresholds(site_id)`, возвращающая
+            пороги подписчиков сайта по возрастанию (по умолчанию — только
+            `failure_threshold`).
+    """
+
+    def __init__(
+        self,
+        notify: Callable[[object, AlertEvent], Awaitable[None]],
+        session_factory: async_sessionmaker[AsyncSession],
+        failure_threshold: int,
+        flap_window: int,
+        flap_high: float,
+        flap_low: float,
+        flush_interval: float,
+        thresholds: Callable[[int], tuple[int, ...]] | None = None,
+    ):
+        self._notify = notify
+        self._session_factory = session_factory
+        self.failure_threshold = max(failure_threshold, 1)
+        self._thresholds = thresholds or (lambda site_id: (self.failure_threshold,))
+        self.flap_window = min(max(flap_window, 2), MAX_FLAP_WINDOW)
+        self.flap_high = flap_high
+        self.flap_low = flap_low
+        self.flush_interval = flush_interval
+
+        self._mask = (1 << self.flap_window) - 1
+        self._states: dict[int, AlertState] = {}
+        self._dirty: set[int] = set()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+
+        self.sent = 0
+        self.suppressed = 0
+
+    def __len__(self) -> int:
+        return len(self._states)
+
+    def state_of(self, site_id: int) -> AlertState | None:
+        """
+        Возвращает состояние оповещений сайта или None.
+        """
+        return self._states.get(site_id)
+
+    def observe(
+        self, site_id: int, is_available: bool, now: datetime
+    ) -> AlertEvent | None:
+        """
+        Учитывает результат проверки и возвращает событие, если о нём нужно оповестить.
+
+        Args:
+            site_id (int): Идентификатор сайта.
+            is_available (bool): Результат проверки.
+            now (datetime): Время проверки.
+
+        Returns:
+            AlertEvent | None: Событие или None, если оповещать не о чем.
+        """
+        st = self._states.get(site_id)
+        if st is None:
+            st = self._states[site_id] = AlertState()
+        self._dirty.add(site_id)
+
+        st.history = ((st.history << 1) | int(is_available)) & self._mask
+        st.samples = min(st.samples + 1, self.flap_window)
+        failing_since = st.failing_since
+        failures = st.failures
+        if is_available:
+            st.failures = 0
+            st.failing_since = None
+        else:
+            st.failures += 1
+            if st.failures == 1:
+                st.failing_since = now
+            # Пороги нужны только на неудачных проверках
+            levels = self._thresholds(site_id)
+
+        ratio = st.flip_ratio(self.flap_window)
+        new_state = None
+        event = None
+
+        if st.state == FLAPPING:
+            if ratio <= self.flap_low:
+                if is_available:
+                    new_state, event = UP, AlertEvent("stable", site_id)
+                elif st.failures >= levels[0]:
+                    new_state, event = DOWN, AlertEvent(DOWN, site_id, st.failures)
+        elif ratio >= self.flap_high:
+            new_state, event = FLAPPING, AlertEvent(FLAPPING, site_id, st.failures)
+        elif is_available:
+            if st.state == DOWN:
+                downtime = now - failing_since if failing_since else None
+                new_state = UP
+                event = AlertEvent("recovered", site_id, failures, downtime=downtime)
+            elif st.state == UNKNOWN:
+                # Первый результат нового сайта — просто запоминаем
+                new_state = UP
+        elif st.state != DOWN:
+            if st.failures >= levels[0]:
+                new_state, event = DOWN, AlertEvent(DOWN, site_id, st.failures)
+        elif st.failures in levels[1:]:
+            # Сайт всё ещё лежит и дошёл до порога следующих подписчиков
+            event = AlertEvent(DOWN, site_id, st.failures, min_threshold=st.failures)
+
+        if new_state is not None:
+            st.state = new_state
+            st.changed_at = now
+        if event is None and not is_available and st.state in (DOWN, FLAPPING):
+            self.suppressed += 1
+        return event
+
+    async def process(self, site, is_available: bool, now: datetime | None = None) -> None:
+        """
+        Учитывает результат проверки и при необходимости отправляет оповещение.
+
+        Args:
+            site: Объект сайта с атрибутами `id` и `url`.
+            is_available (bool): Результат проверки.
+            now (datetime | None): Время проверки (по умолчанию текущее).
+        """
+        event = self.observe(site.id, is_available, now or datetime.now())
+        if event is None:
+            return
+        logger.info(f"Alert for site {site.id}: {format_alert(site.url, event)}")
+        self.sent += 1
+        try:
+            await self._notify(site, event)
+        except Exception as err:
+            logger.exception(f"Failed to send alert for site {site.id}: {err}")
+
+    def forget(self, site_id: int) -> None:
+        """
+        Удаляет состояние сайта из памяти (например, после удаления сайта).
+
+        Args:
+            site_id (int): Идентификатор сайта.
+        """
+        self._states.pop(site_id, None)
+        self._dirty.discard(site_id)
+
+    async def load(self, owns: Callable[[int], bool] | None = None) -> int:
+        """
+        Загружает из БД сохранённые состояния сайтов, которых ещё нет в памяти
+        (при старте — все; в режиме воркеров — сайты полученных секций).
+
+        Args:
+            owns (Callable | None): Отбор сайтов по ID (None — все сайты).
+
+        Returns:
+            int: Количество загруженных состояний.
+        """
+        async with self._session_factory() as session:
+            rows = await crud.load_alert_states(session)
+        rows = [
+            row for row in rows
+            if row.site_id not in self._states and (owns is None or owns(row.site_id))
+        ]
+        for row in rows:
+            self._states[row.site_id] = AlertState(
+                state=row.state,
+                failures=row.failures,
+                history=row.history & self._mask,
+                samples=min(row.samples, self.flap_window),
+                failing_since=row.failing_since,
+                changed_at=row.changed_at,
+            )
+        logger.info(f"Loaded {len(rows)} alert states")
+        return len(rows)
+
+    async def flush(self) -> int:
+        """
+        Сохраняет изменённые состояния в БД.
+
+        Returns:
+            int: Количество сохранённых состояний.
+        """
+        if not self._dirty:
+            return 0
+        rows = []
+        for site_id in self._dirty:
+            st = self._states[site_id]
+            rows.append({
+                "site_id": site_id,
+                "state": st.state,
+                "failures": st.failures,
+                "history": st.history,
+                "samples": st.samples,
+                "failing_since": st.failing_since,
+                "changed_at": st.changed_at,
+            })
+        self._dirty.clear()
+        try:
+            async with self._session_factory() as session:
+                await crud.save_alert_states(session, rows)
+        except Exception as err:
+            # Не повторяем: следующая проверка сайта снова пометит его состояние
+            logger.exception(f"Failed to save {len(rows)} alert states: {err}")
+            return 0
+        return len(rows)
+
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    def start(self) -> None:
+        """
+        Запускает периодическое сохранение состояний.
+        """
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run(), name="alert-states")
+
+    async def stop(self) -> None:
+        """
+        Останавливает периодическое сохранение и сохраняет остаток.
+        """
+        if self._task is not None:
+            self._stopping = True
+            self._wakeup.set()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+        logger.info(f"Alert tracker stopped, stats: {self.stats()}")
+
+    def stats(self) -> dict[str, int]:
+        """
+        Возвращает показатели оповещений.
+
+        Returns:
+            dict[str, int]: Число сайтов, лежащих и «мигающих» сайтов,
+            отправленных и подавленных оповещений.
+        """
+        states = [st.state for st in self._states.values()]
+        return {
+            "sites": len(states),
+            "down": states.count(DOWN),
+            "flapping": states.count(FLAPPING),
+            "sent": self.sent,
+            "suppressed": self.suppressed,
+        }
@@ -0,0 +1,209 @@
+"""
+Проверки содержимого ответа (assertions).
+
+Тело ответа проверяется по мере скачивания, кусками: в памяти
+держится только текущий кусок и небольшой хвост предыдущего, чтобы
+не пропустить совпадение на стыке. Для регулярных выражений куски
+копятся до `_REGEX_BATCH` байт и проверяются одним поиском в пуле
+CPU-работы (небольшое тело — на месте, сразу), чтобы передача данных
+в процесс не стоила дороже самого поиска; поиск, не уложившийся
+в ASSERT_REGEX_TIMEOUT, считается проваленной проверкой. Как только результат известен
+(строка найдена, запрещённый текст встретился), скачивание
+прекращается; больше ASSERT_MAX_BYTES тела не читается.
+
+Виды проверок (`site.assert_type`):
+    - contains / not_contains: тело содержит / не содержит строку;
+    - regex / not_regex: тело содержит / не содержит совпадение
+      с регулярным выражением (совпадение длиннее `_REGEX_OVERLAP`
+      на стыке кусков может быть не найдено);
+    - sha256: SHA-256 всего тела равен заданному (hex).
+"""
+
+import hashlib
+import re
+
+from app.core.config import settings
+from app.services.offload import cpu_executor
+
+# Виды проверок содержимого
+ASSERTION_KINDS = ("contains", "not_contains", "regex", "not_regex", "sha256")
+
+# Максимальная длина значения проверки
+MAX_ASSERT_VALUE = 512
+
+# Сколько байт конца предыдущего куска добавляется к следующему для поиска по regex
+_REGEX_OVERLAP = 4096
+
+# Сколько байт тела копить перед поиском по regex в пуле CPU-работы
+_REGEX_BATCH = 256 * 1024
+
+
+def validate_assertion(kind: str, value: str) -> str | None:
+    """
+    Проверяет корректность проверки содержимого.
+
+    Args:
+        kind (str): Вид проверки.
+        value (str): Строка, регулярное выражение или hex SHA-256.
+
+    Returns:
+        str | None: Описание ошибки или None, если всё верно.
+    """
+    if kind not in ASSERTION_KINDS:
+        return f"неизвестный вид проверки, допустимы: {', '.join(ASSERTION_KINDS)}"
+    if not value:
+        return "пустое значение"
+    if len(value) > MAX_ASSERT_VALUE:
+        return f"значение длиннее {MAX_ASSERT_VALUE} символов"
+    if kind in ("regex", "not_regex"):
+        try:
+            re.compile(value.encode())
+        except re.error as err:
+            return f"неверное регулярное выражение: {err}"
+    if kind == "sha256" and not re.fullmatch(r"[0-9a-fA-F]{64}", value):
+        return "ожидается SHA-256 в hex (64 символа)"
+    return None
+
+
+def _regex_search(pattern: bytes, data: bytes) -> bool:
+    # Выполняется в пуле CPU-работы; скомпилированные шаблоны кэширует модуль re
+    return re.search(pattern, data) is not None
+
+
+class BodyMatcher:
+    """
+    Потоковая проверка тела ответа.
+
+    Args:
+        kind (str): Вид проверки (см. ASSERTION_KINDS).
+        value (str): Строка, регулярное выражение или hex SHA-256.
+        max_bytes (int): Сколько байт тела читать не больше.
+    """
+
+    __slots__ = ("kind", "value", "max_bytes", "seen", "decided", "ok", "reason",
+                 "_needle", "_tail", "_pending", "_hash")
+
+    def __init__(self, kind: str, value: str, max_bytes: int):
+        self.kind = kind
+        self.value = value
+        self.max_bytes = max_bytes
+        self.seen = 0
+        self.decided = False
+        self.ok = False
+        self.reason = ""
+        self._needle = value.encode()
+        self._tail = b""
+        self._pending = bytearray()
+        self._hash = hashlib.sha256() if kind == "sha256" else None
+
+    def _decide(self, ok: bool, reason: str = "") -> bool:
+        self.decided = True
+        self.ok = ok
+        self.reason = reason
+        return True
+
+    def _found(self) -> bool:
+        if self.kind.startswith("not_"):
+            return self._decide(False, f"найдено {self.value!r}")
+        return self._decide(True)
+
+    async def _search(self) -> bool:
+        # Ищем по хвосту прошлого поиска и накопленным кускам
+        window = self._tail + self._pending
+        self._pending.clear()
+        self._tail = window[-_REGEX_OVERLAP:]
+        timeout = settings.ASSERT_REGEX_TIMEOUT
+        try:
+            return await cpu_executor.run(
+                _regex_search, self._needle, window, size=len(window), timeout=timeout
+            )
+        except TimeoutError:
+            self._decide(False, f"регулярное выражение не уложилось в {timeout} с")
+            return False
+
+    async def feed(self, chunk: bytes) -> bool:
+        """
+        Обрабатывает очередной кусок тела.
+
+        Args:
+            chunk (bytes): Кусок (уже распакованного) тела.
+
+        Returns:
+            bool: True, если результат известен и дальше тело читать не нужно.
+        """
+        if self.decided:
+            return True
+        if self._hash is not None:
+            if self.seen + len(chunk) > self.max_bytes:
+                return self._decide(False, f"тело длиннее {self.max_bytes} байт, хэш не посчитан")
+            self.seen += len(chunk)
+            self._hash.update(chunk)
+            return False
+
+        chunk = chunk[:self.max_bytes - self.seen]
+        self.seen += len(chunk)
+        if self.kind in ("contains", "not_contains"):
+            window = self._tail + chunk
+            found = self._needle in window
+            overlap = len(self._needle) - 1
+            self._tail = window[-overlap:] if overlap else b""
+        else:
+            self._pending += chunk
+            batched = len(self._tail) + len(self._pending) >= cpu_executor.inline_below
+            if batched and len(self._pending) < _REGEX_BATCH and self.seen < self.max_bytes:
+                return False
+            found = await self._search()
+            if self.decided:
+                return True
+
+        if found:
+            return self._found()
+        if self.seen >= self.max_bytes:
+            await self.finish()
+            return True
+        return False
+
+    async def finish(self) -> bool:
+        """
+        Подводит итог после того, как тело закончилось или прочитан лимит.
+
+        Returns:
+            bool: Пройдена ли проверка (причина провала — в `reason`).
+        """
+        if self.decided:
+            return self.ok
+        if self._pending and await self._search():
+            self._found()
+        if self.decided:
+            return self.ok
+        if self._hash is not None:
+            digest = self._hash.hexdigest()
+            if digest == self.value.lower():
+                self._decide(True)
+            else:
+                self._decide(False, f"sha256 тела {digest[:12]}…")
+        elif self.kind.startswith("not_"):
+            self._decide(True)
+        else:
+            self._decide(False, f"{self.value!r} не найдено в первых {self.seen} байтах")
+        self._tail = b""
+        self._pending.clear()
+        return self.ok
+
+
+def make_matcher(site, max_bytes: int | None = None) -> BodyMatcher | None:
+    """
+    Создаёт проверку содержимого для сайта.
+
+    Args:
+        site: Объект сайта с атрибутами `assert_type` и `assert_value`.
+        max_bytes (int | None): Лимит тела (по умолчанию ASSERT_MAX_BYTES).
+
+    Returns:
+        BodyMatcher | None: Проверка или None, если у сайта её нет.
+    """
+    kind = getattr(site, "assert_type", None)
+    value = getattr(site, "assert_value", None)
+    if not kind or not value:
+        return None
+    return BodyMatcher(kind, value, max_bytes or settings.ASSERT_MAX_BYTES)
@@ -0,0 +1,245 @@
+"""
+Кэш DNS для проверок сайтов.
+
+Многие сайты живут на одних и тех же хостах (CDN, хостинги), поэтому
+адреса (A и AAAA) хранятся в общем LRU-кэше с учётом TTL записей, а одновременные
+запросы одного имени объединяются в один. Кэш подключается к HTTP-клиенту
+через сетевой бэкенд httpcore, так что время разрешения имени измеряется
+отдельно от установки TCP-соединения.
+"""
+
+import asyncio
+import ipaddress
+import socket
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+
+import httpcore
+
+try:
+    # aiodns отдаёт TTL записей (есть в requirements.txt); без него имена
+    # разрешает система, и все записи живут DNS_CACHE_TTL
+    import aiodns
+except ImportError:
+    aiodns = None
+
+# Сборщик фаз текущего запроса (см. `PhaseTimer`), которому сообщается время DNS
+dns_timer: ContextVar = ContextVar("dns_timer", default=None)
+
+
+class DnsError(httpcore.ConnectError):
+    """Имя хоста не разрешилось."""
+
+
+class DnsTimeout(httpcore.ConnectTimeout):
+    """Разрешение имени хоста не уложилось в таймаут подключения."""
+
+
+class DnsCache:
+    """
+    LRU-кэш адресов хостов с учётом TTL.
+
+    Args:
+        max_size (int): Максимум хостов в кэше (0 — не кэшировать,
+            каждое разрешение идёт в резолвер).
+        default_ttl (float): Время жизни записи, если резолвер не сообщил TTL,
+            и верхняя граница TTL (секунды).
+        clock (Callable): Источник монотонного времени.
+    """
+
+    def __init__(self, max_size: int, default_ttl: float, clock=time.monotonic):
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[float, list[str]]] = OrderedDict()
+        self._inflight: dict[str, asyncio.Task] = {}
+        self._resolver = None
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.lookup_time = 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def resolve(self, host: str) -> list[str]:
+        """
+        Возвращает адреса хоста из кэша или резолвера.
+
+        Args:
+            host (str): Имя хоста.
+
+        Returns:
+            list[str]: IP-адреса хоста.
+
+        Raises:
+            OSError: Если имя не удалось разрешить.
+        """
+        entry = self._entries.get(host)
+        if entry is not None:
+            expires, addresses = entry
+            if expires > self._clock():
+                self._entries.move_to_end(host)
+                self.hits += 1
+                return addresses
+            del self._entries[host]
+
+        task = self._inflight.get(host)
+        if task is None:
+            self.misses += 1
+            task = asyncio.create_task(self._resolve_and_store(host))
+            self._inflight[host] = task
+            task.add_done_callback(lambda t: self._forget(host, t))
+        else:
+            # Имя уже разрешается другой проверкой — ждём её результат
+            self.coalesced += 1
+        # Отмена одной проверки не должна прерывать разрешение для остальных
+        return await asyncio.shield(task)
+
+    def clear(self) -> None:
+        """
+        Очищает кэш.
+        """
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int | float]:
+        """
+        Возвращает показатели кэша.
+
+        Returns:
+            dict[str, int | float]: Размер кэша, попадания, промахи,
+            объединённые запросы и среднее время настоящего разрешения имени.
+        """
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "lookup_avg": self.lookup_time / self.misses if self.misses else 0.0,
+        }
+
+    async def _resolve_and_store(self, host: str) -> list[str]:
+        started = time.perf_counter()
+        try:
+            addresses, ttl = await self._lookup(host)
+        finally:
+            self.lookup_time += time.perf_counter() - started
+        self._store(host, addresses, ttl)
+        return addresses
+
+    def _forget(self, host: str, task: asyncio.Task) -> None:
+        self._inflight.pop(host, None)
+        if not task.cancelled():
+            # Помечаем исключение полученным, даже если ждать было некому
+            task.exception()
+
+    def _store(self, host: str, addresses: list[str], ttl: float) -> None:
+        if self.max_size <= 0 or ttl <= 0:
+            return
+        self._entries[host] = (self._clock() + ttl, addresses)
+        self._entries.move_to_end(host)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    async def _lookup(self, host: str) -> tuple[list[str], float]:
+        if aiodns is not None:
+            if self._resolver is None:
+                self._resolver = aiodns.DNSResolver()
+            # A и AAAA спрашиваем параллельно: хост может иметь только IPv6-адреса
+            answers = await asyncio.gather(
+                self._resolver.query(host, "A"),
+                self._resolver.query(host, "AAAA"),
+                return_exceptions=True,
+            )
+            records = []
+            for answer in answers:
+                if isinstance(answer, aiodns.error.DNSError):
+                    # Нет записей этого типа или имя из /etc/hosts
+                    continue
+                if isinstance(answer, BaseException):
+                    raise answer
+                records.extend(answer)
+            if records:
+                # IPv4 первыми: адреса перебираются по порядку
+                ttl = min(min(r.ttl for r in records), self.default_ttl)
+                return list(dict.fromkeys(r.host for r in records)), ttl
+
+        infos = await asyncio.get_running_loop().getaddrinfo(
+            host, None, type=socket.SOCK_STREAM
+        )
+        addresses = list(dict.fromkeys(info[4][0] for info in infos))
+        return addresses, self.default_ttl
+
+
+def _is_ip(host: str) -> bool:
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return True
+
+
+class CachingNetworkBackend(httpcore.AsyncNetworkBackend):
+    """
+    Сетевой бэкенд httpcore, разрешающий имена через `DnsCache`.
+
+    Подключается к адресам хоста по очереди, пока одно из подключений
+    не удастся. Имя хоста для TLS (SNI) и заголовка Host httpcore берёт
+    из URL, поэтому подключение по IP на них не влияет.
+
+    Args:
+        cache (DnsCache): Кэш адресов.
+        inner (httpcore.AsyncNetworkBackend | None): Бэкенд, открывающий соединения.
+    """
+
+    def __init__(
+        self, cache: DnsCache, inner: httpcore.AsyncNetworkBackend | None = None
+    ):
+        self.cache = cache
+        self._inner = inner or httpcore.AnyIOBackend()
+
+    async def connect_tcp(
+        self,
+        host: str,
+        port: int,
+        timeout: float | None = None,
+        local_address: str | None = None,
+        **kwargs,
+    ) -> httpcore.AsyncNetworkStream:
+        if _is_ip(host):
+            addresses = [host]
+        else:
+            started = time.perf_counter()
+            try:
+                addresses = await asyncio.wait_for(self.cache.resolve(host), timeout)
+            except asyncio.TimeoutError as err:
+                raise DnsTimeout(f"DNS lookup timed out for {host}") from err
+            except OSError as err:
+                raise DnsError(f"DNS lookup failed for {host}: {err}") from err
+            timer = dns_timer.get()
+            if timer is not None:
+                timer.add("dns", time.perf_counter() - started)
+
+        error = httpcore.ConnectError(f"No addresses for {host}")
+        for address in addresses:
+            try:
+                return await self._inner.connect_tcp(
+                    address,
+                    port,
+                    timeout=timeout,
+                    local_address=local_address,
+                    **kwargs,
+                )
+            except httpcore.ConnectError as err:
+                error = err
+        raise error
+
+    async def connect_unix_socket(
+        self, path: str, timeout: float | None = None, **kwargs
+    ) -> httpcore.AsyncNetworkStream:
+        return await self._inner.connect_unix_socket(path, timeout=timeout, **kwargs)
+
+    async def sleep(self, seconds: float) -> None:
+        await self._inner.sleep(seconds)
@@ -0,0 +1,311 @@
+"""
+Движок параллельных проверок сайтов.
+
+Раздаёт проверки пулу воркеров через ограниченную очередь:
+число воркеров задаёт общий лимит одновременных проверок,
+счётчики по хостам — лимит проверок одного хоста,
+а заполненная очередь притормаживает того, кто ставит задачи (backpressure).
+
+Воркер не ждёт освобождения занятого хоста: сайт откладывается в список
+ожидания хоста, а воркер берёт из очереди следующую задачу. Освободив
+место хоста, воркер сразу проверяет следующий отложенный сайт этого хоста.
+Отложенные сайты занимают места очереди, пока их проверка не начнётся:
+`queue_size` ограничивает очередь вместе со списками ожидания, и `submit`
+ждёт, даже если весь запас осел у одного занятого хоста.
+"""
+
+import asyncio
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass
+from typing import Any
+from urllib.parse import urlparse
+
+from app.core.logger import get_logger
+
+logger = get_logger()
+
+
+@dataclass
+class RoundStats:
+    """
+    Статистика одного раунда проверок.
+
+    Атрибуты:
+        sites (int): Количество проверенных сайтов.
+        failed (int): Количество проверок, завершившихся исключением.
+        duration (float): Длительность раунда в секундах.
+        max_queue_depth (int): Максимальная глубина очереди за раунд.
+    """
+    sites: int
+    failed: int
+    duration: float
+    max_queue_depth: int
+
+
+class _HostSlot:
+    """Число идущих проверок хоста и отложенные до освобождения места задачи."""
+
+    __slots__ = ("active", "waiting")
+
+    def __init__(self):
+        self.active = 0
+        self.waiting: deque = deque()
+
+
+class CheckEngine:
+    """
+    Пул воркеров, выполняющих проверки с ограничением параллелизма.
+
+    Args:
+        check (Callable): Корутина, проверяющая один сайт.
+        concurrency (int): Общее число одновременных проверок.
+        per_host (int): Максимум одновременных проверок одного хоста.
+        queue_size (int): Сколько проверок может ждать запуска (в очереди и в списках
+            ожидания хостов); при заполнении `submit` ждёт.
+        lag_observer (Callable | None): Вызывается с задержкой запуска проверки
+            относительно её срока (секунды) перед самой проверкой, если срок
+            передан в `submit`; учитывает и время ожидания в очереди.
+    """
+
+    def __init__(
+        self,
+        check: Callable[[Any], Awaitable[Any]],
+        concurrency: int,
+        per_host: int,
+        queue_size: int,
+        lag_observer: Callable[[float], None] | None = None,
+    ):
+        self._check = check
+        self.lag_observer = lag_observer
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.queue_size = queue_size
+        # Очередь не ограничена сама: места учитывает семафор, который
+        # освобождается только при запуске проверки, а не при выборке из очереди
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._slots = asyncio.Semaphore(queue_size)
+        self._waiting = 0
+        self._hosts: dict[str, _HostSlot] = {}
+        self._workers: list[asyncio.Task] = []
+        self._pending: set = set()
+        self._round_depth = 0
+
+        self.in_flight = 0
+        self.deferred = 0
+        self.max_queue_depth = 0
+        self.checks_done = 0
+        self.checks_failed = 0
+        self.last_round: RoundStats | None = None
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    def start(self) -> None:
+        """
+        Запускает воркеры (повторный вызов ничего не делает).
+        """
+        if self._workers:
+            return
+        self._workers = [
+            asyncio.create_task(self._worker(), name=f"check-worker-{i}")
+            for i in range(self.concurrency)
+        ]
+        logger.info(f"Check engine started with {self.concurrency} workers")
+
+    async def stop(self) -> None:
+        """
+        Останавливает воркеры. Незавершённые задачи из очереди отбрасываются.
+        """
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        # Будим тех, кто ждёт результата отброшенных задач
+        dropped = [slot.waiting for slot in self._hosts.values()]
+        self._hosts.clear()
+        while not self._queue.empty():
+            dropped.append([self._queue.get_nowait()])
+            self._queue.task_done()
+        self._waiting = 0
+        for items in dropped:
+            for _, future, _ in items:
+                self._slots.release()
+                if future is not None and not future.done():
+                    future.cancel()
+        self._pending.clear()
+
+    async def submit(self, site, due: float | None = None) -> bool:
+        """
+        Ставит проверку сайта в очередь, не дожидаясь результата.
+
+        Сайт, проверка которого ещё в очереди или выполняется,
+        повторно не ставится.
+
+        Args:
+            site: Объект сайта с атрибутами `id` и `url`.
+            due (float | None): Срок проверки по часам `time.monotonic`
+                (для `lag_observer`).
+
+        Returns:
+            bool: False, если проверка сайта уже ожидает выполнения.
+        """
+        if site.id in self._pending:
+            return False
+        self._pending.add(site.id)
+        try:
+            await self._put(site, None, due)
+        except BaseException:
+            self._pending.discard(site.id)
+            raise
+        return True
+
+    async def check(self, site) -> Any:
+        """
+        Ставит проверку в очередь и дожидается её результата.
+
+        Args:
+            site: Объект сайта с атрибутами `id` и `url`.
+
+        Returns:
+            Any: Результат функции проверки.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._put(site, future)
+        return await future
+
+    async def run_round(self, sites: Iterable) -> RoundStats:
+        """
+        Проверяет все переданные сайты и ждёт завершения раунда.
+
+        Args:
+            sites (Iterable): Сайты для проверки.
+
+        Returns:
+            RoundStats: Статистика раунда.
+        """
+        self.start()
+        started = time.monotonic()
+        self._round_depth = 0
+
+        loop = asyncio.get_running_loop()
+        futures = []
+        for site in sites:
+            future = loop.create_future()
+            await self._put(site, future)
+            futures.append(future)
+
+        results = await asyncio.gather(*futures, return_exceptions=True)
+        stats = RoundStats(
+            sites=len(futures),
+            failed=sum(1 for r in results if isinstance(r, BaseException)),
+            duration=time.monotonic() - started,
+            max_queue_depth=self._round_depth,
+        )
+        self.last_round = stats
+        return stats
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Возвращает текущие показатели движка.
+
+        Returns:
+            dict[str, Any]: Глубина очереди, число проверок и данные последнего раунда.
+        """
+        last = self.last_round
+        return {
+            "queue_depth": self.queue_depth,
+            "max_queue_depth": self.max_queue_depth,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "deferred": self.deferred,
+            "checks_done": self.checks_done,
+            "checks_failed": self.checks_failed,
+            "last_round_duration": last.duration if last else None,
+            "last_round_sites": last.sites if last else None,
+        }
+
+    async def _put(self, site, future: asyncio.Future | None, due: float | None = None) -> None:
+        self.start()
+        await self._slots.acquire()
+        self._queue.put_nowait((site, future, due))
+        depth = self.queue_depth
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+        self._round_depth = max(self._round_depth, depth)
+
+    @property
+    def waiting(self) -> int:
+        """Число сайтов, отложенных до освобождения места их хоста."""
+        return self._waiting
+
+    @property
+    def queue_depth(self) -> int:
+        """Число проверок, ждущих запуска: в очереди и в списках ожидания хостов."""
+        return self._queue.qsize() + self._waiting
+
+    async def _worker(self) -> None:
+        while True:
+            item = await self._queue.get()
+            self._queue.task_done()
+            host = _host_of(item[0])
+            slot = self._hosts.get(host)
+            if slot is None:
+                slot = self._hosts[host] = _HostSlot()
+            if slot.active >= self.per_host:
+                # Хост занят: откладываем сайт и не держим воркер
+                slot.waiting.append(item)
+                self._waiting += 1
+                self.deferred += 1
+                continue
+
+            slot.active += 1
+            try:
+                while item is not None:
+                    await self._run(*item)
+                    # Место хоста освободилось: отдаём его следующему отложенному сайту
+                    item = None
+                    if slot.waiting:
+                        item = slot.waiting.popleft()
+                        self._waiting -= 1
+            finally:
+                slot.active -= 1
+                # Удаляем состояние хоста, когда его никто не использует
+                if slot.active == 0 and not slot.waiting and self._hosts.get(host) is slot:
+                    del self._hosts[host]
+
+    async def _run(self, site, future: asyncio.Future | None, due: float | None) -> None:
+        # Проверка запускается: её место в очереди освобождается
+        self._slots.release()
+        if due is not None and self.lag_observer is not None:
+            self.lag_observer(time.monotonic() - due)
+        self.in_flight += 1
+        try:
+            result = await self._check(site)
+            self.checks_done += 1
+            if future is not None and not future.done():
+                future.set_result(result)
+        except asyncio.CancelledError:
+            if future is not None and not future.done():
+                future.cancel()
+            raise
+        except Exception as err:
+            self.checks_failed += 1
+            if future is not None and not future.done():
+                future.set_exception(err)
+            else:
+                logger.exception(f"Check failed for {getattr(site, 'url', site)}: {err}")
+        finally:
+            if future is None:
+                self._pending.discard(site.id)
+            self.in_flight -= 1
+
+
+def _host_of(site) -> str:
+    """
+    Возвращает хост сайта для лимита параллельных проверок.
+    """
+    url = getattr(site, "url", "")
+    return urlparse(url).hostname or url
@@ -0,0 +1,375 @@
+"""
+Общий HTTP-клиент для проверок сайтов.
+
+Один долгоживущий `httpx.AsyncClient` переиспользует соединения,
+TLS-контексты и keep-alive между проверками и раундами.
+Статистика переиспользования соединений собирается через
+trace-хуки httpcore.
+"""
+
+import socket
+import ssl
+import time
+from collections.abc import Awaitable, Callable
+
+import httpx
+
+from app.core.logger import get_logger
+from app.services.dns import CachingNetworkBackend, DnsCache, DnsError, DnsTimeout, dns_timer
+from app.services.tls import CertificateCache
+
+logger = get_logger()
+
+# Фазы запроса в порядке упаковки в строку
+PHASES = ("dns", "connect", "tls", "ttfb", "transfer")
+
+# Пары событий trace-хука httpcore (без префикса http11./http2./connection.),
+# между которыми измеряется фаза
+_PHASE_EVENTS = {
+    "connect_tcp": "connect",
+    "start_tls": "tls",
+    "receive_response_body": "transfer",
+}
+
+
+class PhaseTimer:
+    """
+    Сборщик длительностей фаз одного запроса через trace-хук httpcore.
+
+    На каждое событие тратится один вызов `perf_counter`, поэтому
+    замер почти не влияет на время самой проверки.
+
+    Args:
+        forward (Callable | None): Trace-хук, которому передаются все события
+            после замера (например, учёт соединений клиента).
+    """
+
+    __slots__ = ("phases", "_started", "_forward")
+
+    def __init__(self, forward: Callable[[str, dict], Awaitable[None]] | None = None):
+        self.phases: dict[str, float] = {}
+        self._started: dict[str, float] = {}
+        self._forward = forward
+
+    async def __call__(self, event: str, info: dict) -> None:
+        now = time.perf_counter()
+        name = event.split(".", 1)[1]
+        step, _, state = name.rpartition(".")
+
+        if state == "started":
+            self._started[step] = now
+        elif state == "complete":
+            if step == "receive_response_headers":
+                # TTFB — от начала отправки запроса до получения заголовков ответа
+                began = self._started.get("send_request_headers")
+                if began is not None:
+                    self.phases["ttfb"] = now - began
+            elif step == "connect_tcp" and step in self._started:
+                # Разрешение имени идёт внутри connect_tcp и меряется отдельно
+                elapsed = now - self._started[step] - self.phases.get("dns", 0.0)
+                self.phases["connect"] = max(elapsed, 0.0)
+            elif step in _PHASE_EVENTS and step in self._started:
+                self.phases[_PHASE_EVENTS[step]] = now - self._started[step]
+
+        if self._forward is not None:
+            await self._forward(event, info)
+
+    def forward_to(self, forward: Callable[[str, dict], Awaitable[None]] | None) -> None:
+        """
+        Задаёт trace-хук, которому передаются события после замера.
+
+        Args:
+            forward (Callable | None): Trace-хук httpcore (None — не передавать).
+        """
+        self._forward = forward
+
+    def add(self, phase: str, seconds: float) -> None:
+        """
+        Добавляет длительность фазы, измеренной вне httpcore (например, DNS).
+        """
+        self.phases[phase] = self.phases.get(phase, 0.0) + seconds
+
+    def pack(self) -> str | None:
+        """
+        Упаковывает фазы в компактную строку миллисекунд вида "dns,connect,tls,ttfb,transfer";
+        неизмеренные фазы остаются пустыми ("" при переиспользованном соединении).
+
+        Returns:
+            str | None: Упакованные фазы или None, если ничего не измерено.
+        """
+        if not self.phases:
+            return None
+        return ",".join(
+            f"{self.phases[p] * 1000:.1f}" if p in self.phases else "" for p in PHASES
+        )
+
+
+def unpack_timings(packed: str | None) -> dict[str, float]:
+    """
+    Распаковывает строку фаз, записанную `PhaseTimer.pack`.
+
+    Args:
+        packed (str | None): Упакованные фазы.
+
+    Returns:
+        dict[str, float]: Длительность измеренных фаз в миллисекундах.
+    """
+    if not packed:
+        return {}
+    return {
+        phase: float(value)
+        for phase, value in zip(PHASES, packed.split(","))
+        if value
+    }
+
+
+class SharedHttpClient:
+    """
+    Ленивая обёртка над общим `httpx.AsyncClient`.
+
+    Args:
+        timeout (float): Таймаут запроса в секундах.
+        max_connections (int): Максимум соединений в пуле.
+        max_keepalive (int): Максимум простаивающих keep-alive соединений.
+        keepalive_expiry (float): Время жизни простаивающего соединения (секунды).
+        http2 (bool): Включить HTTP/2 (нужен пакет h2).
+        resolver (DnsCache | None): Кэш DNS; без него имена разрешает httpcore
+            и время DNS входит в фазу connect.
+        certificates (CertificateCache | None): Кэш сертификатов, в который
+            записывается сертификат соединения каждого HTTPS-запроса.
+    """
+
+    def __init__(
+        self,
+        timeout: float,
+        max_connections: int,
+        max_keepalive: int,
+        keepalive_expiry: float,
+        http2: bool = False,
+        resolver: DnsCache | None = None,
+        certificates: CertificateCache | None = None,
+    ):
+        self.timeout = timeout
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.http2 = http2
+        self.resolver = resolver
+        self.certificates = certificates
+        self._client: httpx.AsyncClient | None = None
+
+        self.requests = 0
+        self.new_connections = 0
+        self.tls_handshakes = 0
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        Возвращает общий клиент, создавая его при первом обращении.
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = self._create_client()
+        return self._client
+
+    def _create_client(self) -> httpx.AsyncClient:
+        http2 = self.http2
+        if http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                logger.warning("HTTP/2 requested but 'h2' is not installed, using HTTP/1.1")
+                http2 = False
+
+        logger.info(
+            f"Creating shared HTTP client "
+            f"(max_connections={self.limits.max_connections}, http2={http2})"
+        )
+        transport = httpx.AsyncHTTPTransport(limits=self.limits, http2=http2)
+        if self.resolver is not None and not use_network_backend(
+            transport, CachingNetworkBackend(self.resolver)
+        ):
+            logger.warning(
+                "Cannot install the DNS cache into the httpx transport, "
+                "names are resolved by httpcore"
+            )
+        return httpx.AsyncClient(timeout=self.timeout, transport=transport)
+
+    async def fetch(
+        self,
+        method: str,
+        url: str,
+        headers: dict[str, str] | None = None,
+        read_body: bool = True,
+        timer: PhaseTimer | None = None,
+        consume: Callable[[bytes], Awaitable[bool]] | None = None,
+        timeout: httpx.Timeout | None = None,
+    ) -> tuple[httpx.Response, int]:
+        """
+        Выполняет запрос и считает полученные байты.
+
+        Если `read_body` выключен, ответ закрывается сразу после заголовков.
+        Для HTTP/1.1 такое соединение не возвращается в пул — это цена
+        за то, что тело не скачивается. То же происходит, если `consume`
+        прекратил чтение тела раньше его конца.
+
+        Args:
+            method (str): HTTP-метод.
+            url (str): Адрес запроса.
+            headers (dict[str, str] | None): Дополнительные заголовки.
+            read_body (bool): Читать ли тело ответа.
+            timer (PhaseTimer | None): Сборщик длительностей фаз запроса.
+            consume (Callable | None): Корутина, получающая тело по кускам
+                вместо буферизации всего тела; вернув True, прекращает чтение.
+            timeout (httpx.Timeout | None): Таймауты этого запроса
+                (по умолчанию — таймауты клиента).
+
+        Returns:
+            tuple[httpx.Response, int]: Закрытый ответ и число полученных байт
+            (строка статуса, заголовки и тело в том виде, как пришло по сети).
+        """
+        trace = self._trace
+        if timer is not None:
+            timer.forward_to(self._trace)
+            trace = timer
+        request = self.client.build_request(
+            method,
+            url,
+            headers=headers,
+            timeout=timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT,
+            extensions={"trace": trace},
+        )
+        self.requests += 1
+        token = dns_timer.set(timer)
+        try:
+            response = await self.client.send(request, stream=True)
+        finally:
+            dns_timer.reset(token)
+        if self.certificates is not None and request.url.scheme == "https":
+            # Соединение ещё открыто: сертификат берётся из него, без нового рукопожатия
+            self.certificates.observe(
+                request.url.host,
+                request.url.port or 443,
+                response.extensions.get("network_stream"),
+            )
+        try:
+            if read_body and consume is not None:
+                async for chunk in response.aiter_bytes():
+                    if await consume(chunk):
+                        break
+            elif read_body:
+                await response.aread()
+        finally:
+            await response.aclose()
+        return response, response_size(response)
+
+    async def _trace(self, event: str, info: dict) -> None:
+        # Новое соединение открывается только при промахе по пулу
+        if event == "connection.connect_tcp.complete":
+            self.new_connections += 1
+        elif event == "connection.start_tls.complete":
+            self.tls_handshakes += 1
+
+    def stats(self) -> dict[str, int | float]:
+        """
+        Возвращает статистику переиспользования соединений.
+
+        Returns:
+            dict[str, int | float]: Число запросов, новых соединений,
+            TLS-рукопожатий и доля запросов на уже открытых соединениях.
+        """
+        reused = max(self.requests - self.new_connections, 0)
+        return {
+            "requests": self.requests,
+            "new_connections": self.new_connections,
+            "tls_handshakes": self.tls_handshakes,
+            "reused_connections": reused,
+            "reuse_ratio": reused / self.requests if self.requests else 0.0,
+        }
+
+    async def aclose(self) -> None:
+        """
+        Закрывает клиент и все соединения пула.
+        """
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+            logger.info(f"Shared HTTP client closed, stats: {self.stats()}")
+            if self.resolver is not None:
+                logger.info(f"DNS cache stats: {self.resolver.stats()}")
+            if self.certificates is not None:
+                logger.info(f"Certificate cache stats: {self.certificates.stats()}")
+        self._client = None
+
+
+def use_network_backend(transport: httpx.AsyncHTTPTransport, backend) -> bool:
+    """
+    Подменяет сетевой бэкенд пула httpcore внутри транспорта httpx.
+
+    httpx не даёт передать сетевой бэкенд, поэтому он ставится в закрытый
+    атрибут пула `_pool._network_backend` (проверено на версиях из
+    requirements.txt: httpx 0.28.1, httpcore 1.0.9). Если в другой версии
+    атрибута нет, транспорт остаётся без изменений.
+
+    Args:
+        transport (httpx.AsyncHTTPTransport): Транспорт клиента.
+        backend: Сетевой бэкенд httpcore.
+
+    Returns:
+        bool: True, если бэкенд подменён.
+    """
+    pool = getattr(transport, "_pool", None)
+    if not hasattr(pool, "_network_backend"):
+        return False
+    pool._network_backend = backend
+    return True
+
+
+# Причины неудачной проверки (`Check.failure_class`)
+FAILURE_CLASSES = ("dns", "connect", "tls", "timeout", "http", "content", "error")
+
+
+def classify_error(err: BaseException) -> str:
+    """
+    Определяет причину ошибки запроса по цепочке исключений.
+
+    Args:
+        err (BaseException): Исключение запроса.
+
+    Returns:
+        str: "dns", "tls", "timeout", "connect" (в том числе обрыв соединения)
+        или "error".
+    """
+    chain = []
+    while err is not None and all(err is not seen for seen in chain):
+        chain.append(err)
+        err = err.__cause__ or err.__context__
+
+    # Сначала ищем причину глубже в цепочке: httpx оборачивает ошибки httpcore
+    for exc in chain:
+        if isinstance(exc, (DnsError, DnsTimeout, socket.gaierror)):
+            return "dns"
+        if isinstance(exc, ssl.SSLError):
+            return "tls"
+    top = chain[0]
+    if isinstance(top, (httpx.TimeoutException, TimeoutError)):
+        return "timeout"
+    if isinstance(top, (httpx.NetworkError, httpx.RemoteProtocolError, OSError)):
+        # Соединение не установилось или оборвалось до ответа
+        return "connect"
+    return "error"
+
+
+def response_size(response: httpx.Response) -> int:
+    """
+    Оценивает число байт ответа, полученных по сети.
+
+    Args:
+        response (httpx.Response): Закрытый ответ.
+
+    Returns:
+        int: Строка статуса и заголовки плюс скачанное (ещё не распакованное) тело.
+    """
+    head = len(response.http_version) + len(response.reason_phrase) + 7
+    head += sum(len(k) + len(v) + 4 for k, v in response.headers.raw) + 2
+    return head + response.num_bytes_downloaded
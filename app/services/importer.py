@@ -0,0 +1,414 @@
+"""
+Массовый импорт и экспорт сайтов.
+
+Файл читается потоком, кусками: записи разбираются по мере
+поступления байт, проверяются теми же `normalize_url` и `validate_url`,
+что и /add, и пишутся в базу пачками по IMPORT_BATCH_SIZE через
+`crud.upsert_sites` (ON CONFLICT (url)) — одна вставка и один коммит
+на пачку вместо коммита на каждый сайт.
+
+Форматы:
+    - csv: колонки url[,interval[,probe_mode]], заголовок необязателен;
+    - json: массив строк-адресов или объектов {"url", "interval", "probe_mode"};
+    - jsonl: по одной строке или объекту JSON на строку.
+
+Экспорт выдаёт те же поля в CSV или JSON, так что выгрузку можно
+загрузить обратно.
+"""
+
+import codecs
+import csv
+import io
+import json
+from collections.abc import AsyncIterable, AsyncIterator, Callable
+from dataclasses import dataclass, field
+
+from app.bot.utils import normalize_url, validate_url
+from app.core.config import settings
+from app.db import crud
+from app.db.models import Site
+from app.services.monitor import PROBE_MODES
+
+# Форматы файлов импорта
+IMPORT_FORMATS = ("csv", "json", "jsonl")
+
+# Форматы выгрузки
+EXPORT_FORMATS = ("csv", "json")
+
+# Поля сайта в файлах импорта и экспорта
+SITE_FIELDS = ("url", "interval", "probe_mode")
+
+# Сколько ошибок разбора показывать в отчёте
+MAX_REPORTED_ERRORS = 10
+
+# Максимальная длина одной записи (защита от файла без переводов строк)
+MAX_RECORD_CHARS = 65536
+
+# Сайтов в одном запросе выгрузки
+_EXPORT_PAGE = 1000
+
+
+class ImportFormatError(ValueError):
+    """
+    Файл импорта нельзя разобрать дальше (повреждённая структура JSON, слишком длинная запись).
+    """
+
+
+@dataclass
+class ImportReport:
+    """
+    Итоги импорта.
+
+    Атрибуты:
+        total (int): Прочитано записей.
+        imported (int): Записано сайтов (новых и обновлённых).
+        added (int): Новых сайтов.
+        duplicates (int): Повторов адреса в файле (учтена последняя запись).
+        invalid (int): Отброшено записей с ошибками.
+        errors (list[str]): Первые MAX_REPORTED_ERRORS ошибок с номерами записей.
+    """
+    total: int = 0
+    imported: int = 0
+    added: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    errors: list[str] = field(default_factory=list)
+
+    def error(self, number: int, message: str) -> None:
+        """
+        Учитывает отброшенную запись.
+
+        Args:
+            number (int): Номер записи (строки) в файле.
+            message (str): Причина.
+        """
+        self.invalid += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append(f"#{number}: {message}")
+
+
+def detect_format(filename: str | None) -> str | None:
+    """
+    Определяет формат файла импорта по расширению.
+
+    Args:
+        filename (str | None): Имя файла.
+
+    Returns:
+        str | None: "csv", "json", "jsonl" или None, если формат не поддерживается.
+    """
+    if not filename or "." not in filename:
+        return None
+    ext = filename.rsplit(".", 1)[1].lower()
+    if ext == "ndjson":
+        return "jsonl"
+    return ext if ext in IMPORT_FORMATS else None
+
+
+async def iter_text(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """
+    Декодирует поток байт в UTF-8 по кускам (символ может быть разрезан между кусками).
+
+    Args:
+        chunks (AsyncIterable[bytes]): Куски файла.
+
+    Yields:
+        str: Декодированные куски текста.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")(errors="replace")
+    async for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """
+    Разбивает поток байт на строки без символов перевода строки.
+
+    Args:
+        chunks (AsyncIterable[bytes]): Куски файла.
+
+    Yields:
+        str: Строки файла.
+
+    Raises:
+        ImportFormatError: Если строка длиннее MAX_RECORD_CHARS.
+    """
+    buffer = ""
+    async for text in iter_text(chunks):
+        buffer += text
+        lines = buffer.splitlines(keepends=True)
+        # Последняя строка может продолжиться в следующем куске
+        buffer = "" if lines[-1].endswith(("\n", "\r")) else lines.pop()
+        if len(buffer) > MAX_RECORD_CHARS:
+            raise ImportFormatError("line is too long")
+        for line in lines:
+            yield line.rstrip("\r\n")
+    if buffer:
+        yield buffer
+
+
+async def iter_csv_records(chunks: AsyncIterable[bytes]) -> AsyncIterator[tuple[int, dict | str]]:
+    """
+    Читает записи CSV. Заголовок (первая строка с колонкой "url") задаёт
+    порядок колонок; без него колонки идут как url, interval, probe_mode.
+
+    Args:
+        chunks (AsyncIterable[bytes]): Куски файла.
+
+    Yields:
+        tuple[int, dict | str]: Номер строки и поля записи.
+    """
+    columns = list(SITE_FIELDS)
+    number = 0
+    async for line in iter_lines(chunks):
+        number += 1
+        if not line.strip():
+            continue
+        cells = [cell.strip() for cell in next(csv.reader([line]))]
+        if number == 1 and cells and cells[0].lower() in SITE_FIELDS:
+            columns = [cell.lower() for cell in cells]
+            continue
+        yield number, {name: value for name, value in zip(columns, cells) if value != ""}
+
+
+async def iter_jsonl_records(chunks: AsyncIterable[bytes]) -> AsyncIterator[tuple[int, dict | str]]:
+    """
+    Читает записи JSON Lines: строку-адрес или объект на каждой строке.
+
+    Args:
+        chunks (AsyncIterable[bytes]): Куски файла.
+
+    Yields:
+        tuple[int, dict | str]: Номер строки и запись (None — строка не разобрана).
+    """
+    number = 0
+    async for line in iter_lines(chunks):
+        number += 1
+        if not line.strip():
+            continue
+        try:
+            yield number, json.loads(line)
+        except json.JSONDecodeError:
+            yield number, None
+
+
+async def iter_json_records(chunks: AsyncIterable[bytes]) -> AsyncIterator[tuple[int, dict | str]]:
+    """
+    Читает элементы JSON-массива по мере поступления байт, не загружая
+    весь файл: каждый элемент декодируется, как только он целиком получен.
+
+    Args:
+        chunks (AsyncIterable[bytes]): Куски файла.
+
+    Yields:
+        tuple[int, dict | str]: Номер элемента и элемент.
+
+    Raises:
+        ImportFormatError: Если файл — не массив JSON или структура повреждена.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    started = finished = False
+    number = 0
+    text_iter = iter_text(chunks).__aiter__()
+    eof = False
+
+    while not finished:
+        # Пропускаем пробелы и разделители между элементами
+        while pos < len(buffer) and (buffer[pos].isspace() or (started and buffer[pos] == ",")):
+            pos += 1
+        if pos < len(buffer):
+            if not started:
+                if buffer[pos] != "[":
+                    raise ImportFormatError("JSON file must contain an array")
+                started = True
+                pos += 1
+                continue
+            if buffer[pos] == "]":
+                finished = True
+                continue
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Элемент ещё не получен целиком — читаем дальше
+                if eof:
+                    raise ImportFormatError(f"broken JSON after element {number}")
+                if len(buffer) - pos > MAX_RECORD_CHARS:
+                    raise ImportFormatError(f"element {number + 1} is too long")
+            else:
+                # Элемент в конце буфера может быть числом, которое продолжится
+                if end < len(buffer) or eof:
+                    number += 1
+                    pos = end
+                    yield number, item
+                    continue
+        elif eof:
+            raise ImportFormatError("unexpected end of JSON array")
+
+        try:
+            text = await text_iter.__anext__()
+        except StopAsyncIteration:
+            eof = True
+            continue
+        buffer = buffer[pos:] + text
+        pos = 0
+
+
+_READERS = {
+    "csv": iter_csv_records,
+    "json": iter_json_records,
+    "jsonl": iter_jsonl_records,
+}
+
+
+def validate_record(record: dict | str | None) -> tuple[dict | None, str | None]:
+    """
+    Проверяет запись импорта и приводит её к строке для `crud.upsert_sites`.
+
+    Args:
+        record (dict | str | None): Адрес или объект с полями сайта.
+
+    Returns:
+        tuple[dict | None, str | None]: Строка сайта или None и причина ошибки.
+    """
+    if isinstance(record, str):
+        record = {"url": record}
+    if not isinstance(record, dict):
+        return None, "expected URL or object"
+
+    url = record.get("url")
+    if not isinstance(url, str) or not url.strip():
+        return None, "missing url"
+    url = normalize_url(url.strip())
+    if not validate_url(url):
+        return None, f"invalid URL {url[:80]!r}"
+    row = {"url": url}
+
+    interval = record.get("interval")
+    if interval is not None:
+        try:
+            interval = int(interval)
+        except (TypeError, ValueError):
+            return None, f"invalid interval {interval!r}"
+        if interval <= 0:
+            return None, f"invalid interval {interval!r}"
+        row["interval"] = interval
+
+    probe_mode = record.get("probe_mode")
+    if probe_mode is not None:
+        if probe_mode not in PROBE_MODES:
+            return None, f"invalid probe_mode {probe_mode!r}"
+        row["probe_mode"] = probe_mode
+    return row, None
+
+
+async def import_sites(
+    chunks: AsyncIterable[bytes],
+    fmt: str,
+    session_factory,
+    owner_chat_id: int | None = None,
+    batch_size: int | None = None,
+    on_batch: Callable[[list[Site], list[Site]], None] | None = None,
+) -> ImportReport:
+    """
+    Импортирует сайты из потока байт файла.
+
+    Args:
+        chunks (AsyncIterable[bytes]): Куски файла.
+        fmt (str): Формат: "csv", "json" или "jsonl".
+        session_factory: Фабрика асинхронных сессий.
+        owner_chat_id (int | None): Чат, из которого выполнен импорт.
+        batch_size (int | None): Сайтов в одной записи (по умолчанию IMPORT_BATCH_SIZE).
+        on_batch (Callable | None): Вызывается с сайтами каждой записанной пачки
+            и новыми из них (например, чтобы поставить их в расписание).
+
+    Returns:
+        ImportReport: Итоги импорта.
+
+    Raises:
+        ImportFormatError: Если файл нельзя разобрать дальше; пачки,
+            записанные до ошибки, остаются в базе.
+    """
+    batch_size = batch_size or settings.IMPORT_BATCH_SIZE
+    report = ImportReport()
+    seen: set[str] = set()
+    batch: dict[str, dict] = {}
+
+    async def flush() -> None:
+        async with session_factory() as session:
+            sites, added = await crud.upsert_sites(session, list(batch.values()), owner_chat_id)
+        report.imported += len(batch)
+        report.added += len(added)
+        batch.clear()
+        if on_batch is not None:
+            on_batch(sites, added)
+
+    async for number, record in _READERS[fmt](chunks):
+        report.total += 1
+        row, error = validate_record(record)
+        if row is None:
+            report.error(number, error)
+            continue
+        url = row["url"]
+        if url in seen:
+            report.duplicates += 1
+            if url not in batch:
+                # Повтор из уже записанной пачки: запишем его ещё раз
+                report.imported -= 1
+        seen.add(url)
+        batch[url] = row
+        if len(batch) >= batch_size:
+            await flush()
+    if batch:
+        await flush()
+
+    return report
+
+
+async def export_sites(session_factory, fmt: str) -> bytes:
+    """
+    Выгружает все сайты в CSV или JSON.
+
+    Сайты читаются страницами по ID, поэтому в памяти одновременно
+    держатся объекты только одной страницы.
+
+    Args:
+        session_factory: Фабрика асинхронных сессий.
+        fmt (str): "csv" или "json".
+
+    Returns:
+        bytes: Содержимое файла в UTF-8.
+    """
+    out = io.StringIO()
+    writer = csv.writer(out) if fmt == "csv" else None
+    if writer is not None:
+        writer.writerow(SITE_FIELDS)
+    else:
+        out.write("[")
+
+    first = True
+    after_id = None
+    more = True
+    while more:
+        async with session_factory() as session:
+            sites, more = await crud.list_sites_page(session, _EXPORT_PAGE, after_id=after_id)
+        if not sites:
+            break
+        after_id = sites[-1].id
+        for s in sites:
+            if writer is not None:
+                writer.writerow((s.url, s.interval, s.probe_mode))
+            else:
+                item = {"url": s.url, "interval": s.interval, "probe_mode": s.probe_mode}
+                out.write(("\n" if first else ",\n") + json.dumps(item, ensure_ascii=False))
+                first = False
+
+    if writer is None:
+        out.write("\n]\n")
+    return out.getvalue().encode()
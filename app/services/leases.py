@@ -0,0 +1,189 @@
+"""
+Аренда секций сайтов воркерами мониторинга.
+
+Сайты делятся на WORKER_PARTITIONS секций по `site_id % WORKER_PARTITIONS`.
+Каждый воркер периодически подаёт сигнал о жизни, продлевает свои аренды
+и выравнивает их число до своей доли (секций на живого воркера):
+лишние отпускает, недостающие забирает из свободных и просроченных.
+Если воркер умер, его аренды истекают через WORKER_LEASE_TTL и достаются
+остальным; новый воркер получает свою долю, когда другие отпустят лишнее.
+"""
+
+import asyncio
+import math
+import os
+import socket
+import uuid
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.logger import get_logger
+from app.db import crud
+
+logger = get_logger()
+
+
+def partition_of(site_id: int, partitions: int) -> int:
+    """
+    Возвращает номер секции сайта.
+
+    Args:
+        site_id (int): Идентификатор сайта.
+        partitions (int): Общее число секций.
+
+    Returns:
+        int: Номер секции.
+    """
+    return site_id % partitions
+
+
+def make_worker_id() -> str:
+    """
+    Возвращает уникальный ID воркера: хост, PID и случайный суффикс.
+    """
+    return f"{socket.gethostname()[:40]}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class LeaseManager:
+    """
+    Аренды секций одного воркера.
+
+    Args:
+        worker_id (str): ID воркера.
+        partitions (int): Общее число секций.
+        ttl (float): Время жизни аренды и сигнала о жизни (секунды);
+            аренды продлеваются каждые ttl/3.
+        session_factory (async_sessionmaker): Фабрика сессий БД.
+        on_change (Callable | None): Корутина `on_change(owned)`, вызываемая
+            при изменении набора секций воркера.
+        clock (Callable): Источник текущего времени.
+    """
+
+    def __init__(
+        self,
+        worker_id: str,
+        partitions: int,
+        ttl: float,
+        session_factory: async_sessionmaker[AsyncSession],
+        on_change: Callable[[frozenset[int]], Awaitable[None]] | None = None,
+        clock: Callable[[], datetime] = datetime.now,
+    ):
+        self.worker_id = worker_id
+        self.partitions = partitions
+        self.ttl = timedelta(seconds=ttl)
+        self._session_factory = session_factory
+        self._on_change = on_change
+        self._clock = clock
+        self.owned: frozenset[int] = frozenset()
+        self._task: asyncio.Task | None = None
+
+        self.acquired = 0
+        self.released = 0
+
+    def owns(self, site_id: int) -> bool:
+        """
+        Проверяет, проверяет ли этот воркер сайт.
+
+        Args:
+            site_id (int): Идентификатор сайта.
+
+        Returns:
+            bool: True, если секция сайта арендована этим воркером.
+        """
+        return partition_of(site_id, self.partitions) in self.owned
+
+    async def tick(self) -> frozenset[int]:
+        """
+        Подаёт сигнал о жизни, продлевает аренды и выравнивает их число до доли воркера.
+
+        Returns:
+            frozenset[int]: Секции воркера после выравнивания.
+        """
+        now = self._clock()
+        expires_at = now + self.ttl
+        async with self._session_factory() as session:
+            await crud.heartbeat_worker(session, self.worker_id, now)
+            workers = await crud.live_workers(session, now - self.ttl)
+            owned = await crud.renew_leases(session, self.worker_id, expires_at)
+
+            share = math.ceil(self.partitions / max(len(workers), 1))
+            if len(owned) > share:
+                # Отдаём лишнее воркерам, которым не хватает секций
+                extra = set(sorted(owned)[share:])
+                await crud.release_leases(session, self.worker_id, extra)
+                owned -= extra
+                self.released += len(extra)
+            elif len(owned) < share:
+                # Начинаем со «своего» диапазона, чтобы воркеры реже спорили за секции
+                index = workers.index(self.worker_id) if self.worker_id in workers else 0
+                start = index * share
+                free = sorted(
+                    await crud.free_partitions(session, now),
+                    key=lambda p: (p - start) % self.partitions,
+                )
+                for partition in free:
+                    if len(owned) >= share:
+                        break
+                    if await crud.acquire_lease(
+                        session, partition, self.worker_id, now, expires_at
+                    ):
+                        owned.add(partition)
+                        self.acquired += 1
+
+        owned = frozenset(owned)
+        if owned != self.owned:
+            logger.info(
+                f"Worker {self.worker_id} owns {len(owned)}/{self.partitions} partitions "
+                f"({len(workers)} live workers)"
+            )
+            self.owned = owned
+            if self._on_change is not None:
+                await self._on_change(owned)
+        return owned
+
+    async def _run(self) -> None:
+        period = self.ttl.total_seconds() / 3
+        while True:
+            await asyncio.sleep(period)
+            try:
+                await self.tick()
+            except Exception as err:
+                logger.exception(f"Lease renewal failed: {err}")
+
+    async def start(self) -> None:
+        """
+        Заводит строки секций, берёт первые аренды и запускает их продление в фоне.
+        """
+        async with self._session_factory() as session:
+            await crud.ensure_partition_rows(session, self.partitions)
+        await self.tick()
+        if self._task is None:
+            self._task = asyncio.create_task(self._run(), name="partition-leases")
+
+    async def stop(self) -> None:
+        """
+        Останавливает продление и освобождает все секции воркера.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        async with self._session_factory() as session:
+            await crud.delete_worker(session, self.worker_id)
+        self.owned = frozenset()
+        logger.info(f"Worker {self.worker_id} released its partitions")
+
+    def stats(self) -> dict[str, int]:
+        """
+        Возвращает показатели аренды.
+
+        Returns:
+            dict[str, int]: Число своих секций, взятых и отпущенных аренд.
+        """
+        return {
+            "owned": len(self.owned),
+            "acquired": self.acquired,
+            "released": self.released,
+        }
@@ -1,28 +1,342 @@
 """
 Сервис мониторинга сайтов.
 
-Запускается параллельно с ботом и периодически проверяет
-доступность всех сайтов из базы данных.
+Запускается параллельно с ботом и проверяет доступность сайтов,
+которые ставит в очередь планировщик.
 """
 
 import asyncio
+import time
+from collections.abc import Awaitable, Callable
+
 import httpx
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
 from app.db.database import AsyncSessionLocal
 from app.db import crud
+from app.db.writer import check_writer
 from app.core.logger import get_logger
+from app.core.metrics import (
+    CHECK_DURATION,
+    CHECK_PHASE,
+    CHECK_RETRIES,
+    CHECK_RETRY_OUTCOMES,
+    CHECKS,
+    registry,
+)
+from app.services.engine import CheckEngine
+from app.services.alerts import AlertEvent, AlertTracker, format_alert
+from app.services.assertions import make_matcher
+from app.services.dns import DnsCache
+from app.services.http_client import PhaseTimer, SharedHttpClient, classify_error
+from app.services.notifier import notify_user
+from app.services.offload import cpu_executor
+from app.services.retries import RetryPolicy, parse_budgets, parse_failure_classes
+from app.services.subscriptions import subscriptions
+from app.services.tls import (
+    CertAlerts,
+    CertificateCache,
+    CertInfo,
+    find_verification_error,
+    parse_thresholds,
+)
 
 logger = get_logger()
 
+# Общий кэш DNS: сайты на одних хостах не разрешают имя при каждой проверке
+dns_cache = DnsCache(
+    max_size=settings.DNS_CACHE_SIZE,
+    default_ttl=settings.DNS_CACHE_TTL,
+)
+
+# Сертификаты TLS по (хост, порт): разбираются только при смене сертификата
+certificates = CertificateCache(max_size=settings.CERT_CACHE_SIZE)
+
+# Общий HTTP-клиент сервиса мониторинга: соединения живут между проверками
+http = SharedHttpClient(
+    timeout=settings.CHECK_TIMEOUT,
+    max_connections=settings.HTTP_MAX_CONNECTIONS,
+    max_keepalive=settings.HTTP_MAX_KEEPALIVE,
+    keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY,
+    http2=settings.HTTP2_ENABLED,
+    resolver=dns_cache,
+    certificates=certificates,
+)
+
+# Повторы неудачной проверки с короткими таймаутами
+retry_policy = RetryPolicy(
+    budgets=parse_budgets(settings.CHECK_RETRY_BUDGETS),
+    connect_timeout=settings.CHECK_RETRY_CONNECT_TIMEOUT,
+    delay=settings.CHECK_RETRY_DELAY,
+    retry_on=parse_failure_classes(settings.CHECK_RETRY_ON),
+)
+
+# Способы проверки сайта
+PROBE_MODES = ("get", "head", "stream", "conditional")
+
+# Коды, которыми сервер отвечает на неподдерживаемый HEAD
+_HEAD_UNSUPPORTED = (405, 501)
+
+# Валидаторы для условных запросов: id сайта -> (ETag, Last-Modified)
+_validators: dict[int, tuple[str | None, str | None]] = {}
+
+# Слушатели результатов проверок: `listener(site, result)`
+_check_listeners: list[Callable[[object, dict], None]] = []
+
+
+def add_check_listener(listener: Callable[[object, dict], None]) -> None:
+    """
+    Подписывает функцию на результаты проверок (например, планировщик,
+    подстраивающий интервалы). Слушатель вызывается в цикле событий
+    после каждой проверки и должен быть быстрым.
+
+    Args:
+        listener (Callable): Функция `listener(site, result)`.
+    """
+    _check_listeners.append(listener)
+
+
+def forget_validators(site_id: int) -> None:
+    """
+    Удаляет сохранённые ETag и Last-Modified сайта (сайт снят с расписания).
+
+    Args:
+        site_id (int): Идентификатор сайта.
+    """
+    _validators.pop(site_id, None)
+
+
+def prune_validators(owns: Callable[[int], bool]) -> int:
+    """
+    Удаляет валидаторы сайтов, которые больше не проверяет этот процесс
+    (например, после передачи секций другому воркеру).
+
+    Args:
+        owns (Callable): Возвращает True для сайтов, оставшихся у процесса.
+
+    Returns:
+        int: Сколько записей удалено.
+    """
+    stale = [site_id for site_id in _validators if not owns(site_id)]
+    for site_id in stale:
+        del _validators[site_id]
+    return len(stale)
+
 
-async def check_site(session: AsyncSession, site) -> dict:
+async def probe_site(
+    site,
+    timer: PhaseTimer | None = None,
+    consume: Callable[[bytes], Awaitable[bool]] | None = None,
+    timeout: httpx.Timeout | None = None,
+) -> tuple[httpx.Response, int]:
+    """
+    Запрашивает сайт выбранным для него способом.
+
+    Способы (`site.probe_mode`):
+        - get: полный GET с загрузкой тела;
+        - head: HEAD, при 405/501 — GET без чтения тела;
+        - stream: GET, соединение закрывается сразу после заголовков;
+        - conditional: GET с If-None-Match / If-Modified-Since по сохранённым
+          валидаторам, неизменившаяся страница приходит пустым ответом 304.
+
+    Если задан `consume`, тело нужно для проверки содержимого, поэтому
+    при любом способе выполняется GET, а тело передаётся `consume` по кускам.
+
+    Args:
+        site: Объект сайта с атрибутами `id`, `url` и `probe_mode`.
+        timer (PhaseTimer | None): Сборщик длительностей фаз запроса.
+        consume (Callable | None): Потребитель тела по кускам (см. `SharedHttpClient.fetch`).
+        timeout (httpx.Timeout | None): Таймауты запросов (по умолчанию CHECK_TIMEOUT).
+
+    Returns:
+        tuple[httpx.Response, int]: Ответ и число полученных байт.
+    """
+    mode = getattr(site, "probe_mode", None) or "get"
+    url = site.url
+
+    if consume is not None:
+        return await http.fetch("GET", url, timer=timer, consume=consume, timeout=timeout)
+
+    if mode == "head":
+        response, received = await http.fetch(
+            "HEAD", url, read_body=False, timer=timer, timeout=timeout
+        )
+        if response.status_code not in _HEAD_UNSUPPORTED:
+            return response, received
+        response, more = await http.fetch(
+            "GET", url, read_body=False, timer=timer, timeout=timeout
+        )
+        return response, received + more
+
+    if mode == "stream":
+        return await http.fetch("GET", url, read_body=False, timer=timer, timeout=timeout)
+
+    if mode == "conditional":
+        headers = {}
+        etag, last_modified = _validators.get(site.id, (None, None))
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+
+        response, received = await http.fetch(
+            "GET", url, headers=headers, timer=timer, timeout=timeout
+        )
+        if response.status_code == 200:
+            _validators[site.id] = (
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified"),
+            )
+        return response, received
+
+    return await http.fetch("GET", url, timer=timer, timeout=timeout)
+
+
+def site_certificate(url: str, err: BaseException | None = None) -> CertInfo | None:
+    """
+    Возвращает сертификат HTTPS-сайта, увиденный последней проверкой.
+
+    Args:
+        url (str): Адрес сайта.
+        err (BaseException | None): Исключение проверки; ошибка проверки
+            сертификата из него запоминается для хоста.
+
+    Returns:
+        CertInfo | None: Сертификат, ошибка цепочки или None для HTTP и прочих ошибок.
+    """
+    parsed = httpx.URL(url)
+    if parsed.scheme != "https":
+        return None
+    port = parsed.port or 443
+    if err is not None:
+        error = find_verification_error(err)
+        return certificates.record_error(parsed.host, port, error) if error else None
+    return certificates.get(parsed.host, port)
+
+
+def record_metrics(site, outcome: str, started: float, timer: PhaseTimer) -> None:
+    """
+    Учитывает проверку в метриках: исход по сайту, длительность и фазы запроса.
+
+    Args:
+        site: Проверенный сайт.
+        outcome (str): "up", "down" или "error".
+        started (float): Время начала проверки (`time.perf_counter`).
+        timer (PhaseTimer): Фазы запроса.
+    """
+    CHECKS.inc(site.id if settings.METRICS_PER_SITE else "all", outcome)
+    CHECK_DURATION.observe(time.perf_counter() - started, outcome)
+    for phase, seconds in timer.phases.items():
+        CHECK_PHASE.observe(seconds, phase)
+
+
+async def save_check(
+    session: AsyncSession | None,
+    site,
+    status_code: int | None,
+    response_time: float | None,
+    is_available: bool,
+    **fields,
+) -> None:
+    """
+    Сохраняет результат проверки.
+
+    Если запущен буферизованный писатель, результат уходит в его буфер,
+    иначе записывается сразу через переданную сессию.
+
+    Args:
+        session (AsyncSession | None): Сессия БД (не нужна при запущенном писателе).
+        site: Проверенный сайт.
+        status_code (int | None): Код ответа HTTP.
+        response_time (float | None): Время ответа.
+        is_available (bool): Флаг доступности.
+        **fields: Значения остальных колонок таблицы checks.
+    """
+    if check_writer.running:
+        check_writer.add(site.id, status_code, response_time, is_available, **fields)
+    else:
+        await crud.create_check(
+            session, site, status_code, response_time, is_available, **fields
+        )
+
+
+async def attempt_site(
+    site,
+    timeout: httpx.Timeout | None = None,
+    budget: float | None = None,
+) -> dict:
+    """
+    Выполняет одну попытку проверки сайта, ничего не сохраняя.
+
+    Args:
+        site: Объект сайта с атрибутами `id` и `url`.
+        timeout (httpx.Timeout | None): Таймауты запросов (по умолчанию CHECK_TIMEOUT).
+        budget (float | None): Предельное время всей попытки (секунды).
+
+    Returns:
+        dict: Поля проверки (status, response_time, is_available, bytes_transferred,
+        timings, content_ok), причина неудачи `failure_class`, исключение `error`
+        и фазы запроса `timer`.
+    """
+    timer = PhaseTimer()
+    matcher = make_matcher(site)
+    try:
+        async with asyncio.timeout(budget):
+            response, received = await probe_site(
+                site, timer, matcher.feed if matcher is not None else None, timeout=timeout
+            )
+    except Exception as err:
+        failure_class = classify_error(err)
+        logger.info(f"Check attempt for {site.url} failed ({failure_class}): {err!r}")
+        return {
+            "status": None,
+            "response_time": None,
+            "is_available": False,
+            "bytes_transferred": None,
+            "timings": timer.pack(),
+            "content_ok": None,
+            "failure_class": failure_class,
+            "error": err,
+            "timer": timer,
+        }
+
+    status = response.status_code
+    is_available = 200 <= status < 400
+    failure_class = None if is_available else "http"
+
+    # Содержимое проверяется только у успешного ответа
+    content_ok = None
+    if matcher is not None and 200 <= status < 300:
+        content_ok = await matcher.finish()
+        if not content_ok:
+            is_available = False
+            failure_class = "content"
+            logger.info(f"Content assertion failed for {site.url}: {matcher.reason}")
+
+    return {
+        "status": status,
+        "response_time": response.elapsed.total_seconds(),
+        "is_available": is_available,
+        "bytes_transferred": received,
+        "timings": timer.pack(),
+        "content_ok": content_ok,
+        "failure_class": failure_class,
+        "error": None,
+        "timer": timer,
+    }
+
+
+async def check_site(session: AsyncSession | None, site) -> dict:
     """
     Проверяет доступность сайта и сохраняет результат в базу.
 
+    Неудачная попытка подтверждается повторами с короткими таймаутами
+    (см. `app.services.retries`); сохраняется результат последней попытки.
+
     Args:
-        session (AsyncSession): Сессия базы данных.
+        session (AsyncSession | None): Сессия базы данных
+            (может быть None, если запущен буферизованный писатель).
         site: Объект сайта с атрибутами `id` и `url`.
 
     Returns:
@@ -31,64 +345,192 @@ async def check_site(session: AsyncSession, site) -> dict:
             - status: код ответа (int или None)
             - response_time: время отклика в секундах (float или None)
             - is_available: доступность сайта (bool)
+            - bytes_transferred: получено байт (int или None)
+            - timings: фазы запроса, упакованные `PhaseTimer.pack` (str или None)
+            - content_ok: результат проверки содержимого (bool или None)
+            - attempts: число попыток (int)
+            - failure_class: причина неудачи (str или None)
+            - certificate: сертификат TLS или ошибка его проверки (CertInfo или None)
     """
-    timeout = settings.CHECK_TIMEOUT
     url = site.url
+    started = time.perf_counter()
 
-    async with httpx.AsyncClient(timeout=timeout) as client:
-        try:
-            # Делаем HTTP-запрос к сайту
-            response = await client.get(url)
-            status = response.status_code
-            elapsed = response.elapsed.total_seconds()
-            is_available = 200 <= status < 400
-
-            # Сохраняем результат в БД
-            await crud.create_check(session, site, status, elapsed, is_available)
-            logger.info(f"Checked {url}: {status} in {elapsed:.2f}s")
-
-            return {
-                "site": site,
-                "status": status,
-                "response_time": elapsed,
-                "is_available": is_available,
-            }
+    result = await attempt_site(site)
+    attempts = 1
+    while retry_policy.should_retry(attempts, result["failure_class"], result["status"]):
+        CHECK_RETRIES.inc(1, result["failure_class"])
+        await asyncio.sleep(retry_policy.delay)
+        result = await attempt_site(
+            site, retry_policy.timeout(attempts), retry_policy.budget(attempts)
+        )
+        attempts += 1
 
-        except Exception as err:
-            # Ошибка — считаем сайт недоступным
-            logger.exception(f"Error checking {url}: {err}")
-            await crud.create_check(session, site, None, None, False)
+    error = result.pop("error")
+    timer = result.pop("timer")
+    result["attempts"] = attempts
+    status = result["status"]
+    if error is not None:
+        outcome = "error"
+        logger.error(
+            f"Error checking {url} after {attempts} attempt(s): "
+            f"{result['failure_class']}: {error!r}"
+        )
+    else:
+        outcome = "up" if result["is_available"] else "down"
+        logger.info(
+            f"Checked {url}: {status} in {result['response_time']:.2f}s, "
+            f"{result['bytes_transferred']} bytes, {attempts} attempt(s)"
+        )
+    if attempts > 1:
+        CHECK_RETRY_OUTCOMES.inc(1, "recovered" if result["is_available"] else "confirmed")
+    record_metrics(site, outcome, started, timer)
 
-            return {
-                "site": site,
-                "status": None,
-                "response_time": None,
-                "is_available": False,
-            }
+    # Сохраняем результат в БД
+    await save_check(
+        session, site, status, result["response_time"], result["is_available"],
+        bytes_transferred=result["bytes_transferred"],
+        timings=result["timings"],
+        content_ok=result["content_ok"],
+        attempts=attempts,
+        failure_class=result["failure_class"],
+    )
 
+    result["site"] = site
+    result["certificate"] = site_certificate(url, error)
+    return result
 
-async def monitor_loop():
+
+async def check_site_in_session(site) -> dict:
     """
-    Основной цикл мониторинга:
-    периодически проверяет все сайты из базы.
+    Проверяет сайт в собственной сессии БД.
+
+    Параллельные проверки не могут делить одну AsyncSession,
+    поэтому движок вызывает эту обёртку. При запущенном писателе
+    сессия не нужна: результат уходит в общий буфер. Результат
+    передаётся автомату оповещений, оповещениям о сертификатах
+    и слушателям результатов.
+
+    Args:
+        site: Объект сайта с атрибутами `id` и `url`.
+
+    Returns:
+        dict: Результат `check_site`.
     """
-    while True:
+    if check_writer.running:
+        result = await check_site(None, site)
+    else:
         async with AsyncSessionLocal() as session:
-            sites = await crud.list_sites(session)
+            result = await check_site(session, site)
+    await alerts.process(site, result["is_available"])
+    await cert_alerts.process(site, result["certificate"])
+    for listener in _check_listeners:
+        try:
+            listener(site, result)
+        except Exception as err:
+            logger.exception(f"Check listener failed for {site.url}: {err}")
+    return result
+
+
+async def send_alert(site, event: AlertEvent) -> None:
+    """
+    Рассылает оповещение подписчикам сайта, которых оно касается.
+
+    Подписчики берутся из индекса в памяти, без запросов к БД.
+
+    Args:
+        site: Объект сайта.
+        event (AlertEvent): Событие.
+    """
+    text = format_alert(site.url, event)
+    for chat_id, threshold in subscriptions.subscribers(site.id).items():
+        if event.concerns(threshold):
+            await notify_user(chat_id, text)
+
 
-            if not sites:
-                logger.info("No sites to monitor")
-            else:
-                for site in sites:
-                    await check_site(session, site)
+# Состояния оповещений сайтов: одно сообщение на падение и одно на восстановление
+alerts = AlertTracker(
+    send_alert,
+    AsyncSessionLocal,
+    failure_threshold=settings.ALERT_FAILURE_THRESHOLD,
+    flap_window=settings.ALERT_FLAP_WINDOW,
+    flap_high=settings.ALERT_FLAP_HIGH,
+    flap_low=settings.ALERT_FLAP_LOW,
+    flush_interval=settings.ALERT_STATE_FLUSH_INTERVAL,
+    thresholds=subscriptions.thresholds,
+)
 
-        # Ждём перед следующим циклом
-        await asyncio.sleep(settings.DEFAULT_INTERVAL)
+
+async def send_cert_alert(site, text: str) -> None:
+    """
+    Рассылает оповещение о сертификате всем подписчикам сайта.
+
+    Args:
+        site: Объект сайта.
+        text (str): Текст оповещения.
+    """
+    for chat_id in subscriptions.subscribers(site.id):
+        await notify_user(chat_id, text)
+
+
+# Оповещения о сроке и ошибках сертификатов
+cert_alerts = CertAlerts(
+    send_cert_alert,
+    AsyncSessionLocal,
+    thresholds=parse_thresholds(settings.CERT_EXPIRY_DAYS),
+)
 
 
-async def start_monitor():
+# Общий движок проверок сервиса мониторинга
+engine = CheckEngine(
+    check_site_in_session,
+    concurrency=settings.MAX_CONCURRENT_CHECKS,
+    per_host=settings.MAX_CHECKS_PER_HOST,
+    queue_size=settings.CHECK_QUEUE_SIZE,
+)
+
+# Показатели сервисов проверки читаются в момент запроса /metrics
+registry.gauge_func(
+    "engine_queue_depth", "Checks waiting to start, queued or deferred by host", lambda: engine.queue_depth
+)
+registry.gauge_func("engine_in_flight", "Checks running right now", lambda: engine.in_flight)
+registry.gauge_func(
+    "engine_host_waiting", "Checks deferred until their host frees a slot", lambda: engine.waiting
+)
+registry.counter_func(
+    "http_requests_total", "Requests made by the shared HTTP client", lambda: http.requests
+)
+registry.counter_func(
+    "http_new_connections_total", "Connections opened by the shared HTTP client",
+    lambda: http.new_connections,
+)
+registry.counter_func("dns_cache_hits_total", "DNS cache hits", lambda: dns_cache.hits)
+registry.counter_func("dns_cache_misses_total", "DNS cache misses", lambda: dns_cache.misses)
+registry.gauge_func(
+    "cert_cache_size", "Hosts in the TLS certificate cache", lambda: len(certificates)
+)
+
+
+def start_monitor() -> None:
     """
-    Запускает сервис мониторинга (бесконечный цикл).
+    Запускает сервис мониторинга: писатель результатов, сохранение
+    состояний оповещений, пул CPU-работы и движок проверок.
+    Проверки в движок ставит планировщик.
     """
     logger.info("Starting monitor service")
-    await monitor_loop()
+    check_writer.start()
+    cpu_executor.start()
+    alerts.start()
+    engine.start()
+
+
+async def stop_monitor() -> None:
+    """
+    Останавливает движок, закрывает HTTP-клиент и пул CPU-работы,
+    дописывает буфер результатов и сохраняет состояния оповещений.
+    """
+    await engine.stop()
+    await http.aclose()
+    await cpu_executor.stop()
+    await check_writer.stop()
+    await alerts.stop()
+    logger.info(f"Monitor service stopped, engine stats: {engine.stats()}")
@@ -1,23 +1,368 @@
+"""
+Отправка уведомлений в Telegram.
+
+Уведомления не отправляются из пути проверки: `notify_user` только
+кладёт текст в очередь, а фоновая задача отправляет его с учётом
+лимитов Bot API — общего и на каждый чат (token bucket). Сообщения,
+накопившиеся для одного чата, пока он ждёт своей очереди, уходят одним
+сводным сообщением. Ответ 429 `retry_after` приостанавливает отправку
+в этот чат на указанное время.
+"""
+
+import asyncio
+import heapq
+import time
+from collections.abc import Awaitable, Callable
+
 from aiogram import Bot
+from aiogram.exceptions import TelegramRetryAfter
+
 from app.core.config import settings
 from app.core.logger import get_logger
+from app.core.metrics import registry
 
 logger = get_logger()
 bot = Bot(token=settings.BOT_TOKEN)
 
+# Максимальная длина сообщения Telegram
+MAX_MESSAGE_LENGTH = 4096
+# Пауза перед повтором после ошибки отправки (умножается на номер попытки)
+_RETRY_DELAY = 5.0
+
+
+class TokenBucket:
+    """
+    Ограничитель частоты «ведро токенов».
+
+    Args:
+        rate (float): Скорость пополнения (токенов в секунду).
+        capacity (float): Ёмкость ведра (допустимый всплеск).
+        clock (Callable): Источник монотонного времени.
+    """
+
+    def __init__(self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic):
+        self.rate = rate
+        self.capacity = max(capacity, 1.0)
+        self.tokens = self.capacity
+        self._clock = clock
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def delay(self) -> float:
+        """
+        Возвращает, сколько секунд ждать до появления токена (0 — можно сразу).
+        """
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def consume(self) -> None:
+        """
+        Забирает один токен.
+        """
+        self._refill()
+        self.tokens -= 1
+
+    def pause(self, seconds: float) -> None:
+        """
+        Опустошает ведро так, чтобы следующий токен появился не раньше чем через `seconds`.
+        """
+        self._refill()
+        self.tokens = min(self.tokens, 0.0) - seconds * self.rate
+
+
+class NotificationQueue:
+    """
+    Очередь исходящих уведомлений с ограничением частоты и сводками.
+
+    Args:
+        send (Callable): Корутина `send(chat_id, text)`, отправляющая сообщение.
+        global_rate (float): Сообщений в секунду на весь бот.
+        chat_rate (float): Сообщений в секунду в один чат.
+        chat_burst (int): Допустимый всплеск сообщений в один чат.
+        digest_delay (float): Сколько ждать перед отправкой первого сообщения
+            в чат, собирая одновременные уведомления в одну сводку (секунды).
+        max_pending (int): Максимум неотправленных уведомлений.
+        retries (int): Попыток отправки при ошибках, кроме 429.
+        clock (Callable): Источник монотонного времени.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[int, str], Awaitable[None]],
+        global_rate: float,
+        chat_rate: float,
+        chat_burst: int,
+        digest_delay: float,
+        max_pending: int,
+        retries: int = 3,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._send = send
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.digest_delay = digest_delay
+        self.max_pending = max_pending
+        self.retries = retries
+        self._clock = clock
+
+        self._global = TokenBucket(global_rate, global_rate, clock)
+        self._chats: dict[int, TokenBucket] = {}
+        self._pending: dict[int, list[str]] = {}
+        self._attempts: dict[int, int] = {}
+        self._size = 0
+        self._heap: list[tuple[float, int]] = []
+        self._scheduled: set[int] = set()
+        self._inflight: set[int] = set()
+        self._tasks: set[asyncio.Task] = set()
+        self._wakeup = asyncio.Event()
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+
+        self.enqueued = 0
+        self.sent = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.failed = 0
+        self.rate_limited = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    @property
+    def pending(self) -> int:
+        """Число уведомлений, ждущих отправки."""
+        return self._size
+
+    def enqueue(self, chat_id: int, text: str) -> bool:
+        """
+        Ставит уведомление в очередь. Не блокирует вызывающего.
+
+        Args:
+            chat_id (int): ID чата.
+            text (str): Текст уведомления.
+
+        Returns:
+            bool: False, если очередь переполнена и уведомление отброшено.
+        """
+        if self._size >= self.max_pending:
+            self.dropped += 1
+            if self.dropped % 100 == 1:
+                logger.warning(f"Notification queue is full, {self.dropped} dropped so far")
+            return False
+
+        self._pending.setdefault(chat_id, []).append(text)
+        self._size += 1
+        self.enqueued += 1
+        if chat_id not in self._scheduled and chat_id not in self._inflight:
+            self._schedule(chat_id, self.digest_delay)
+        return True
+
+    def _bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            bucket = self._chats[chat_id] = TokenBucket(
+                self.chat_rate, self.chat_burst, self._clock
+            )
+        return bucket
+
+    def _schedule(self, chat_id: int, delay: float) -> None:
+        due = self._clock() + max(delay, self._bucket(chat_id).delay())
+        if not self._heap or due < self._heap[0][0]:
+            self._wakeup.set()
+        heapq.heappush(self._heap, (due, chat_id))
+        self._scheduled.add(chat_id)
+
+    def _take(self, chat_id: int) -> list[str]:
+        # Берём столько уведомлений, сколько помещается в одно сообщение
+        queued = self._pending.get(chat_id)
+        if not queued:
+            return []
+        batch, length = [], 0
+        for text in queued:
+            length += len(text) + 1
+            if batch and length > MAX_MESSAGE_LENGTH - 64:
+                break
+            batch.append(text)
+        del queued[:len(batch)]
+        if not queued:
+            del self._pending[chat_id]
+        self._size -= len(batch)
+        return batch
+
+    def _requeue(self, chat_id: int, batch: list[str]) -> None:
+        self._pending.setdefault(chat_id, [])[:0] = batch
+        self._size += len(batch)
+
+    @staticmethod
+    def format_digest(batch: list[str]) -> str:
+        """
+        Собирает уведомления в одно сообщение.
+
+        Args:
+            batch (list[str]): Тексты уведомлений.
+
+        Returns:
+            str: Текст сообщения не длиннее лимита Telegram.
+        """
+        if len(batch) == 1:
+            text = batch[0]
+        else:
+            text = f"{len(batch)} notifications:\n" + "\n".join(batch)
+        return text[:MAX_MESSAGE_LENGTH]
+
+    async def _deliver(self, chat_id: int, batch: list[str]) -> None:
+        delay = 0.0
+        try:
+            await self._send(chat_id, self.format_digest(batch))
+        except TelegramRetryAfter as err:
+            # Flood control: возвращаем сообщения и молчим в этот чат retry_after секунд
+            self.rate_limited += 1
+            logger.warning(f"Telegram asked to retry after {err.retry_after}s for chat {chat_id}")
+            self._requeue(chat_id, batch)
+            self._bucket(chat_id).pause(err.retry_after)
+        except Exception as err:
+            attempt = self._attempts.get(chat_id, 0) + 1
+            if attempt < self.retries:
+                self._attempts[chat_id] = attempt
+                self._requeue(chat_id, batch)
+                delay = _RETRY_DELAY * attempt
+                logger.warning(f"Failed to notify {chat_id} (attempt {attempt}): {err}")
+            else:
+                self._attempts.pop(chat_id, None)
+                self.failed += len(batch)
+                logger.exception(f"Failed to notify {chat_id}, dropping {len(batch)} messages: {err}")
+        else:
+            self._attempts.pop(chat_id, None)
+            self.sent += 1
+            self.delivered += len(batch)
+            logger.info(f"Notified {chat_id}: {len(batch)} notifications")
+        finally:
+            self._inflight.discard(chat_id)
+            if chat_id in self._pending:
+                self._schedule(chat_id, delay)
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        while not (self._stopping and not self._pending and not self._inflight):
+            timeout = None
+            if self._heap:
+                # Ждём ближайший срок, но не раньше появления общего токена
+                timeout = max(self._heap[0][0] - self._clock(), self._global.delay(), 0)
+            if timeout != 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+            self._wakeup.clear()
+
+            now = self._clock()
+            while self._heap and self._heap[0][0] <= now and not self._global.delay():
+                _, chat_id = heapq.heappop(self._heap)
+                wait = self._bucket(chat_id).delay()
+                if wait > 0:
+                    heapq.heappush(self._heap, (now + wait, chat_id))
+                    continue
+                self._scheduled.discard(chat_id)
+                batch = self._take(chat_id)
+                if not batch:
+                    continue
+                self._global.consume()
+                self._bucket(chat_id).consume()
+                self._inflight.add(chat_id)
+                task = asyncio.create_task(self._deliver(chat_id, batch))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    def start(self) -> None:
+        """
+        Запускает фоновую отправку уведомлений.
+        """
+        if self._task is None:
+            self._stopping = False
+            self._task = asyncio.create_task(self._run(), name="notifier")
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """
+        Отправляет оставшиеся уведомления (не дольше `timeout`) и останавливает очередь.
+
+        Args:
+            timeout (float): Сколько ждать отправки остатка (секунды).
+        """
+        if self._task is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), timeout=timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            for task in list(self._tasks):
+                task.cancel()
+            await asyncio.gather(self._task, *self._tasks, return_exceptions=True)
+        self._task = None
+        logger.info(f"Notifier stopped, stats: {self.stats()}")
+
+    def stats(self) -> dict[str, int]:
+        """
+        Возвращает счётчики очереди.
+
+        Returns:
+            dict[str, int]: Ожидающие, принятые, отправленные сообщения,
+            доставленные и отброшенные уведомления, ответы 429.
+        """
+        return {
+            "pending": self.pending,
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "rate_limited": self.rate_limited,
+        }
+
+
+async def _send_message(chat_id: int, text: str) -> None:
+    await bot.send_message(chat_id, text)
+
+
+# Общая очередь уведомлений
+notifications = NotificationQueue(
+    _send_message,
+    global_rate=settings.NOTIFY_GLOBAL_RATE,
+    chat_rate=settings.NOTIFY_CHAT_RATE,
+    chat_burst=settings.NOTIFY_CHAT_BURST,
+    digest_delay=settings.NOTIFY_DIGEST_DELAY,
+    max_pending=settings.NOTIFY_QUEUE_LIMIT,
+)
+
+registry.gauge_func(
+    "notifier_queue_depth", "Notifications waiting to be sent", lambda: notifications.pending
+)
+registry.counter_func(
+    "notifier_delivered_total", "Notifications delivered", lambda: notifications.delivered
+)
+registry.counter_func(
+    "notifier_dropped_total", "Notifications dropped (queue full or send failed)",
+    lambda: notifications.dropped + notifications.failed,
+)
+registry.counter_func(
+    "notifier_rate_limited_total", "Telegram 429 responses", lambda: notifications.rate_limited
+)
+
 
 async def notify_user(chat_id: int, text: str) -> None:
     """
-    Отправляет уведомление пользователю в Telegram.
+    Ставит уведомление пользователю в очередь отправки. Не ждёт доставки.
 
     Args:
         chat_id (int): ID чата пользователя.
         text (str): Текст уведомления.
     """
-    try:
-        # Отправляем сообщение пользователю
-        await bot.send_message(chat_id, text)
-        logger.info(f'Notified {chat_id}: {text}')
-    except Exception as err:
-        # Логируем ошибку, если сообщение не удалось отправить
-        logger.exception(f'Failed notify {chat_id}: {err}')
+    notifications.enqueue(chat_id, text)
@@ -0,0 +1,301 @@
+"""
+Вынос CPU-работы проверок из цикла событий.
+
+Разбор сертификатов, хэширование и проверки содержимого ответа занимают
+процессор и, выполняясь прямо в корутине, задерживают весь цикл —
+и проверки, и `dp.start_polling` бота. `CpuExecutor` отдаёт такую работу
+пулу процессов (или потоков) с ограниченным числом ожидающих задач,
+а `LoopLagMonitor` меряет задержку цикла событий, чтобы эффект было видно.
+
+Функции для пула процессов должны быть объявлены на уровне модуля
+и не тянуть за собой тяжёлых импортов: аргументы и результат
+передаются между процессами через pickle.
+"""
+
+import asyncio
+import multiprocessing
+import os
+import time
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any
+
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.core.metrics import LOOP_LAG, registry
+
+logger = get_logger()
+
+# Режимы выполнения CPU-работы
+OFFLOAD_MODES = ("process", "thread", "inline")
+
+
+class CpuExecutor:
+    """
+    Пул для CPU-работы с ограниченной очередью.
+
+    Args:
+        mode (str): "process" — пул процессов, "thread" — пул потоков
+            (помогает, только если работа отпускает GIL), "inline" — в цикле событий.
+        workers (int): Размер пула (0 — по числу ядер).
+        max_pending (int): Максимум задач в пуле; следующие ждут своей
+            очереди в `run` (backpressure), не накапливаясь в памяти пула.
+        inline_below (int): Работа с оценкой объёма меньше этого числа байт
+            выполняется на месте — передача в другой процесс дороже её самой.
+    """
+
+    def __init__(self, mode: str, workers: int, max_pending: int, inline_below: int = 0):
+        if mode not in OFFLOAD_MODES:
+            raise ValueError(f"Unknown offload mode: {mode!r}")
+        self.mode = mode
+        self.workers = workers or os.cpu_count() or 1
+        self.max_pending = max(max_pending, 1)
+        self.inline_below = inline_below
+        self._pool: Executor | None = None
+        self._slots: asyncio.Semaphore | None = None
+
+        self.submitted = 0
+        self.inline = 0
+        self.waiting = 0
+        self.broken = 0
+        self.timeouts = 0
+        self._wait_sum = 0.0
+        self._run_sum = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._pool is not None
+
+    def _create_pool(self) -> Executor:
+        if self.mode == "thread":
+            return ThreadPoolExecutor(self.workers, thread_name_prefix="offload")
+        # spawn: дочерние процессы не наследуют открытые соединения и потоки родителя
+        return ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+
+    def start(self) -> None:
+        """
+        Создаёт пул (в режиме "inline" ничего не делает).
+        """
+        if self.mode == "inline" or self._pool is not None:
+            return
+        self._pool = self._create_pool()
+        self._slots = asyncio.Semaphore(self.max_pending)
+        logger.info(f"Started {self.mode} pool for CPU work ({self.workers} workers)")
+
+    async def run(
+        self,
+        func: Callable[..., Any],
+        *args: Any,
+        size: int | None = None,
+        timeout: float | None = None,
+    ) -> Any:
+        """
+        Выполняет `func(*args)` в пуле и возвращает результат.
+
+        Args:
+            func (Callable): Функция уровня модуля (для пула процессов).
+            *args: Аргументы функции.
+            size (int | None): Оценка объёма работы в байтах (например, длина тела);
+                меньше `inline_below` — выполнить на месте.
+            timeout (float | None): Предельное время работы в пуле (секунды). По его
+                истечении пул процессов перезапускается, чтобы зависшая задача
+                не занимала процесс; поток пула потоков остановить нельзя,
+                освобождается только вызывающий. На месте работа не прерывается.
+
+        Returns:
+            Any: Результат функции; её исключения пробрасываются вызывающему.
+
+        Raises:
+            TimeoutError: Если работа не уложилась в `timeout`.
+        """
+        if self._pool is None or (size is not None and size < self.inline_below):
+            self.inline += 1
+            return func(*args)
+
+        queued = time.perf_counter()
+        self.waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self.waiting -= 1
+        started = time.perf_counter()
+        self._wait_sum += started - queued
+        self.submitted += 1
+        try:
+            return await asyncio.wait_for(self._submit(func, *args), timeout)
+        except TimeoutError:
+            self.timeouts += 1
+            if self.mode == "process" and self._pool is not None:
+                logger.warning(f"CPU task {func.__name__} timed out after {timeout}s, restarting the pool")
+                self._restart_pool(terminate=True)
+            raise
+        finally:
+            self._run_sum += time.perf_counter() - started
+            self._slots.release()
+
+    async def _submit(self, func: Callable[..., Any], *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        pool = self._pool
+        try:
+            return await loop.run_in_executor(pool, func, *args)
+        except BrokenProcessPool:
+            # Процесс пула убит (OOM, сигнал, перезапуск по таймауту):
+            # пересоздаём пул, если этого ещё не сделали, и повторяем один раз
+            if self._pool is pool:
+                self.broken += 1
+                logger.error("CPU process pool is broken, restarting it")
+                self._restart_pool()
+            return await loop.run_in_executor(self._pool, func, *args)
+
+    def _restart_pool(self, terminate: bool = False) -> None:
+        old, self._pool = self._pool, self._create_pool()
+        if terminate and hasattr(old, "terminate_workers"):
+            old.terminate_workers()
+            return
+        # До Python 3.14 у пула нет способа остановить процесс посреди задачи:
+        # завершаем процессы напрямую, пока shutdown не забыл их список
+        processes = list((getattr(old, "_processes", None) or {}).values()) if terminate else []
+        old.shutdown(wait=False, cancel_futures=True)
+        for process in processes:
+            process.terminate()
+
+    async def stop(self) -> None:
+        """
+        Дожидается текущих задач и закрывает пул.
+        """
+        if self._pool is None:
+            return
+        pool, self._pool = self._pool, None
+        await asyncio.get_running_loop().run_in_executor(None, pool.shutdown)
+        logger.info(f"CPU pool stopped, stats: {self.stats()}")
+
+    def stats(self) -> dict[str, int | float]:
+        """
+        Возвращает показатели пула.
+
+        Returns:
+            dict[str, int | float]: Число задач в пуле и на месте, ожидающих
+            места в пуле, перезапусков пула, задач с истёкшим таймаутом,
+            среднее ожидание и выполнение (секунды).
+        """
+        return {
+            "submitted": self.submitted,
+            "inline": self.inline,
+            "waiting": self.waiting,
+            "broken": self.broken,
+            "timeouts": self.timeouts,
+            "wait_avg": self._wait_sum / self.submitted if self.submitted else 0.0,
+            "run_avg": self._run_sum / self.submitted if self.submitted else 0.0,
+        }
+
+
+class LoopLagMonitor:
+    """
+    Измеритель задержки цикла событий.
+
+    Фоновая задача засыпает на `interval` и меряет, насколько позже
+    она проснулась: это время цикл был занят чужим кодом.
+
+    Args:
+        interval (float): Период замера (секунды).
+        warn_after (float): Задержка, о которой пишется предупреждение (секунды).
+        window (int): Сколько последних замеров хранить для перцентилей.
+        clock (Callable): Источник монотонного времени.
+    """
+
+    def __init__(
+        self,
+        interval: float,
+        warn_after: float,
+        window: int = 1200,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self.interval = interval
+        self.warn_after = warn_after
+        self._clock = clock
+        self._samples: deque[float] = deque(maxlen=window)
+        self._task: asyncio.Task | None = None
+
+        self.last = 0.0
+        self.max = 0.0
+        self.slow = 0
+
+    def record(self, lag: float) -> None:
+        """
+        Учитывает один замер задержки.
+
+        Args:
+            lag (float): Задержка пробуждения (секунды).
+        """
+        lag = max(lag, 0.0)
+        self.last = lag
+        self.max = max(self.max, lag)
+        self._samples.append(lag)
+        LOOP_LAG.observe(lag)
+        if lag >= self.warn_after:
+            self.slow += 1
+            logger.warning(f"Event loop was blocked for {lag * 1000:.0f} ms")
+
+    async def _run(self) -> None:
+        while True:
+            started = self._clock()
+            await asyncio.sleep(self.interval)
+            self.record(self._clock() - started - self.interval)
+
+    def start(self) -> None:
+        """
+        Запускает замеры в фоне.
+        """
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.create_task(self._run(), name="loop-lag")
+
+    async def stop(self) -> None:
+        """
+        Останавливает замеры.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+            logger.info(f"Event loop lag: {self.stats()}")
+
+    def stats(self) -> dict[str, int | float]:
+        """
+        Возвращает задержку цикла событий.
+
+        Returns:
+            dict[str, int | float]: Последняя, средняя, 99-й перцентиль
+            и максимальная задержка (секунды), число задержек выше порога.
+        """
+        samples = sorted(self._samples)
+        return {
+            "last": self.last,
+            "avg": sum(samples) / len(samples) if samples else 0.0,
+            "p99": samples[min(int(len(samples) * 0.99), len(samples) - 1)] if samples else 0.0,
+            "max": self.max,
+            "slow": self.slow,
+        }
+
+
+# Общий пул CPU-работы проверок
+cpu_executor = CpuExecutor(
+    mode=settings.OFFLOAD_MODE,
+    workers=settings.OFFLOAD_WORKERS,
+    max_pending=settings.OFFLOAD_QUEUE_LIMIT,
+    inline_below=settings.OFFLOAD_INLINE_BYTES,
+)
+
+# Задержка цикла событий процесса
+loop_lag = LoopLagMonitor(
+    interval=settings.LOOP_LAG_INTERVAL,
+    warn_after=settings.LOOP_LAG_WARN,
+)
+
+registry.gauge_func(
+    "offload_waiting", "CPU tasks waiting for a slot in the pool", lambda: cpu_executor.waiting
+)
+registry.counter_func(
+    "offload_tasks_total", "CPU tasks run in the pool", lambda: cpu_executor.submitted
+)
@@ -0,0 +1,98 @@
+"""
+Очистка истории проверок.
+
+Сырые проверки при записи уже раскладываются по часовым и суточным
+корзинам (`check_rollups`), поэтому старые сырые строки можно удалять,
+не теряя статистику. Удаление идёт пачками с отдельным коммитом на
+каждую, чтобы не держать долгих блокировок. Часовые корзины живут
+дольше сырых проверок, суточные — дольше часовых.
+
+Если таблица проверок секционирована (PostgreSQL), старые проверки
+удаляются целыми секциями, а новые секции создаются заранее.
+"""
+
+import asyncio
+from collections.abc import Callable
+from datetime import datetime, timedelta
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.db import crud
+from app.db import partitions
+from app.db.database import AsyncSessionLocal
+
+logger = get_logger()
+
+
+async def purge_old_data(
+    session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+    now: datetime | None = None,
+) -> dict[str, int]:
+    """
+    Удаляет сырые проверки и корзины статистики старше настроенных сроков,
+    а для секционированной таблицы ещё и создаёт секции наперёд.
+
+    Args:
+        session_factory (async_sessionmaker): Фабрика сессий БД.
+        now (datetime | None): Текущее время (для тестов).
+
+    Returns:
+        dict[str, int]: Количество удалённых строк по видам данных.
+    """
+    now = now or datetime.now()
+    removed = {"checks": 0, "hour": 0, "day": 0}
+
+    async with session_factory() as session:
+        partitioned = partitions.partitioning_enabled(session)
+        if partitioned:
+            await partitions.ensure_partitions(session, now)
+            if settings.RETENTION_RAW_DAYS:
+                cutoff = now - timedelta(days=settings.RETENTION_RAW_DAYS)
+                dropped = await partitions.drop_partitions_before(session, cutoff)
+                removed["partitions"] = len(dropped)
+
+    if settings.RETENTION_RAW_DAYS and not partitioned:
+        cutoff = now - timedelta(days=settings.RETENTION_RAW_DAYS)
+        while True:
+            async with session_factory() as session:
+                deleted = await crud.delete_checks_before(
+                    session, cutoff, settings.RETENTION_BATCH_SIZE
+                )
+            removed["checks"] += deleted
+            if deleted < settings.RETENTION_BATCH_SIZE:
+                break
+            # Даём поработать проверкам между пачками
+            await asyncio.sleep(0)
+
+    for period, days in (
+        ("hour", settings.RETENTION_HOURLY_DAYS),
+        ("day", settings.RETENTION_DAILY_DAYS),
+    ):
+        if days:
+            async with session_factory() as session:
+                removed[period] = await crud.delete_rollups_before(
+                    session, period, now - timedelta(days=days)
+                )
+
+    return removed
+
+
+async def retention_loop(should_run: Callable[[], bool] | None = None) -> None:
+    """
+    Периодически запускает очистку истории.
+
+    Args:
+        should_run (Callable | None): Проверка перед каждым запуском; в режиме
+            воркеров очистку выполняет только один из них.
+    """
+    while True:
+        if should_run is None or should_run():
+            try:
+                removed = await purge_old_data()
+                if any(removed.values()):
+                    logger.info(f"Retention removed {removed}")
+            except Exception as err:
+                logger.exception(f"Retention failed: {err}")
+        await asyncio.sleep(settings.RETENTION_INTERVAL)
@@ -0,0 +1,118 @@
+"""
+Подтверждение неудачной проверки повторами.
+
+Одиночный таймаут или сброс соединения не означает, что сайт лежит.
+После неудачи проверка повторяется несколько раз с короткими таймаутами:
+у каждого повтора свой бюджет времени (CHECK_RETRY_BUDGETS), поэтому
+подтверждение укладывается в секунды и не требует увеличивать
+CHECK_TIMEOUT, от которого зависит длительность раундов. Сайт считается
+недоступным, только если не удалась и последняя попытка.
+
+Повторяются только неудачи из CHECK_RETRY_ON; для "http" — только ответы 5xx
+(4xx и непройденная проверка содержимого повтором не исправятся).
+"""
+
+import httpx
+
+from app.services.http_client import FAILURE_CLASSES
+
+
+def parse_budgets(value: str) -> tuple[float, ...]:
+    """
+    Разбирает бюджеты времени повторов.
+
+    Args:
+        value (str): Секунды через запятую, например "3,5" (пусто — без повторов).
+
+    Returns:
+        tuple[float, ...]: Бюджет каждого повтора по порядку.
+    """
+    return tuple(float(v) for v in value.split(",") if v.strip())
+
+
+def parse_failure_classes(value: str) -> frozenset[str]:
+    """
+    Разбирает причины неудач, после которых нужен повтор.
+
+    Args:
+        value (str): Причины через запятую, например "dns,connect,timeout,http".
+
+    Returns:
+        frozenset[str]: Причины из FAILURE_CLASSES.
+
+    Raises:
+        ValueError: Если причина неизвестна.
+    """
+    classes = frozenset(v.strip() for v in value.split(",") if v.strip())
+    unknown = classes - set(FAILURE_CLASSES)
+    if unknown:
+        raise ValueError(f"Unknown failure classes: {', '.join(sorted(unknown))}")
+    return classes
+
+
+class RetryPolicy:
+    """
+    Правила повторов неудачной проверки.
+
+    Args:
+        budgets (tuple[float, ...]): Бюджет времени каждого повтора (секунды);
+            число бюджетов — число повторов.
+        connect_timeout (float): Таймаут подключения в повторах (секунды).
+        delay (float): Пауза перед каждым повтором (секунды).
+        retry_on (frozenset[str]): Причины неудач, после которых нужен повтор.
+    """
+
+    def __init__(
+        self,
+        budgets: tuple[float, ...],
+        connect_timeout: float,
+        delay: float,
+        retry_on: frozenset[str],
+    ):
+        self.budgets = budgets
+        self.connect_timeout = connect_timeout
+        self.delay = delay
+        self.retry_on = retry_on
+
+    def should_retry(self, attempts: int, failure_class: str | None, status: int | None) -> bool:
+        """
+        Решает, нужен ли ещё один повтор.
+
+        Args:
+            attempts (int): Сделано попыток.
+            failure_class (str | None): Причина неудачи последней попытки (None — успех).
+            status (int | None): Код ответа последней попытки.
+
+        Returns:
+            bool: True, если проверку нужно повторить.
+        """
+        if failure_class is None or attempts > len(self.budgets):
+            return False
+        if failure_class not in self.retry_on:
+            return False
+        return failure_class != "http" or (status is not None and status >= 500)
+
+    def budget(self, retry: int) -> float:
+        """
+        Возвращает бюджет времени повтора.
+
+        Args:
+            retry (int): Номер повтора, начиная с 1.
+
+        Returns:
+            float: Секунды на всю попытку.
+        """
+        return self.budgets[retry - 1]
+
+    def timeout(self, retry: int) -> httpx.Timeout:
+        """
+        Возвращает таймауты запросов повтора.
+
+        Args:
+            retry (int): Номер повтора, начиная с 1.
+
+        Returns:
+            httpx.Timeout: Короткий таймаут подключения и чтение в пределах бюджета.
+        """
+        budget = self.budget(retry)
+        return httpx.Timeout(budget, connect=min(self.connect_timeout, budget))
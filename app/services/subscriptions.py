@@ -0,0 +1,119 @@
+"""
+Индекс подписок на оповещения.
+
+Подписчики сайта нужны на каждое оповещение, поэтому они держатся
+в памяти (site_id -> {chat_id: порог}) и обновляются при подписке,
+отписке и периодической сверке с БД. Рассылка о падении не делает
+запросов к базе.
+"""
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.db import crud
+
+logger = get_logger()
+
+
+class SubscriptionIndex:
+    """
+    Подписчики сайтов в памяти.
+
+    Args:
+        default_threshold (int): Порог подписки, у которой он не задан.
+        fallback_chat_id (int): Чат, получающий оповещения обо всех сайтах
+            с порогом по умолчанию (0 — нет такого чата).
+    """
+
+    def __init__(self, default_threshold: int, fallback_chat_id: int = 0):
+        self.default_threshold = default_threshold
+        self.fallback_chat_id = fallback_chat_id
+        self._by_site: dict[int, dict[int, int]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(chats) for chats in self._by_site.values())
+
+    def add(self, site_id: int, chat_id: int, failure_threshold: int | None = None) -> None:
+        """
+        Добавляет подписку или меняет её порог.
+
+        Args:
+            site_id (int): Идентификатор сайта.
+            chat_id (int): ID чата.
+            failure_threshold (int | None): Неудачных проверок подряд до оповещения.
+        """
+        threshold = failure_threshold or self.default_threshold
+        self._by_site.setdefault(site_id, {})[chat_id] = max(threshold, 1)
+
+    def remove(self, site_id: int, chat_id: int) -> None:
+        """
+        Удаляет подписку.
+        """
+        chats = self._by_site.get(site_id)
+        if chats is not None:
+            chats.pop(chat_id, None)
+            if not chats:
+                del self._by_site[site_id]
+
+    def drop_site(self, site_id: int) -> None:
+        """
+        Удаляет все подписки сайта.
+        """
+        self._by_site.pop(site_id, None)
+
+    def subscribers(self, site_id: int) -> dict[int, int]:
+        """
+        Возвращает подписчиков сайта.
+
+        Args:
+            site_id (int): Идентификатор сайта.
+
+        Returns:
+            dict[int, int]: ID чата -> порог неудачных проверок.
+        """
+        chats = self._by_site.get(site_id, {})
+        if self.fallback_chat_id and self.fallback_chat_id not in chats:
+            chats = {**chats, self.fallback_chat_id: self.default_threshold}
+        return chats
+
+    def thresholds(self, site_id: int) -> tuple[int, ...]:
+        """
+        Возвращает различные пороги подписчиков сайта по возрастанию.
+
+        Args:
+            site_id (int): Идентификатор сайта.
+
+        Returns:
+            tuple[int, ...]: Пороги (порог по умолчанию, если подписчиков нет).
+        """
+        chats = self.subscribers(site_id)
+        if not chats:
+            return (self.default_threshold,)
+        return tuple(sorted(set(chats.values())))
+
+    async def load(self, session_factory: async_sessionmaker[AsyncSession]) -> int:
+        """
+        Перечитывает все подписки из БД.
+
+        Args:
+            session_factory (async_sessionmaker): Фабрика сессий БД.
+
+        Returns:
+            int: Количество подписок.
+        """
+        async with session_factory() as session:
+            rows = await crud.list_subscriptions(session)
+        by_site: dict[int, dict[int, int]] = {}
+        for row in rows:
+            threshold = row.failure_threshold or self.default_threshold
+            by_site.setdefault(row.site_id, {})[row.chat_id] = max(threshold, 1)
+        self._by_site = by_site
+        return len(rows)
+
+
+# Общий индекс подписок; ALERT_CHAT_ID получает оповещения обо всех сайтах
+subscriptions = SubscriptionIndex(
+    default_threshold=settings.ALERT_FAILURE_THRESHOLD,
+    fallback_chat_id=settings.ALERT_CHAT_ID,
+)
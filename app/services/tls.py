@@ -0,0 +1,348 @@
+"""
+Сертификаты TLS сайтов.
+
+Сертификат читается из соединения, которое проверка уже открыла
+(`network_stream` ответа httpx), второго рукопожатия нет. Разобранный
+сертификат хранится в кэше по (хост, порт) до истечения его срока:
+на каждой проверке сравниваются только байты DER с сохранёнными,
+разбор нужен лишь при смене сертификата. Ошибки проверки цепочки
+(просрочен, чужой хост, неизвестный издатель) приходят исключением
+рукопожатия и тоже запоминаются по хосту.
+"""
+
+import hashlib
+import ssl
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from datetime import datetime
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.logger import get_logger
+from app.db import crud
+
+logger = get_logger()
+
+
+@dataclass
+class CertInfo:
+    """
+    Сертификат хоста или ошибка его проверки.
+
+    Атрибуты:
+        host (str): Имя хоста.
+        port (int): Порт.
+        subject (str): CN владельца (пусто при ошибке).
+        issuer (str): CN или организация издателя (пусто при ошибке).
+        not_after (datetime | None): Окончание срока действия (UTC, без tzinfo).
+        fingerprint (str): SHA-256 сертификата в hex (пусто при ошибке).
+        error (str | None): Ошибка проверки цепочки (None — сертификат принят).
+    """
+    host: str
+    port: int
+    subject: str = ""
+    issuer: str = ""
+    not_after: datetime | None = None
+    fingerprint: str = ""
+    error: str | None = None
+
+    def days_left(self, now: datetime) -> float | None:
+        """
+        Возвращает, сколько дней осталось до окончания срока (None — срок неизвестен).
+        """
+        if self.not_after is None:
+            return None
+        return (self.not_after - now).total_seconds() / 86400
+
+
+def _name_field(name: tuple, *keys: str) -> str:
+    # getpeercert() отдаёт имя как кортеж RDN из пар (ключ, значение)
+    fields = {k: v for rdn in name for k, v in rdn}
+    for key in keys:
+        if fields.get(key):
+            return fields[key]
+    return ""
+
+
+def parse_peer_cert(host: str, port: int, cert: dict, der: bytes) -> CertInfo:
+    """
+    Разбирает сертификат из `SSLObject.getpeercert()`.
+
+    Args:
+        host (str): Имя хоста.
+        port (int): Порт.
+        cert (dict): Проверенный сертификат в виде словаря.
+        der (bytes): Тот же сертификат в DER.
+
+    Returns:
+        CertInfo: Разобранный сертификат.
+    """
+    not_after = cert.get("notAfter")
+    return CertInfo(
+        host=host,
+        port=port,
+        subject=_name_field(cert.get("subject", ()), "commonName"),
+        issuer=_name_field(cert.get("issuer", ()), "commonName", "organizationName"),
+        not_after=(
+            datetime.utcfromtimestamp(ssl.cert_time_to_seconds(not_after))
+            if not_after else None
+        ),
+        fingerprint=hashlib.sha256(der).hexdigest(),
+    )
+
+
+def find_verification_error(err: BaseException) -> str | None:
+    """
+    Ищет в цепочке исключений ошибку проверки сертификата.
+
+    Args:
+        err (BaseException): Исключение запроса.
+
+    Returns:
+        str | None: Описание ошибки проверки или None, если дело не в сертификате.
+    """
+    seen = set()
+    while err is not None and id(err) not in seen:
+        seen.add(id(err))
+        if isinstance(err, ssl.SSLCertVerificationError):
+            return err.verify_message or str(err)
+        err = err.__cause__ or err.__context__
+    return None
+
+
+class CertificateCache:
+    """
+    LRU-кэш сертификатов по (хост, порт).
+
+    Args:
+        max_size (int): Максимум хостов в кэше.
+        clock (Callable): Источник текущего времени UTC.
+    """
+
+    def __init__(self, max_size: int, clock: Callable[[], datetime] = datetime.utcnow):
+        self.max_size = max_size
+        self._clock = clock
+        self._entries: OrderedDict[tuple[str, int], tuple[bytes, CertInfo]] = OrderedDict()
+
+        self.hits = 0
+        self.parsed = 0
+        self.errors = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, host: str, port: int) -> CertInfo | None:
+        """
+        Возвращает последний известный сертификат хоста.
+        """
+        entry = self._entries.get((host, port))
+        return entry[1] if entry is not None else None
+
+    def observe(self, host: str, port: int, network_stream) -> CertInfo | None:
+        """
+        Запоминает сертификат соединения, разбирая его, только если он сменился.
+
+        Args:
+            host (str): Имя хоста.
+            port (int): Порт.
+            network_stream: Поток httpcore из `response.extensions["network_stream"]`.
+
+        Returns:
+            CertInfo | None: Сертификат или None, если соединение без TLS.
+        """
+        ssl_object = network_stream.get_extra_info("ssl_object") if network_stream else None
+        if ssl_object is None:
+            return None
+        der = ssl_object.getpeercert(binary_form=True)
+        if der is None:
+            return None
+
+        key = (host, port)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == der:
+            info = entry[1]
+            if info.not_after is None or info.not_after > self._clock():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return info
+
+        self.parsed += 1
+        info = parse_peer_cert(host, port, ssl_object.getpeercert(), der)
+        self._store(key, der, info)
+        return info
+
+    def record_error(self, host: str, port: int, error: str) -> CertInfo:
+        """
+        Запоминает ошибку проверки сертификата хоста.
+
+        Args:
+            host (str): Имя хоста.
+            port (int): Порт.
+            error (str): Описание ошибки.
+
+        Returns:
+            CertInfo: Запись с ошибкой.
+        """
+        self.errors += 1
+        info = CertInfo(host=host, port=port, error=error)
+        self._store((host, port), b"", info)
+        return info
+
+    def _store(self, key: tuple[str, int], der: bytes, info: CertInfo) -> None:
+        if self.max_size <= 0:
+            return
+        self._entries[key] = (der, info)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict[str, int]:
+        """
+        Возвращает показатели кэша.
+
+        Returns:
+            dict[str, int]: Размер кэша, проверки без разбора, разборы и ошибки цепочки.
+        """
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "parsed": self.parsed,
+            "errors": self.errors,
+        }
+
+
+def parse_thresholds(value: str) -> tuple[int, ...]:
+    """
+    Разбирает пороги оповещений о сроке сертификата.
+
+    Args:
+        value (str): Дни через запятую, например "30,14,7,1".
+
+    Returns:
+        tuple[int, ...]: Пороги по убыванию.
+    """
+    return tuple(sorted({int(v) for v in value.split(",") if v.strip()}, reverse=True))
+
+
+def expiry_threshold(days_left: float, thresholds: tuple[int, ...]) -> int | None:
+    """
+    Возвращает наименьший достигнутый порог.
+
+    Args:
+        days_left (float): Дней до окончания срока.
+        thresholds (tuple[int, ...]): Пороги по убыванию.
+
+    Returns:
+        int | None: Порог (дней) или None, если до первого порога ещё далеко.
+    """
+    reached = [t for t in thresholds if days_left <= t]
+    return min(reached) if reached else None
+
+
+def format_cert_alert(url: str, info: CertInfo, days_left: float | None) -> str:
+    """
+    Формирует текст оповещения о сертификате.
+
+    Args:
+        url (str): Адрес сайта.
+        info (CertInfo): Сертификат или ошибка.
+        days_left (float | None): Дней до окончания срока.
+
+    Returns:
+        str: Текст оповещения.
+    """
+    if info.error:
+        return f"[CERT] TLS certificate problem on {url}: {info.error}"
+    if days_left is not None and days_left <= 0:
+        return f"[CERT] TLS certificate of {url} has expired ({info.not_after:%Y-%m-%d})"
+    return (
+        f"[CERT] TLS certificate of {url} expires in {int(days_left)} days "
+        f"({info.not_after:%Y-%m-%d}, issuer {info.issuer or '?'})"
+    )
+
+
+class CertAlerts:
+    """
+    Оповещения о сроке и ошибках сертификатов сайтов.
+
+    О сроке оповещается по одному разу на каждый достигнутый порог;
+    последний порог и срок сертификата хранятся у сайта в БД, чтобы
+    перезапуск не повторял уже отправленное. Новый сертификат (другой
+    срок) сбрасывает пороги. Об ошибке цепочки оповещается, когда
+    она появляется или меняется.
+
+    Args:
+        notify (Callable): Корутина `notify(site, text)`, рассылающая оповещение.
+        session_factory (async_sessionmaker): Фабрика сессий БД.
+        thresholds (tuple[int, ...]): Пороги в днях до окончания срока.
+        clock (Callable): Источник текущего времени UTC.
+    """
+
+    def __init__(
+        self,
+        notify: Callable[[object, str], Awaitable[None]],
+        session_factory: async_sessionmaker[AsyncSession],
+        thresholds: tuple[int, ...],
+        clock: Callable[[], datetime] = datetime.utcnow,
+    ):
+        self._notify = notify
+        self._session_factory = session_factory
+        self.thresholds = tuple(sorted(thresholds, reverse=True))
+        self._clock = clock
+        self._errors: dict[int, str] = {}
+
+        self.sent = 0
+
+    async def process(self, site, info: CertInfo | None) -> None:
+        """
+        Учитывает сертификат, увиденный проверкой сайта.
+
+        Args:
+            site: Объект сайта с атрибутами `id`, `url`, `cert_not_after`
+                и `cert_alerted_days`.
+            info (CertInfo | None): Сертификат (None — сайт без TLS или не ответил).
+        """
+        if info is None:
+            return
+        if info.error:
+            if self._errors.get(site.id) != info.error:
+                self._errors[site.id] = info.error
+                await self._send(site, format_cert_alert(site.url, info, None))
+            return
+        self._errors.pop(site.id, None)
+        if info.not_after is None:
+            return
+
+        not_after = getattr(site, "cert_not_after", None)
+        alerted = getattr(site, "cert_alerted_days", None)
+        changed = False
+        if not_after != info.not_after:
+            # Новый сертификат: пороги считаются заново
+            not_after, alerted, changed = info.not_after, None, True
+
+        days_left = info.days_left(self._clock())
+        threshold = expiry_threshold(days_left, self.thresholds)
+        if threshold is not None and (alerted is None or threshold < alerted):
+            alerted, changed = threshold, True
+            await self._send(site, format_cert_alert(site.url, info, days_left))
+
+        if changed:
+            site.cert_not_after = not_after
+            site.cert_alerted_days = alerted
+            async with self._session_factory() as session:
+                await crud.set_cert_state(session, site.id, not_after, alerted)
+
+    def forget(self, site_id: int) -> None:
+        """
+        Забывает ошибку сертификата удалённого сайта.
+        """
+        self._errors.pop(site_id, None)
+
+    async def _send(self, site, text: str) -> None:
+        self.sent += 1
+        logger.info(f"Certificate alert for {site.url}: {text}")
+        try:
+            await self._notify(site, text)
+        except Exception as err:
+            logger.exception(f"Failed to send certificate alert for {site.url}: {err}")
@@ -0,0 +1,88 @@
+"""
+Воркер мониторинга для режима WORKER_MODE.
+
+Запускается отдельными процессами (на одной или нескольких машинах
+с общей БД):
+
+    python -m app.worker
+
+Каждый воркер арендует часть секций сайтов (`site_id % WORKER_PARTITIONS`)
+и проверяет только их сайты. Если воркер останавливается или умирает,
+его секции переходят к остальным. Схему БД создаёт основной процесс
+(`python -m app.main`), поэтому его нужно запустить первым.
+"""
+
+import asyncio
+
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.core.metrics import start_metrics_server, stop_metrics_server
+from app.core.scheduler import (
+    schedule_all,
+    set_partitions,
+    start_scheduler,
+    stop_scheduler,
+    sync_sites,
+)
+from app.db.database import AsyncSessionLocal
+from app.services.leases import LeaseManager, make_worker_id
+from app.services.monitor import alerts, start_monitor, stop_monitor
+from app.services.notifier import notifications
+from app.services.offload import loop_lag
+from app.services.retention import retention_loop
+
+logger = get_logger()
+
+
+async def run_worker():
+    """
+    Запуск воркера: аренда секций, планировщик и движок проверок
+    для сайтов своих секций.
+    """
+    async def rebalance(owned: frozenset[int]) -> None:
+        # Сохраняем состояния оповещений уходящих сайтов для нового владельца
+        await alerts.flush()
+        set_partitions(owned, settings.WORKER_PARTITIONS)
+        await sync_sites()
+        await alerts.load(owns=leases.owns)
+
+    leases = LeaseManager(
+        make_worker_id(),
+        partitions=settings.WORKER_PARTITIONS,
+        ttl=settings.WORKER_LEASE_TTL,
+        session_factory=AsyncSessionLocal,
+        on_change=rebalance,
+    )
+    logger.info(f"Starting monitor worker {leases.worker_id}")
+
+    # Пока секции не получены, не проверяем ничего
+    set_partitions(frozenset(), settings.WORKER_PARTITIONS)
+    loop_lag.start()
+    # Порт METRICS_PORT у основного процесса, воркеры занимают следующие свободные
+    if settings.METRICS_PORT:
+        await start_metrics_server(settings.METRICS_HOST, settings.METRICS_PORT + 1, attempts=64)
+    notifications.start()
+    start_monitor()
+    await leases.start()
+
+    await schedule_all()
+    start_scheduler()
+    # Очистку истории выполняет владелец секции 0
+    retention = asyncio.create_task(
+        retention_loop(lambda: 0 in leases.owned), name="retention"
+    )
+
+    try:
+        await asyncio.Event().wait()
+    finally:
+        retention.cancel()
+        await stop_scheduler()
+        await stop_monitor()
+        await leases.stop()
+        await notifications.stop()
+        await stop_metrics_server()
+        await loop_lag.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_worker())
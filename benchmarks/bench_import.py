@@ -0,0 +1,74 @@
+"""
+Бенчмарк массового импорта сайтов: `create_site` с коммитом на каждый
+сайт против потокового импорта `import_sites` пачками через ON CONFLICT.
+
+По умолчанию импортируется 50k адресов из CSV в памяти (кусками по 64 КБ,
+как при скачивании файла), затем тот же файл повторно — все строки
+попадают в ON CONFLICT DO UPDATE. Цикл `create_site` меряется на выборке
+и пересчитывается на полный объём. Для PostgreSQL передайте строку
+подключения в BENCH_DATABASE_URL.
+
+Запуск:
+    python -m benchmarks.bench_import [urls] [loop_sample] [batch_size]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.db import crud
+from app.db.database import Base
+from app.services.importer import import_sites
+
+CHUNK = 65536
+
+
+async def file_chunks(data: bytes):
+    for i in range(0, len(data), CHUNK):
+        yield data[i:i + CHUNK]
+
+
+async def main() -> None:
+    urls = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    sample = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    batch_size = int(sys.argv[3]) if len(sys.argv) > 3 else None
+
+    data = "url,interval\n".encode() + "".join(
+        f"site{i}.bench/path?id={i},{30 + i % 5 * 30}\n" for i in range(urls)
+    ).encode()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = os.environ.get("BENCH_DATABASE_URL", f"sqlite+aiosqlite:///{tmp}/bench.db")
+        engine = create_async_engine(url)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+        print(f"{urls} URLs ({len(data) / 1024 / 1024:.1f} MB CSV) on {engine.dialect.name}")
+
+        started = time.perf_counter()
+        async with session_factory() as session:
+            for i in range(sample):
+                await crud.create_site(session, f"http://loop{i}.bench", 60)
+        elapsed = time.perf_counter() - started
+        print(f"{'create_site loop':<28} {sample / elapsed:>10.0f} sites/s  "
+              f"(~{elapsed / sample * urls:.1f}s for {urls})")
+
+        for label in ("import_sites (new)", "import_sites (re-import)"):
+            started = time.perf_counter()
+            report = await import_sites(
+                file_chunks(data), "csv", session_factory, batch_size=batch_size
+            )
+            elapsed = time.perf_counter() - started
+            print(f"{label:<28} {report.imported / elapsed:>10.0f} sites/s  "
+                  f"({elapsed:.1f}s, added {report.added}, invalid {report.invalid})")
+
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
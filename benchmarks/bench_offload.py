@@ -0,0 +1,92 @@
+"""
+Бенчмарк выноса CPU-работы: задержка цикла событий до и после.
+
+Обрабатывает пачку ответов (хэш тела, поиск по регулярному выражению,
+декодирование — типичная работа проверок содержимого) в режимах
+inline, thread и process и меряет задержку цикла событий, которую
+в это время видел бы бот.
+
+Запуск:
+    python -m benchmarks.bench_offload
+"""
+
+import asyncio
+import hashlib
+import random
+import re
+import time
+
+from app.services.offload import CpuExecutor, LoopLagMonitor
+
+RESPONSES = 200
+BODY_SIZE = 256 * 1024
+CONCURRENCY = 50
+
+_PATTERN = re.compile(rb"<title>(.*?)</title>|error|exception", re.IGNORECASE)
+
+
+def analyze(body: bytes) -> tuple[str, int, int]:
+    """
+    Синтетическая обработка ответа: хэш, поиск по тексту, декодирование.
+    """
+    digest = hashlib.sha256(body).hexdigest()
+    matches = sum(1 for _ in _PATTERN.finditer(body))
+    words = len(body.decode("utf-8", "replace").split())
+    return digest, matches, words
+
+
+def make_bodies() -> list[bytes]:
+    rnd = random.Random(1)
+    words = [b"lorem", b"ipsum", b"dolor", b"<div>", b"</div>", b"status", b"ok"]
+    bodies = []
+    for _ in range(RESPONSES):
+        chunks, size = [b"<html><title>bench</title>"], 0
+        while size < BODY_SIZE:
+            word = rnd.choice(words)
+            chunks.append(word)
+            size += len(word) + 1
+        bodies.append(b" ".join(chunks))
+    return bodies
+
+
+async def run(mode: str, bodies: list[bytes]) -> None:
+    executor = CpuExecutor(mode, workers=0, max_pending=CONCURRENCY, inline_below=0)
+    executor.start()
+    if mode == "process":
+        # Прогрев: процессы пула стартуют при первых задачах
+        await asyncio.gather(*(executor.run(analyze, b"") for _ in range(executor.workers)))
+
+    lag = LoopLagMonitor(interval=0.005, warn_after=float("inf"))
+    lag.start()
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+
+    async def process(body: bytes):
+        async with semaphore:
+            # Имитация сетевой части проверки
+            await asyncio.sleep(0)
+            return await executor.run(analyze, body)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(process(body) for body in bodies))
+    elapsed = time.perf_counter() - started
+    await asyncio.sleep(0.02)
+    await lag.stop()
+    await executor.stop()
+
+    stats = lag.stats()
+    print(
+        f"{mode:<8} {RESPONSES / elapsed:8.1f} responses/s   "
+        f"loop lag avg={stats['avg'] * 1000:6.1f} ms  "
+        f"p99={stats['p99'] * 1000:6.1f} ms  max={stats['max'] * 1000:6.1f} ms"
+    )
+
+
+async def main() -> None:
+    bodies = make_bodies()
+    print(f"{RESPONSES} responses of {BODY_SIZE // 1024} KB, concurrency {CONCURRENCY}")
+    for mode in ("inline", "thread", "process"):
+        await run(mode, bodies)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,101 @@
+"""
+Бенчмарк статистики для /report: цикл `stats_for_site` по сайтам
+против одного сгруппированного запроса `stats_for_sites`
+и чтения предагрегированных корзин `rollup_stats`.
+
+По умолчанию 1000 сайтов × 100 проверок (100k строк) во временной
+SQLite-базе. Для PostgreSQL передайте строку подключения в BENCH_DATABASE_URL.
+
+Запуск:
+    python -m benchmarks.bench_report_stats [sites] [checks_per_site]
+"""
+
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.db import crud
+from app.db.database import Base
+from app.db.models import Site
+
+BATCH = 5000
+
+
+async def seed(session_factory, sites: int, checks_per_site: int) -> list[int]:
+    """
+    Заполняет базу сайтами и проверками за последние сутки.
+    """
+    rnd = random.Random(1)
+    now = datetime.now()
+    async with session_factory() as session:
+        await session.execute(insert(Site), [
+            {"url": f"http://site{i}.bench", "interval": 60, "is_active": True}
+            for i in range(sites)
+        ])
+        await session.commit()
+        site_ids = [s.id for s in await crud.list_sites(session)]
+
+        rows = []
+        for site_id in site_ids:
+            for n in range(checks_per_site):
+                ok = rnd.random() > 0.05
+                rows.append({
+                    "site_id": site_id,
+                    "status_code": 200 if ok else None,
+                    "response_time": rnd.uniform(0.05, 1.5) if ok else None,
+                    "is_available": ok,
+                    "checked_at": now - timedelta(seconds=rnd.uniform(0, 86000)),
+                })
+                if len(rows) >= BATCH:
+                    await crud.create_checks(session, rows)
+                    rows = []
+        await crud.create_checks(session, rows)
+    return site_ids
+
+
+async def timed(label: str, coro) -> None:
+    started = time.perf_counter()
+    result = await coro
+    elapsed = time.perf_counter() - started
+    print(f"{label:<36} {elapsed * 1000:>10.1f} ms  ({len(result)} sites)")
+
+
+async def per_site_loop(session, site_ids):
+    return {site_id: await crud.stats_for_site(session, site_id) for site_id in site_ids}
+
+
+async def main() -> None:
+    sites = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    checks_per_site = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+
+    with tempfile.TemporaryDirectory() as tmp:
+        url = os.environ.get("BENCH_DATABASE_URL", f"sqlite+aiosqlite:///{tmp}/bench.db")
+        engine = create_async_engine(url)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.drop_all)
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+        started = time.perf_counter()
+        site_ids = await seed(session_factory, sites, checks_per_site)
+        print(f"seeded {sites} sites × {checks_per_site} checks "
+              f"in {time.perf_counter() - started:.1f}s on {engine.dialect.name}")
+
+        since = crud.report_since(48)
+        async with session_factory() as session:
+            await timed("stats_for_site loop (N queries)", per_site_loop(session, site_ids))
+            await timed("stats_for_sites (1 grouped query)", crud.stats_for_sites(session, since=since))
+            await timed("rollup_stats (hourly buckets)", crud.rollup_stats(session, since))
+
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
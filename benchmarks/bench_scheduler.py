@@ -0,0 +1,109 @@
+"""
+Бенчмарк планировщика: память на сайт и задержка запуска проверок.
+
+Для каждого размера N заводит N сайтов с интервалом INTERVAL секунд
+и случайным первым сроком, затем гоняет цикл планировщика DURATION секунд
+с пустым dispatch и собирает задержку запуска относительно срока.
+
+Запуск:
+    python -m benchmarks.bench_scheduler [N ...]
+"""
+
+import asyncio
+import gc
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+
+from app.core.scheduler import HeapScheduler
+
+INTERVAL = 60
+DURATION = 10
+SIZES = (10_000, 100_000, 1_000_000)
+
+
+def measure_memory(n: int) -> float:
+    """
+    Возвращает память планировщика в байтах на один сайт.
+    """
+    async def dispatch(site_id, due):
+        return None
+
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    scheduler = HeapScheduler(dispatch)
+    for site_id in range(n):
+        scheduler.add(site_id, INTERVAL)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / n
+
+
+class BenchClock:
+    """
+    Часы, стоящие на месте, пока заполняется расписание,
+    чтобы время заполнения не попадало в задержку.
+    """
+
+    def __init__(self):
+        self.t0 = time.monotonic()
+        self.shift: float | None = None
+
+    def __call__(self) -> float:
+        if self.shift is None:
+            return self.t0
+        return time.monotonic() - self.shift
+
+    def release(self) -> None:
+        self.shift = time.monotonic() - self.t0
+
+
+async def measure_lag(n: int) -> dict[str, float]:
+    """
+    Гоняет планировщик DURATION секунд и возвращает статистику задержки.
+    """
+    lags: list[float] = []
+    clock = BenchClock()
+
+    async def dispatch(site_id, due):
+        lags.append(clock() - due)
+
+    scheduler = HeapScheduler(dispatch, clock=clock)
+    started = time.perf_counter()
+    for site_id in range(n):
+        scheduler.add(site_id, INTERVAL, delay=random.uniform(0, INTERVAL))
+    build = time.perf_counter() - started
+
+    clock.release()
+    scheduler.start()
+    await asyncio.sleep(DURATION)
+    await scheduler.stop()
+
+    lags.sort()
+    return {
+        "dispatched": len(lags),
+        "rate": len(lags) / DURATION,
+        "p50_ms": statistics.median(lags) * 1000 if lags else 0.0,
+        "p99_ms": lags[int(len(lags) * 0.99)] * 1000 if lags else 0.0,
+        "max_ms": lags[-1] * 1000 if lags else 0.0,
+        "build_s": build,
+    }
+
+
+def main() -> None:
+    sizes = [int(arg) for arg in sys.argv[1:]] or SIZES
+    print(f"{'sites':>10} {'bytes/site':>11} {'checks/s':>9} "
+          f"{'lag p50 ms':>11} {'lag p99 ms':>11} {'lag max ms':>11} {'build s':>8}")
+    for n in sizes:
+        per_site = measure_memory(n)
+        lag = asyncio.run(measure_lag(n))
+        print(f"{n:>10} {per_site:>11.0f} {lag['rate']:>9.0f} "
+              f"{lag['p50_ms']:>11.2f} {lag['p99_ms']:>11.2f} {lag['max_ms']:>11.2f} "
+              f"{lag['build_s']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,168 @@
+"""
+Бенчмарк режима воркеров: пропускная способность проверок на 1..N процессов.
+
+Поднимает локальные HTTP-серверы (по одному процессу на воркер, чтобы
+сервер не упирался в одно ядро) и для каждого числа воркеров запускает
+процессы, которые делят секции сайтов через настоящие аренды в общей
+SQLite-базе, а затем DURATION секунд гоняют проверки своих сайтов
+через движок и общий HTTP-клиент. Результаты в БД не пишутся —
+измеряется только сама проверка.
+
+Запуск:
+    python -m benchmarks.bench_workers [N ...]
+"""
+
+import asyncio
+import multiprocessing as mp
+import os
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+SITES = 2000
+PARTITIONS = 64
+DURATION = 10
+CONCURRENCY = 100
+
+
+async def _serve(port_queue) -> None:
+    async def handle(reader, writer):
+        while True:
+            try:
+                await reader.readuntil(b"\r\n\r\n")
+            except (asyncio.IncompleteReadError, ConnectionError):
+                break
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+            await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0, backlog=1024)
+    port_queue.put(server.sockets[0].getsockname()[1])
+    async with server:
+        await server.serve_forever()
+
+
+def _server_main(port_queue) -> None:
+    asyncio.run(_serve(port_queue))
+
+
+async def _work(db_url, ports, workers, barrier, result_queue) -> None:
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    from app.services.engine import CheckEngine
+    from app.services.http_client import SharedHttpClient
+    from app.services.leases import LeaseManager, make_worker_id
+
+    engine = create_async_engine(db_url, connect_args={"timeout": 30})
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    leases = LeaseManager(make_worker_id(), PARTITIONS, 3, session_factory)
+    await leases.start()
+
+    # Ждём, пока все воркеры зарегистрируются и секции поделятся
+    share = -(-PARTITIONS // workers)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0.2)
+        await leases.tick()
+        if len(leases.owned) >= PARTITIONS // workers and len(leases.owned) <= share:
+            break
+    await asyncio.get_running_loop().run_in_executor(None, barrier.wait)
+
+    sites = [
+        SimpleNamespace(id=site_id, url=f"http://127.0.0.1:{ports[site_id % len(ports)]}/{site_id}")
+        for site_id in range(SITES)
+        if leases.owns(site_id)
+    ]
+    http = SharedHttpClient(
+        timeout=10, max_connections=CONCURRENCY, max_keepalive=CONCURRENCY, keepalive_expiry=60
+    )
+
+    async def check(site):
+        await http.fetch("GET", site.url)
+
+    checks = CheckEngine(check, concurrency=CONCURRENCY, per_host=CONCURRENCY, queue_size=1000)
+    checks.start()
+    done = 0
+    started = time.monotonic()
+    while time.monotonic() - started < DURATION:
+        stats = await checks.run_round(sites)
+        done += stats.sites
+    elapsed = time.monotonic() - started
+    await checks.stop()
+    await http.aclose()
+    await leases.stop()
+    await engine.dispose()
+    result_queue.put((len(sites), done, elapsed))
+
+
+def _worker_main(db_url, ports, workers, barrier, result_queue) -> None:
+    asyncio.run(_work(db_url, ports, workers, barrier, result_queue))
+
+
+def _create_schema(db_url: str) -> None:
+    from sqlalchemy.ext.asyncio import create_async_engine
+
+    from app.db import models  # noqa: F401 — регистрирует таблицы в метаданных
+    from app.db.database import Base
+
+    async def create():
+        engine = create_async_engine(db_url)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        await engine.dispose()
+
+    asyncio.run(create())
+
+
+def run(workers: int, ports: list[int]) -> float:
+    """
+    Возвращает суммарное число проверок в секунду для заданного числа воркеров.
+    """
+    ctx = mp.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        db_url = f"sqlite+aiosqlite:///{os.path.join(tmp, 'bench.db')}"
+        _create_schema(db_url)
+        barrier = ctx.Barrier(workers)
+        results = ctx.Queue()
+        procs = [
+            ctx.Process(target=_worker_main, args=(db_url, ports, workers, barrier, results))
+            for _ in range(workers)
+        ]
+        for p in procs:
+            p.start()
+        rows = [results.get(timeout=DURATION + 60) for _ in procs]
+        for p in procs:
+            p.join()
+
+    owned = sorted(r[0] for r in rows)
+    rate = sum(done / elapsed for _, done, elapsed in rows)
+    print(f"workers={workers:<3} sites per worker={owned} checks/s={rate:,.0f}")
+    return rate
+
+
+def main() -> None:
+    sizes = [int(a) for a in sys.argv[1:]] or [1, 2, 4]
+    ctx = mp.get_context("spawn")
+    port_queue = ctx.Queue()
+    servers = [
+        ctx.Process(target=_server_main, args=(port_queue,), daemon=True)
+        for _ in range(max(sizes))
+    ]
+    for s in servers:
+        s.start()
+    ports = [port_queue.get() for _ in servers]
+
+    print(f"CPU cores: {os.cpu_count()}, sites: {SITES}, partitions: {PARTITIONS}")
+    base = None
+    for n in sizes:
+        rate = run(n, ports)
+        base = base or rate / n
+        print(f"    scaling efficiency: {rate / (base * n):.0%}")
+
+    for s in servers:
+        s.terminate()
+
+
+if __name__ == "__main__":
+    main()
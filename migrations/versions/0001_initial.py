@@ -0,0 +1,43 @@
+"""initial schema: sites and checks
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "sites",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("url", sa.String(), nullable=False, unique=True),
+        sa.Column("interval", sa.Integer(), nullable=True),
+        sa.Column("is_active", sa.Boolean(), nullable=True),
+    )
+    op.create_index("ix_sites_id", "sites", ["id"])
+
+    op.create_table(
+        "checks",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("site_id", sa.Integer(), sa.ForeignKey("sites.id"), nullable=True),
+        sa.Column("status_code", sa.Integer(), nullable=True),
+        sa.Column("response_time", sa.Float(), nullable=True),
+        sa.Column("is_available", sa.Boolean(), nullable=True),
+        sa.Column("checked_at", sa.DateTime(), nullable=True),
+    )
+    op.create_index("ix_checks_id", "checks", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_checks_id", table_name="checks")
+    op.drop_table("checks")
+    op.drop_index("ix_sites_id", table_name="sites")
+    op.drop_table("sites")
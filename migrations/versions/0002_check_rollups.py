@@ -0,0 +1,72 @@
+"""check_rollups: hourly and daily per-site aggregates
+
+Создаёт таблицу предагрегированной статистики (если её ещё нет —
+до Alembic она создавалась через create_all) и досчитывает корзины
+по проверкам, записанным до появления таблицы.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+
+def _bucket_expr(dialect: str, period: str) -> str:
+    if dialect == "postgresql":
+        return f"date_trunc('{period}', c.checked_at)"
+    fmt = "%Y-%m-%d %H:00:00.000000" if period == "hour" else "%Y-%m-%d 00:00:00.000000"
+    return f"strftime('{fmt}', c.checked_at)"
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if not sa.inspect(bind).has_table("check_rollups"):
+        op.create_table(
+            "check_rollups",
+            sa.Column("site_id", sa.Integer(), sa.ForeignKey("sites.id"), primary_key=True),
+            sa.Column("period", sa.String(4), primary_key=True),
+            sa.Column("bucket", sa.DateTime(), primary_key=True),
+            sa.Column("total", sa.Integer(), nullable=False),
+            sa.Column("up", sa.Integer(), nullable=False),
+            sa.Column("response_sum", sa.Float(), nullable=False),
+            sa.Column("response_count", sa.Integer(), nullable=False),
+        )
+
+    # Досчитываем проверки, которые старше первой часовой корзины сайта:
+    # всё, что новее, уже учтено при записи. Суточные корзины считаем первыми,
+    # пока часовые досчитанные корзины не сдвинули границу.
+    for period in ("day", "hour"):
+        bucket = _bucket_expr(bind.dialect.name, period)
+        op.execute(f"""
+            INSERT INTO check_rollups
+                (site_id, period, bucket, total, up, response_sum, response_count)
+            SELECT c.site_id, '{period}', {bucket}, count(*),
+                   sum(CASE WHEN c.is_available THEN 1 ELSE 0 END),
+                   sum(coalesce(c.response_time, 0)),
+                   count(c.response_time)
+            FROM checks c
+            WHERE c.site_id IN (SELECT id FROM sites)
+              AND c.checked_at IS NOT NULL
+              AND NOT EXISTS (
+                  SELECT 1 FROM check_rollups r
+                  WHERE r.site_id = c.site_id AND r.period = 'hour'
+                    AND r.bucket <= c.checked_at
+              )
+            GROUP BY c.site_id, {bucket}
+            ON CONFLICT (site_id, period, bucket) DO UPDATE SET
+                total = check_rollups.total + excluded.total,
+                up = check_rollups.up + excluded.up,
+                response_sum = check_rollups.response_sum + excluded.response_sum,
+                response_count = check_rollups.response_count + excluded.response_count
+        """)
+
+
+def downgrade() -> None:
+    op.drop_table("check_rollups")
@@ -0,0 +1,28 @@
+"""composite index on checks (site_id, checked_at)
+
+`last_checks` фильтрует по site_id и сортирует по checked_at DESC,
+статистика и очистка фильтруют по времени.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index("ix_checks_site_id_checked_at", "checks", ["site_id", "checked_at"])
+    op.create_index("ix_checks_checked_at", "checks", ["checked_at"])
+    op.create_index("ix_check_rollups_period_bucket", "check_rollups", ["period", "bucket"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_check_rollups_period_bucket", table_name="check_rollups")
+    op.drop_index("ix_checks_checked_at", table_name="checks")
+    op.drop_index("ix_checks_site_id_checked_at", table_name="checks")
@@ -0,0 +1,107 @@
+"""range-partition checks by checked_at (PostgreSQL, optional)
+
+Выполняется только на PostgreSQL при включённом CHECKS_PARTITIONING.
+Секционировать ли таблицу, решают настройки на момент запуска миграции:
+если CHECKS_PARTITIONING был выключен, ревизия 0004 отмечается
+применённой без изменений, и позже включённая настройка на эту базу
+уже не подействует.
+Существующая таблица становится секцией с диапазоном до конца текущего
+периода, следующие периоды получают свои секции, создаваемые заранее.
+Первичный ключ секционированной таблицы — (id, checked_at), так как
+PostgreSQL требует ключ секционирования в уникальных ограничениях.
+
+Откат смотрит не на настройки, а на фактическое состояние таблицы:
+секционированная таблица копируется обратно в обычную, иначе
+(SQLite или секционирование было выключено) откат ничего не делает.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18
+"""
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.config import settings
+from app.db.partitions import partition_name, period_length, period_start
+
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def _is_partitioned(bind) -> bool:
+    return bool(bind.execute(sa.text(
+        "SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'checks'::regclass"
+    )).scalar())
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql" or not settings.CHECKS_PARTITIONING:
+        return
+
+    if _is_partitioned(bind):
+        return
+
+    granularity = settings.CHECKS_PARTITIONING
+    step = period_length(granularity)
+    # Старая таблица станет секцией «всё до конца текущего периода»,
+    # новые секции начинаются со следующего
+    start = period_start(datetime.now(), granularity) + step
+
+    op.execute("ALTER TABLE checks RENAME TO checks_legacy")
+    for index in ("ix_checks_id", "ix_checks_site_id_checked_at", "ix_checks_checked_at"):
+        op.execute(f"ALTER INDEX IF EXISTS {index} RENAME TO {index.replace('checks', 'checks_legacy', 1)}")
+    op.execute("UPDATE checks_legacy SET checked_at = now() WHERE checked_at IS NULL")
+    op.execute("ALTER TABLE checks_legacy ALTER COLUMN checked_at SET NOT NULL")
+
+    op.execute(
+        "CREATE TABLE checks (LIKE checks_legacy INCLUDING DEFAULTS) "
+        "PARTITION BY RANGE (checked_at)"
+    )
+    # Последовательность id должна пережить удаление старой секции
+    op.execute("ALTER SEQUENCE checks_id_seq OWNED BY checks.id")
+    op.execute("ALTER TABLE checks ADD PRIMARY KEY (id, checked_at)")
+    op.execute("ALTER TABLE checks ADD FOREIGN KEY (site_id) REFERENCES sites (id)")
+    op.execute("CREATE INDEX ix_checks_id ON checks (id)")
+    op.execute("CREATE INDEX ix_checks_site_id_checked_at ON checks (site_id, checked_at)")
+    op.execute("CREATE INDEX ix_checks_checked_at ON checks (checked_at)")
+
+    op.execute(
+        "ALTER TABLE checks ATTACH PARTITION checks_legacy "
+        f"FOR VALUES FROM (MINVALUE) TO ('{start.isoformat(' ')}')"
+    )
+
+    for _ in range(settings.CHECKS_PARTITIONS_AHEAD):
+        end = start + step
+        op.execute(
+            f"CREATE TABLE {partition_name(start)} PARTITION OF checks "
+            f"FOR VALUES FROM ('{start.isoformat(' ')}') TO ('{end.isoformat(' ')}')"
+        )
+        start = end
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql" or not _is_partitioned(bind):
+        # upgrade ничего не менял: возвращать нечего
+        return
+
+    op.execute("ALTER TABLE checks RENAME TO checks_partitioned")
+    op.execute("CREATE TABLE checks (LIKE checks_partitioned INCLUDING DEFAULTS)")
+    op.execute("ALTER TABLE checks ALTER COLUMN checked_at DROP NOT NULL")
+    # Последовательность id переходит к новой таблице до удаления старой
+    op.execute("ALTER SEQUENCE checks_id_seq OWNED BY checks.id")
+    op.execute("INSERT INTO checks SELECT * FROM checks_partitioned")
+    # Вместе с секционированной таблицей удаляются все секции, её индексы и ключи
+    op.execute("DROP TABLE checks_partitioned")
+
+    op.execute("ALTER TABLE checks ADD PRIMARY KEY (id)")
+    op.execute("ALTER TABLE checks ADD FOREIGN KEY (site_id) REFERENCES sites (id)")
+    op.execute("CREATE INDEX ix_checks_id ON checks (id)")
+    op.execute("CREATE INDEX ix_checks_site_id_checked_at ON checks (site_id, checked_at)")
+    op.execute("CREATE INDEX ix_checks_checked_at ON checks (checked_at)")
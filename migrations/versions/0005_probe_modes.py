@@ -0,0 +1,28 @@
+"""per-site probe mode and bytes transferred per check
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("sites") as batch:
+        batch.add_column(
+            sa.Column("probe_mode", sa.String(16), nullable=False, server_default="get")
+        )
+    op.add_column("checks", sa.Column("bytes_transferred", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("checks", "bytes_transferred")
+    with op.batch_alter_table("sites") as batch:
+        batch.drop_column("probe_mode")
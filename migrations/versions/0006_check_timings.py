@@ -0,0 +1,22 @@
+"""per-phase timings of each check
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("checks", sa.Column("timings", sa.String(64), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("checks", "timings")
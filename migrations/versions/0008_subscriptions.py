@@ -0,0 +1,32 @@
+"""site owners and alert subscriptions
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("sites") as batch:
+        batch.add_column(sa.Column("owner_chat_id", sa.BigInteger(), nullable=True))
+    op.create_table(
+        "subscriptions",
+        sa.Column("site_id", sa.Integer(), sa.ForeignKey("sites.id"), primary_key=True),
+        sa.Column("chat_id", sa.BigInteger(), primary_key=True),
+        sa.Column("failure_threshold", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("subscriptions")
+    with op.batch_alter_table("sites") as batch:
+        batch.drop_column("owner_chat_id")
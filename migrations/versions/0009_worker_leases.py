@@ -0,0 +1,36 @@
+"""partition leases for sharded monitor workers
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "partition_leases",
+        sa.Column("partition", sa.Integer(), primary_key=True, autoincrement=False),
+        sa.Column("owner", sa.String(64), nullable=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=True),
+    )
+    op.create_table(
+        "monitor_workers",
+        sa.Column("id", sa.String(64), primary_key=True),
+        sa.Column("started_at", sa.DateTime(), nullable=False),
+        sa.Column("heartbeat_at", sa.DateTime(), nullable=False),
+    )
+    op.create_index("ix_monitor_workers_heartbeat_at", "monitor_workers", ["heartbeat_at"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_monitor_workers_heartbeat_at", table_name="monitor_workers")
+    op.drop_table("monitor_workers")
+    op.drop_table("partition_leases")
@@ -0,0 +1,28 @@
+"""per-site content assertions and their result per check
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("sites") as batch:
+        batch.add_column(sa.Column("assert_type", sa.String(16), nullable=True))
+        batch.add_column(sa.Column("assert_value", sa.String(512), nullable=True))
+    op.add_column("checks", sa.Column("content_ok", sa.Boolean(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("checks", "content_ok")
+    with op.batch_alter_table("sites") as batch:
+        batch.drop_column("assert_value")
+        batch.drop_column("assert_type")
@@ -0,0 +1,26 @@
+"""TLS certificate expiry and last alerted threshold per site
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table("sites") as batch:
+        batch.add_column(sa.Column("cert_not_after", sa.DateTime(), nullable=True))
+        batch.add_column(sa.Column("cert_alerted_days", sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table("sites") as batch:
+        batch.drop_column("cert_alerted_days")
+        batch.drop_column("cert_not_after")
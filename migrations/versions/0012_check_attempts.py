@@ -0,0 +1,24 @@
+"""retry attempts and failure class per check
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0012"
+down_revision = "0011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("checks", sa.Column("attempts", sa.Integer(), nullable=True))
+    op.add_column("checks", sa.Column("failure_class", sa.String(16), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("checks", "failure_class")
+    op.drop_column("checks", "attempts")
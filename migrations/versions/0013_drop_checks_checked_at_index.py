@@ -0,0 +1,27 @@
+"""drop the standalone index on checks.checked_at
+
+Запросы по сайту идут по составному индексу (site_id, checked_at),
+отдельный индекс по checked_at только замедлял вставку проверок.
+Очистка (`delete_checks_before`) удаляет пачками старейшие строки,
+которые лежат в начале таблицы, а секционированная таблица
+очищается удалением секций, поэтому индекс ей не нужен.
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-18
+"""
+from alembic import op
+
+
+revision = "0013"
+down_revision = "0012"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.drop_index("ix_checks_checked_at", table_name="checks")
+
+
+def downgrade() -> None:
+    op.create_index("ix_checks_checked_at", "checks", ["checked_at"])
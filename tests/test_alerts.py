@@ -0,0 +1,134 @@
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.db import crud
+from app.db.database import Base
+from app.services.alerts import DOWN, FLAPPING, UP, AlertTracker, format_alert
+from app.services.subscriptions import SubscriptionIndex
+
+
+def _tracker(sent, session_factory=None, notify=None, thresholds=None):
+    async def collect(site, event):
+        sent.append(format_alert(site.url, event))
+
+    return AlertTracker(
+        notify or collect,
+        session_factory,
+        failure_threshold=3,
+        flap_window=10,
+        flap_high=0.5,
+        flap_low=0.25,
+        flush_interval=10,
+        thresholds=thresholds,
+    )
+
+
+@pytest.mark.asyncio
+async def test_one_alert_per_outage():
+    """
+    Проверяет, что часовой простой даёт одно оповещение о падении
+    и одно о восстановлении с длительностью простоя.
+    """
+    sent = []
+    tracker = _tracker(sent)
+    site = SimpleNamespace(id=1, url="http://example.com")
+    start = datetime(2026, 1, 1, 12, 0)
+
+    await tracker.process(site, True, start)
+    for minute in range(1, 61):
+        await tracker.process(site, False, start + timedelta(minutes=minute))
+    assert tracker.state_of(1).state == DOWN
+    await tracker.process(site, True, start + timedelta(minutes=61))
+
+    assert len(sent) == 2
+    assert sent[0].startswith("[ALERT] http://example.com is down")
+    assert sent[1] == "[RECOVERED] http://example.com is up again, downtime 1h 0m 0s"
+    assert tracker.state_of(1).state == UP
+    assert tracker.stats()["suppressed"] == 57
+
+
+@pytest.mark.asyncio
+async def test_flapping_is_reported_once():
+    """
+    Проверяет, что частая смена результата даёт одно оповещение о «мигании»
+    и одно о стабилизации.
+    """
+    sent = []
+    tracker = _tracker(sent)
+    site = SimpleNamespace(id=1, url="http://example.com")
+    now = datetime(2026, 1, 1)
+
+    for i in range(40):
+        await tracker.process(site, i % 2 == 0, now)
+    assert tracker.state_of(1).state == FLAPPING
+    for _ in range(10):
+        await tracker.process(site, True, now)
+
+    assert [text.split()[0] for text in sent] == ["[FLAPPING]", "[RECOVERED]"]
+    assert tracker.state_of(1).state == UP
+
+
+@pytest.mark.asyncio
+async def test_state_survives_restart(tmp_path):
+    """
+    Проверяет, что после перезапуска уже отправленное оповещение не повторяется.
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/alerts.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_factory() as session:
+        site = await crud.create_site(session, "http://example.com", 60)
+
+    sent = []
+    tracker = _tracker(sent, session_factory)
+    for _ in range(3):
+        await tracker.process(site, False)
+    assert await tracker.flush() == 1
+
+    restarted = _tracker(sent, session_factory)
+    assert await restarted.load() == 1
+    await restarted.process(site, False)
+    await restarted.process(site, True)
+
+    assert [text.split()[0] for text in sent] == ["[ALERT]", "[RECOVERED]"]
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_subscribers_are_alerted_at_their_thresholds(tmp_path):
+    """
+    Проверяет рассылку по подпискам: каждый чат получает оповещение
+    о падении на своём пороге, а о восстановлении — только если получил о падении.
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/subs.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_factory() as session:
+        site = await crud.create_site(session, "http://example.com", 60, owner_chat_id=10)
+        await crud.subscribe(session, site.id, 10)
+        await crud.subscribe(session, site.id, 20, failure_threshold=5)
+        await crud.subscribe(session, site.id, 30, failure_threshold=100)
+
+    index = SubscriptionIndex(default_threshold=2)
+    assert await index.load(session_factory) == 3
+    assert index.thresholds(site.id) == (2, 5, 100)
+
+    received = []
+
+    async def route(site, event):
+        for chat_id, threshold in index.subscribers(site.id).items():
+            if event.concerns(threshold):
+                received.append((chat_id, event.kind))
+
+    tracker = _tracker([], notify=route, thresholds=index.thresholds)
+    for _ in range(6):
+        await tracker.process(site, False)
+    await tracker.process(site, True)
+
+    assert received == [(10, DOWN), (20, DOWN), (10, "recovered"), (20, "recovered")]
+    await engine.dispose()
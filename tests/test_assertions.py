@@ -0,0 +1,170 @@
+import asyncio
+import hashlib
+
+import pytest
+
+from app.services import assertions, monitor
+from app.services.assertions import BodyMatcher, validate_assertion
+from app.services.offload import CpuExecutor
+
+
+async def feed_all(matcher: BodyMatcher, chunks: list[bytes]) -> int:
+    """Скармливает куски, пока проверка не решена; возвращает число прочитанных кусков."""
+    for n, chunk in enumerate(chunks, 1):
+        if await matcher.feed(chunk):
+            return n
+    await matcher.finish()
+    return len(chunks)
+
+
+@pytest.mark.asyncio
+async def test_matcher_finds_text_across_chunks_and_stops_early():
+    """
+    Проверяет поиск строки на стыке кусков и ранний выход.
+    """
+    chunks = [b"a" * 100 + b"Wel", b"come home", b"b" * 100, b"c" * 100]
+
+    matcher = BodyMatcher("contains", "Welcome", max_bytes=10_000)
+    assert await feed_all(matcher, chunks) == 2
+    assert matcher.ok
+
+    matcher = BodyMatcher("not_contains", "Welcome", max_bytes=10_000)
+    assert await feed_all(matcher, chunks) == 2
+    assert not matcher.ok
+    assert "Welcome" in matcher.reason
+
+    matcher = BodyMatcher("contains", "Goodbye", max_bytes=10_000)
+    assert await feed_all(matcher, chunks) == 4
+    assert not matcher.ok
+
+
+@pytest.mark.asyncio
+async def test_matcher_regex_and_byte_limit():
+    """
+    Проверяет регулярные выражения и лимит прочитанного тела.
+    """
+    chunks = [b"x" * 50 + b"order #12", b"345 ok", b"y" * 50]
+    matcher = BodyMatcher("regex", r"#\d{5}\b", max_bytes=10_000)
+    assert await feed_all(matcher, chunks) == 2
+    assert matcher.ok
+
+    matcher = BodyMatcher("not_regex", r"(?i)fatal error", max_bytes=10_000)
+    await feed_all(matcher, chunks)
+    assert matcher.ok
+
+    # Текст после лимита не читается
+    matcher = BodyMatcher("contains", "needle", max_bytes=100)
+    assert await feed_all(matcher, [b"z" * 80, b"z" * 80 + b"needle", b"needle"]) == 2
+    assert not matcher.ok
+    assert matcher.seen == 100
+
+
+@pytest.mark.asyncio
+async def test_matcher_batches_regex_searches(monkeypatch):
+    """
+    Проверяет, что большое тело проверяется по regex пачками,
+    а не отдельным поиском в пуле на каждый кусок.
+    """
+    executor = CpuExecutor("thread", workers=1, max_pending=1, inline_below=16384)
+    executor.start()
+    monkeypatch.setattr(assertions, "cpu_executor", executor)
+    try:
+        chunks = [b"x" * 32768 for _ in range(10)] + [b"order #12345 ok"]
+        matcher = BodyMatcher("regex", r"#\d{5}\b", max_bytes=1_000_000)
+        assert await feed_all(matcher, chunks) == len(chunks)
+        assert matcher.ok
+        # Восемь кусков одной пачкой и остаток при завершении
+        assert executor.stats()["submitted"] == 2
+    finally:
+        await executor.stop()
+
+
+@pytest.mark.asyncio
+async def test_matcher_sha256():
+    """
+    Проверяет хэш всего тела и отказ при слишком длинном теле.
+    """
+    body = b"stable content " * 100
+    digest = hashlib.sha256(body).hexdigest()
+
+    matcher = BodyMatcher("sha256", digest.upper(), max_bytes=10_000)
+    await feed_all(matcher, [body[:700], body[700:]])
+    assert matcher.ok
+
+    matcher = BodyMatcher("sha256", digest, max_bytes=10_000)
+    await feed_all(matcher, [body + b"!"])
+    assert not matcher.ok
+
+    matcher = BodyMatcher("sha256", digest, max_bytes=1000)
+    assert await feed_all(matcher, [body[:700], body[700:]]) == 2
+    assert not matcher.ok
+
+
+def test_validate_assertion():
+    """
+    Проверяет проверку параметров /assert.
+    """
+    assert validate_assertion("contains", "ok") is None
+    assert validate_assertion("regex", r"\d+") is None
+    assert validate_assertion("sha256", "ab" * 32) is None
+    assert validate_assertion("regex", "(") is not None
+    assert validate_assertion("sha256", "abc") is not None
+    assert validate_assertion("equals", "x") is not None
+    assert validate_assertion("contains", "") is not None
+
+
+CHUNK = b"<p>filler</p>" * 5000
+
+
+async def _handle(reader, writer):
+    """Отдаёт chunked-страницу в 100 кусков с маркером в начале."""
+    await reader.readuntil(b"\r\n\r\n")
+    writer.write(b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\n")
+    for n in range(100):
+        data = (b"<h1>Status: OK</h1>" if n == 0 else b"") + CHUNK
+        writer.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        try:
+            await writer.drain()
+        except ConnectionError:
+            break
+        await asyncio.sleep(0)
+    else:
+        writer.write(b"0\r\n\r\n")
+    writer.close()
+
+
+@pytest.mark.asyncio
+async def test_check_site_streams_body(monkeypatch):
+    """
+    Проверяет, что check_site прекращает скачивание, как только проверка решена,
+    и помечает сайт недоступным при проваленной проверке.
+    """
+    saved = []
+
+    async def fake_save_check(session, site, status, elapsed, is_available, **fields):
+        saved.append((is_available, fields["content_ok"]))
+
+    monkeypatch.setattr(monitor, "save_check", fake_save_check)
+
+    class AssertSite:
+        def __init__(self, id, url, assert_type, assert_value):
+            self.id = id
+            self.url = url
+            self.assert_type = assert_type
+            self.assert_value = assert_value
+
+    server = await asyncio.start_server(_handle, "127.0.0.1", 0)
+    url = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/"
+    total = 100 * len(CHUNK)
+    try:
+        result = await monitor.check_site(None, AssertSite(1, url, "contains", "Status: OK"))
+        assert result["is_available"] and result["content_ok"]
+        assert result["bytes_transferred"] < total / 10
+
+        result = await monitor.check_site(None, AssertSite(2, url, "not_contains", "Status: OK"))
+        assert not result["is_available"] and result["content_ok"] is False
+        assert saved == [(True, True), (False, False)]
+    finally:
+        await monitor.http.aclose()
+        server.close()
+        await server.wait_closed()
@@ -0,0 +1,155 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.services.dns import CachingNetworkBackend, DnsCache
+from app.services.http_client import PhaseTimer, SharedHttpClient, unpack_timings, use_network_backend
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _counting_cache(clock, max_size=10, ttl=60, delay=0.0):
+    """Кэш с подменённым резолвером, считающим обращения."""
+    cache = DnsCache(max_size=max_size, default_ttl=ttl, clock=clock)
+    calls = []
+
+    async def lookup(host):
+        calls.append(host)
+        await asyncio.sleep(delay)
+        return [f"10.0.0.{len(calls)}"], ttl
+
+    cache._lookup = lookup
+    return cache, calls
+
+
+@pytest.mark.asyncio
+async def test_ttl_and_lru():
+    """
+    Проверяет, что запись живёт TTL, а при переполнении вытесняется самая старая.
+    """
+    clock = _Clock()
+    cache, calls = _counting_cache(clock, max_size=2, ttl=60)
+
+    assert await cache.resolve("a.example") == ["10.0.0.1"]
+    assert await cache.resolve("a.example") == ["10.0.0.1"]
+    assert calls == ["a.example"]
+
+    clock.now = 61
+    assert await cache.resolve("a.example") == ["10.0.0.2"]
+
+    await cache.resolve("b.example")
+    await cache.resolve("a.example")  # a становится самым свежим
+    await cache.resolve("c.example")  # вытесняет b
+    assert len(cache) == 2
+    await cache.resolve("b.example")
+    assert calls == ["a.example", "a.example", "b.example", "c.example", "b.example"]
+    assert cache.stats()["hits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_concurrent_lookups_are_coalesced():
+    """
+    Проверяет, что одновременные запросы одного имени идут в резолвер один раз.
+    """
+    cache, calls = _counting_cache(_Clock(), delay=0.05)
+
+    results = await asyncio.gather(*(cache.resolve("cdn.example") for _ in range(20)))
+
+    assert calls == ["cdn.example"]
+    assert all(r == ["10.0.0.1"] for r in results)
+    assert cache.stats()["coalesced"] == 19
+
+
+async def _handle(reader, writer):
+    try:
+        await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError:
+        pass
+    else:
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\nConnection: close\r\n\r\nok")
+        await writer.drain()
+    writer.close()
+
+
+@pytest.mark.asyncio
+async def test_client_measures_dns_separately():
+    """
+    Проверяет, что клиент с кэшем DNS меряет фазу dns отдельно
+    и не разрешает имя повторно для нового соединения.
+    """
+    server = await asyncio.start_server(_handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+
+    cache = DnsCache(max_size=10, default_ttl=60)
+    http = SharedHttpClient(
+        timeout=5, max_connections=10, max_keepalive=10, keepalive_expiry=30,
+        resolver=cache,
+    )
+    try:
+        for _ in range(3):
+            timer = PhaseTimer()
+            response, _ = await http.fetch("GET", f"http://localhost:{port}/", timer=timer)
+            assert response.status_code == 200
+            assert {"dns", "connect"} <= set(unpack_timings(timer.pack()))
+    finally:
+        await http.aclose()
+        server.close()
+
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["hits"] == 2
+
+
+def test_network_backend_is_installed_into_httpx_transport():
+    """
+    Проверяет, что кэш DNS встаёт в пул httpcore текущей версии httpx.
+    Тест упадёт, если httpx переименует закрытые атрибуты транспорта.
+    """
+    backend = CachingNetworkBackend(DnsCache(max_size=10, default_ttl=60))
+    transport = httpx.AsyncHTTPTransport()
+    assert use_network_backend(transport, backend)
+    assert transport._pool._network_backend is backend
+
+    # Без атрибута транспорт не трогается
+    assert not use_network_backend(object(), backend)
+
+
+@pytest.mark.asyncio
+async def test_lookup_uses_record_ttls_for_a_and_aaaa():
+    """
+    Проверяет, что TTL берётся из записей A и AAAA, а хост только
+    с IPv6-адресами разрешается без системного резолвера.
+    """
+    aiodns = pytest.importorskip("aiodns")
+
+    class Record:
+        def __init__(self, host, ttl):
+            self.host = host
+            self.ttl = ttl
+
+    zone = {
+        ("dual.example", "A"): [Record("192.0.2.1", 120)],
+        ("dual.example", "AAAA"): [Record("2001:db8::1", 30)],
+        ("v6.example", "AAAA"): [Record("2001:db8::2", 90)],
+    }
+
+    class FakeResolver:
+        async def query(self, host, qtype):
+            if (host, qtype) not in zone:
+                raise aiodns.error.DNSError(4, "Domain name not found")
+            return zone[host, qtype]
+
+    cache = DnsCache(max_size=10, default_ttl=300)
+    cache._resolver = FakeResolver()
+
+    assert await cache._lookup("dual.example") == (["192.0.2.1", "2001:db8::1"], 30)
+    assert await cache._lookup("v6.example") == (["2001:db8::2"], 90)
+    # TTL ограничен сверху DNS_CACHE_TTL
+    cache.default_ttl = 60
+    assert await cache._lookup("v6.example") == (["2001:db8::2"], 60)
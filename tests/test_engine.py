@@ -0,0 +1,160 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services.engine import CheckEngine
+
+
+class DummySite:
+    """Простой объект-сайт для теста."""
+
+    def __init__(self, id, url):
+        self.id = id
+        self.url = url
+
+
+@pytest.mark.asyncio
+async def test_run_round_respects_limits():
+    """
+    Проверяет, что раунд не превышает общий лимит и лимит на хост.
+    """
+    active_total = 0
+    active_hosts: dict[str, int] = {}
+    peaks = {"total": 0, "host": 0}
+
+    async def fake_check(site):
+        nonlocal active_total
+        host = site.url.split("/")[2]
+        active_total += 1
+        active_hosts[host] = active_hosts.get(host, 0) + 1
+        peaks["total"] = max(peaks["total"], active_total)
+        peaks["host"] = max(peaks["host"], active_hosts[host])
+        await asyncio.sleep(0.01)
+        active_total -= 1
+        active_hosts[host] -= 1
+        return site.id
+
+    engine = CheckEngine(fake_check, concurrency=5, per_host=2, queue_size=3)
+    sites = [DummySite(i, f"http://host{i % 3}.test/{i}") for i in range(30)]
+
+    stats = await engine.run_round(sites)
+    await engine.stop()
+
+    assert stats.sites == 30
+    assert stats.failed == 0
+    assert stats.max_queue_depth <= 3
+    assert peaks["total"] <= 5
+    assert peaks["host"] <= 2
+    assert engine.checks_done == 30
+
+
+@pytest.mark.asyncio
+async def test_check_returns_result_and_error():
+    """
+    Проверяет получение результата и проброс исключения из проверки.
+    """
+    async def fake_check(site):
+        if site.id == 2:
+            raise RuntimeError("boom")
+        return site.id * 10
+
+    engine = CheckEngine(fake_check, concurrency=2, per_host=1, queue_size=10)
+
+    assert await engine.check(DummySite(1, "http://a.test")) == 10
+    with pytest.raises(RuntimeError):
+        await engine.check(DummySite(2, "http://a.test"))
+
+    await engine.stop()
+    assert engine.stats()["checks_failed"] == 1
+
+
+@pytest.mark.asyncio
+async def test_busy_host_does_not_block_other_hosts():
+    """
+    Проверяет, что сайты занятого хоста откладываются, а не держат воркеры:
+    сайт другого хоста проверяется сразу, хотя перед ним в очереди
+    много сайтов одного хоста.
+    """
+    started: dict[int, float] = {}
+    loop = asyncio.get_running_loop()
+
+    async def fake_check(site):
+        started[site.id] = loop.time()
+        await asyncio.sleep(0.05)
+        return site.id
+
+    engine = CheckEngine(fake_check, concurrency=4, per_host=1, queue_size=100)
+    sites = [DummySite(i, f"http://busy.test/{i}") for i in range(8)]
+    sites.append(DummySite(100, "http://other.test/"))
+
+    begin = loop.time()
+    stats = await engine.run_round(sites)
+    await engine.stop()
+
+    assert stats.failed == 0
+    assert started[100] - begin < 0.04
+    assert engine.deferred == 7
+    # Сайты занятого хоста проверяются по одному
+    busy = sorted(started[i] for i in range(8))
+    assert all(b - a >= 0.04 for a, b in zip(busy, busy[1:]))
+    assert engine.waiting == 0 and not engine._hosts
+
+
+@pytest.mark.asyncio
+async def test_lag_includes_queue_time():
+    """
+    Проверяет, что задержка запуска меряется перед проверкой
+    и включает время ожидания в очереди движка.
+    """
+    lags = []
+
+    async def fake_check(site):
+        await asyncio.sleep(0.05)
+
+    engine = CheckEngine(fake_check, concurrency=1, per_host=1, queue_size=10, lag_observer=lags.append)
+    due = time.monotonic()
+    await engine.submit(DummySite(1, "http://a.test"), due)
+    await engine.submit(DummySite(2, "http://b.test"), due)
+    await engine.submit(DummySite(3, "http://c.test"))
+    await asyncio.sleep(0.15)
+    await engine.stop()
+
+    assert len(lags) == 2
+    assert lags[0] < 0.04
+    # Второй сайт ждал в очереди, пока единственный воркер проверял первый
+    assert lags[1] >= 0.05
+
+
+@pytest.mark.asyncio
+async def test_deferred_sites_count_against_queue_size():
+    """
+    Проверяет, что сайты, отложенные у занятого хоста, занимают места
+    очереди: `submit` ждёт, и глубина не превышает queue_size.
+    """
+    release = asyncio.Event()
+    depths = []
+
+    async def fake_check(site):
+        depths.append(engine.queue_depth)
+        await release.wait()
+
+    engine = CheckEngine(fake_check, concurrency=4, per_host=1, queue_size=3)
+    for i in range(4):
+        await engine.submit(DummySite(i, f"http://cdn.test/{i}"))
+    await asyncio.sleep(0.01)
+    # Одна проверка идёт, три сайта ждут хост и занимают всю очередь
+    assert (engine.in_flight, engine.waiting, engine.queue_depth) == (1, 3, 3)
+
+    blocked = asyncio.create_task(engine.submit(DummySite(10, "http://other.test/")))
+    await asyncio.sleep(0.01)
+    assert not blocked.done()
+
+    release.set()
+    await asyncio.wait_for(blocked, 1)
+    await asyncio.sleep(0.05)
+    await engine.stop()
+
+    assert engine.checks_done == 5
+    assert engine.max_queue_depth <= 3
+    assert max(depths) <= 3
@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from app.services.http_client import PhaseTimer, SharedHttpClient, unpack_timings
+
+
+async def _handle(reader, writer):
+    """Минимальный HTTP/1.1 сервер с keep-alive."""
+    while True:
+        try:
+            await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            break
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+        await writer.drain()
+    writer.close()
+
+
+@pytest.mark.asyncio
+async def test_connections_are_reused():
+    """
+    Проверяет, что последовательные запросы идут по одному соединению.
+    """
+    server = await asyncio.start_server(_handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+
+    http = SharedHttpClient(
+        timeout=5, max_connections=10, max_keepalive=10, keepalive_expiry=30
+    )
+    try:
+        for _ in range(5):
+            response, size = await http.fetch("GET", f"http://127.0.0.1:{port}/")
+            assert response.status_code == 200
+            assert size > len(b"ok")
+    finally:
+        await http.aclose()
+        server.close()
+
+    stats = http.stats()
+    assert stats["requests"] == 5
+    assert stats["new_connections"] == 1
+    assert stats["reused_connections"] == 4
+
+
+@pytest.mark.asyncio
+async def test_phase_timer_breakdown():
+    """
+    Проверяет разбивку запроса на фазы: соединение меряется только
+    у первого запроса, TTFB и передача тела — у каждого.
+    """
+    server = await asyncio.start_server(_handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+
+    http = SharedHttpClient(
+        timeout=5, max_connections=10, max_keepalive=10, keepalive_expiry=30
+    )
+    try:
+        first, second = PhaseTimer(), PhaseTimer()
+        await http.fetch("GET", f"http://127.0.0.1:{port}/", timer=first)
+        await http.fetch("GET", f"http://127.0.0.1:{port}/", timer=second)
+    finally:
+        await http.aclose()
+        server.close()
+
+    phases = unpack_timings(first.pack())
+    assert {"connect", "ttfb", "transfer"} <= set(phases)
+    assert "tls" not in phases
+    assert "connect" not in unpack_timings(second.pack())
+    # Трассировка не ломает учёт соединений клиента
+    assert http.stats()["new_connections"] == 1
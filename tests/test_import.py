@@ -0,0 +1,112 @@
+import json
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db import crud
+from app.db.database import Base
+from app.services.importer import (
+    ImportFormatError,
+    detect_format,
+    export_sites,
+    import_sites,
+    iter_json_records,
+)
+
+
+async def chunked(data: bytes, size: int = 7):
+    """
+    Отдаёт байты мелкими кусками, чтобы записи и символы UTF-8 резались на стыках.
+    """
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+@pytest.mark.asyncio
+async def test_json_array_is_read_incrementally():
+    """
+    Проверяет разбор JSON-массива кусками и ошибку на обрезанном файле.
+    """
+    data = json.dumps(
+        ["a.example.com", {"url": "http://б.example.com", "interval": 30}, 12345], ensure_ascii=False
+    ).encode()
+    records = [r async for r in iter_json_records(chunked(data, 3))]
+    assert records == [
+        (1, "a.example.com"), (2, {"url": "http://б.example.com", "interval": 30}), (3, 12345),
+    ]
+
+    with pytest.raises(ImportFormatError):
+        [r async for r in iter_json_records(chunked(data[:-10]))]
+    with pytest.raises(ImportFormatError):
+        [r async for r in iter_json_records(chunked(b'{"url": "x"}'))]
+
+    assert detect_format("sites.CSV") == "csv"
+    assert detect_format("sites.ndjson") == "jsonl"
+    assert detect_format("sites.txt") is None
+
+
+@pytest.mark.asyncio
+async def test_import_upserts_in_batches_and_exports(tmp_path):
+    """
+    Проверяет импорт CSV пачками, обновление при повторном импорте
+    и выгрузку, которую можно загрузить обратно.
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/import.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with session_factory() as session:
+        existing = await crud.create_site(session, "http://old.example.com", 60)
+        await crud.set_probe_mode(session, existing.id, "head")
+
+    csv_data = (
+        "url,interval,probe_mode\n"
+        "old.example.com,15\n"
+        "new1.example.com,30,stream\n"
+        "new2.example.com\n"
+        ",30\n"
+        "new3.example.com,-5\n"
+        "new1.example.com,45\n"
+        "new4.example.com,20,ping\n"
+    ).encode()
+    batches = []
+    added = []
+    report = await import_sites(
+        chunked(csv_data), "csv", session_factory, owner_chat_id=42, batch_size=2,
+        on_batch=lambda sites, new: (
+            batches.append(sorted(s.url for s in sites)), added.extend(s.url for s in new)
+        ),
+    )
+    assert (report.total, report.imported, report.added) == (7, 3, 2)
+    assert (report.duplicates, report.invalid) == (1, 3)
+    assert report.errors[0].startswith("#5:")
+    assert batches[0] == ["http://new1.example.com", "http://old.example.com"]
+    assert sorted(added) == ["http://new1.example.com", "http://new2.example.com"]
+
+    async with session_factory() as session:
+        sites = {s.url: s for s in await crud.list_sites(session)}
+    # Изменились только заданные в файле поля
+    assert sites["http://old.example.com"].interval == 15
+    assert sites["http://old.example.com"].probe_mode == "head"
+    assert sites["http://old.example.com"].owner_chat_id is None
+    assert sites["http://new1.example.com"].interval == 45
+    assert sites["http://new1.example.com"].probe_mode == "stream"
+    assert sites["http://new2.example.com"].owner_chat_id == 42
+
+    # Импортировавший чат подписан только на новые сайты
+    async with session_factory() as session:
+        subscribed = {s.site_id for s in await crud.list_subscriptions(session) if s.chat_id == 42}
+    assert subscribed == {sites["http://new1.example.com"].id, sites["http://new2.example.com"].id}
+
+    exported = await export_sites(session_factory, "json")
+    assert len(json.loads(exported)) == 3
+    report = await import_sites(chunked(exported), "json", session_factory)
+    assert (report.imported, report.added, report.invalid) == (3, 0, 0)
+
+    exported = await export_sites(session_factory, "csv")
+    assert exported.decode().splitlines()[0] == "url,interval,probe_mode"
+    report = await import_sites(chunked(exported), "csv", session_factory)
+    assert (report.imported, report.added) == (3, 0)
+
+    await engine.dispose()
@@ -0,0 +1,57 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.db.database import Base
+from app.services.leases import LeaseManager
+
+
+class _Clock:
+    def __init__(self):
+        self.now = datetime(2026, 1, 1)
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_partitions_rebalance_between_workers(tmp_path):
+    """
+    Проверяет, что секции делятся между живыми воркерами без пересечений,
+    а после смерти воркера переходят к оставшимся.
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/leases.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    clock = _Clock()
+
+    changes = []
+
+    async def on_change(owned):
+        changes.append(owned)
+
+    a = LeaseManager("a", 16, 30, session_factory, on_change, clock=clock)
+    b = LeaseManager("b", 16, 30, session_factory, clock=clock)
+
+    await a.start()
+    assert len(a.owned) == 16
+    await b.start()  # b зарегистрировался, но всё занято
+    assert len(b.owned) == 0
+
+    clock.now += timedelta(seconds=10)
+    await a.tick()  # a отдаёт лишнее
+    await b.tick()  # b забирает свою долю
+    assert len(a.owned) == len(b.owned) == 8
+    assert not a.owned & b.owned
+    assert changes[-1] == a.owned
+    assert a.owns(next(iter(a.owned)) + 16) and not b.owns(next(iter(a.owned)))
+
+    # a перестаёт продлевать аренды: через TTL его секции достаются b
+    clock.now += timedelta(seconds=31)
+    await b.tick()
+    assert len(b.owned) == 16
+
+    await b.stop()
+    await engine.dispose()
@@ -0,0 +1,80 @@
+import asyncio
+import socket
+
+import httpx
+import pytest
+
+from app.core.metrics import (
+    Registry,
+    start_metrics_server,
+    stop_metrics_server,
+)
+
+
+def test_registry_renders_prometheus_text():
+    """
+    Проверяет текстовый формат счётчиков, гистограмм и метрик-функций.
+    """
+    registry = Registry()
+    checks = registry.counter("checks_total", "Checks", ("site_id", "outcome"))
+    latency = registry.histogram("latency_seconds", "Latency", ("outcome",), buckets=(0.1, 1.0))
+    depth = [3]
+    registry.gauge_func("queue_depth", "Queue depth", lambda: depth[0])
+    registry.gauge_func("broken", "Broken", lambda: 1 / 0)
+
+    checks.inc(1, "up")
+    checks.inc(1, "up")
+    checks.inc(2, 'do"wn')
+    for value in (0.05, 0.5, 0.5, 3.0):
+        latency.observe(value, "up")
+    depth[0] = 7
+
+    lines = registry.render().splitlines()
+    assert "# TYPE checks_total counter" in lines
+    assert 'checks_total{site_id="1",outcome="up"} 2' in lines
+    assert 'checks_total{site_id="2",outcome="do\\"wn"} 1' in lines
+    assert "# TYPE latency_seconds histogram" in lines
+    assert 'latency_seconds_bucket{outcome="up",le="0.1"} 1' in lines
+    assert 'latency_seconds_bucket{outcome="up",le="1"} 3' in lines
+    assert 'latency_seconds_bucket{outcome="up",le="+Inf"} 4' in lines
+    assert 'latency_seconds_sum{outcome="up"} 4.05' in lines
+    assert 'latency_seconds_count{outcome="up"} 4' in lines
+    assert "queue_depth 7" in lines
+    # Ошибка одной метрики не ломает вывод остальных
+    assert any(line.startswith("# broken failed") for line in lines)
+
+    checks.remove(1, "up")
+    assert checks.value(1, "up") == 0
+    assert 'checks_total{site_id="1",outcome="up"} 2' not in registry.render()
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_serves_registry():
+    """
+    Проверяет, что эндпоинт отдаёт метрики процесса и пропускает занятый порт.
+    """
+    pytest.importorskip("uvicorn")
+    busy = socket.socket()
+    busy.bind(("127.0.0.1", 0))
+    busy.listen()
+    port = busy.getsockname()[1]
+
+    started = await start_metrics_server("127.0.0.1", port, attempts=20)
+    try:
+        assert started is not None and started != port
+        async with httpx.AsyncClient() as client:
+            for _ in range(50):
+                try:
+                    response = await client.get(f"http://127.0.0.1:{started}/metrics")
+                    break
+                except httpx.ConnectError:
+                    await asyncio.sleep(0.02)
+            assert response.status_code == 200
+            assert "# TYPE site_checks_total counter" in response.text
+            assert "# TYPE event_loop_lag_seconds histogram" in response.text
+
+            missing = await client.get(f"http://127.0.0.1:{started}/other")
+            assert missing.status_code == 404
+    finally:
+        await stop_metrics_server()
+        busy.close()
@@ -0,0 +1,45 @@
+import pytest
+from sqlalchemy import inspect
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.database import Base
+from app.db.migrate import upgrade_db
+
+
+def schema(connection):
+    inspector = inspect(connection)
+    return {
+        table: {
+            "columns": {c["name"] for c in inspector.get_columns(table)},
+            "indexes": {i["name"] for i in inspector.get_indexes(table)},
+        }
+        for table in inspector.get_table_names()
+        if table != "alembic_version"
+    }
+
+
+@pytest.mark.asyncio
+async def test_migrations_match_models(tmp_path):
+    """
+    Проверяет, что миграции дают ту же схему, что и модели.
+    """
+    migrated = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/migrated.db")
+    await upgrade_db(migrated)
+    # Повторный запуск ничего не меняет
+    await upgrade_db(migrated)
+
+    created = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/created.db")
+    async with created.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    async with migrated.connect() as conn:
+        migrated_schema = await conn.run_sync(schema)
+    async with created.connect() as conn:
+        created_schema = await conn.run_sync(schema)
+
+    assert migrated_schema == created_schema
+    assert "ix_checks_site_id_checked_at" in migrated_schema["checks"]["indexes"]
+    assert "ix_checks_checked_at" not in migrated_schema["checks"]["indexes"]
+
+    await migrated.dispose()
+    await created.dispose()
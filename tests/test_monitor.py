@@ -1,4 +1,7 @@
+import asyncio
+
 import pytest
+from app.services import monitor
 from app.services.monitor import check_site
 
 
@@ -36,3 +39,61 @@ async def test_check_site_down(monkeypatch):
     assert res is not None
     assert isinstance(res, dict)
     assert res["is_available"] in (True, False)
+
+
+BODY = b"x" * 10000
+
+
+async def _handle(reader, writer):
+    """HTTP/1.1 сервер с ETag и без поддержки HEAD на /nohead."""
+    while True:
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            break
+        method, path, _ = head.split(b"\r\n")[0].split(b" ")
+        if method == b"HEAD" and path == b"/nohead":
+            writer.write(b"HTTP/1.1 405 Method Not Allowed\r\nContent-Length: 0\r\n\r\n")
+        elif b'if-none-match: "abc"' in head.lower():
+            writer.write(b'HTTP/1.1 304 Not Modified\r\nETag: "abc"\r\n\r\n')
+        else:
+            writer.write(
+                b'HTTP/1.1 200 OK\r\nETag: "abc"\r\nContent-Length: '
+                + str(len(BODY)).encode() + b"\r\n\r\n"
+                + (b"" if method == b"HEAD" else BODY)
+            )
+        await writer.drain()
+    writer.close()
+
+
+@pytest.mark.asyncio
+async def test_probe_modes_cut_bytes():
+    """
+    Проверяет способы проверки: HEAD, HEAD с откатом на GET и условный GET.
+    """
+    server = await asyncio.start_server(_handle, "127.0.0.1", 0)
+    base = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}"
+
+    class ProbeSite(DummySite):
+        def __init__(self, id, url, probe_mode):
+            super().__init__(id, url)
+            self.probe_mode = probe_mode
+
+    try:
+        response, full = await monitor.probe_site(ProbeSite(1, base + "/", "get"))
+        assert response.status_code == 200 and full > len(BODY)
+
+        response, received = await monitor.probe_site(ProbeSite(2, base + "/", "head"))
+        assert response.status_code == 200 and received < len(BODY)
+
+        response, received = await monitor.probe_site(ProbeSite(3, base + "/nohead", "head"))
+        assert response.status_code == 200 and received < len(BODY)
+
+        site = ProbeSite(4, base + "/", "conditional")
+        response, received = await monitor.probe_site(site)
+        assert response.status_code == 200 and received == full
+        response, received = await monitor.probe_site(site)
+        assert response.status_code == 304 and received < len(BODY)
+    finally:
+        await monitor.http.aclose()
+        server.close()
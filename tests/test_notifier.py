@@ -0,0 +1,82 @@
+import asyncio
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from app.services.notifier import NotificationQueue, TokenBucket
+
+
+def _queue(send, **kwargs):
+    params = dict(
+        global_rate=100, chat_rate=100, chat_burst=1, digest_delay=0.05, max_pending=1000
+    )
+    params.update(kwargs)
+    return NotificationQueue(send, **params)
+
+
+def test_token_bucket():
+    """
+    Проверяет всплеск, пополнение и паузу ведра токенов.
+    """
+    now = [0.0]
+    bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0])
+    bucket.consume()
+    bucket.consume()
+    assert bucket.delay() == pytest.approx(0.5)
+    now[0] = 0.5
+    assert bucket.delay() == 0
+    bucket.pause(3)
+    assert bucket.delay() == pytest.approx(3.5)
+
+
+@pytest.mark.asyncio
+async def test_simultaneous_alerts_become_one_digest():
+    """
+    Проверяет, что одновременные уведомления в один чат уходят одним сообщением,
+    а в разные чаты — отдельными.
+    """
+    sent = []
+
+    async def send(chat_id, text):
+        sent.append((chat_id, text))
+
+    queue = _queue(send)
+    queue.start()
+    for i in range(50):
+        assert queue.enqueue(1, f"[ALERT] site {i} is down")
+    queue.enqueue(2, "[ALERT] other is down")
+    await queue.stop()
+
+    assert sorted(chat for chat, _ in sent) == [1, 2]
+    digest = dict(sent)[1]
+    assert digest.startswith("50 notifications:")
+    assert "site 49" in digest
+    assert queue.stats()["delivered"] == 51
+
+
+@pytest.mark.asyncio
+async def test_retry_after_is_honoured():
+    """
+    Проверяет, что после 429 сообщение отправляется повторно не раньше retry_after.
+    """
+    calls = []
+
+    async def send(chat_id, text):
+        calls.append(asyncio.get_running_loop().time())
+        if len(calls) == 1:
+            raise TelegramRetryAfter(
+                method=SendMessage(chat_id=chat_id, text=text),
+                message="Too Many Requests",
+                retry_after=1,
+            )
+
+    queue = _queue(send)
+    queue.start()
+    queue.enqueue(1, "[ALERT] site is down")
+    await queue.stop(timeout=5)
+
+    assert len(calls) == 2
+    assert calls[1] - calls[0] >= 0.9
+    assert queue.stats()["rate_limited"] == 1
+    assert queue.stats()["delivered"] == 1
@@ -0,0 +1,130 @@
+import asyncio
+import hashlib
+import re
+import threading
+
+import pytest
+
+from app.services.offload import CpuExecutor, LoopLagMonitor
+
+
+def digest(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+@pytest.mark.asyncio
+async def test_executor_offloads_and_bounds_pending_work():
+    """
+    Проверяет, что работа уходит в пул, маленькая выполняется на месте,
+    а задач в пуле не больше max_pending.
+    """
+    release = threading.Event()
+    active = 0
+    peak = 0
+    lock = threading.Lock()
+
+    def slow(value: int) -> int:
+        nonlocal active, peak
+        with lock:
+            active += 1
+            peak = max(peak, active)
+        release.wait(5)
+        with lock:
+            active -= 1
+        return value * 2
+
+    executor = CpuExecutor("thread", workers=4, max_pending=2, inline_below=100)
+    executor.start()
+    try:
+        tasks = [asyncio.create_task(executor.run(slow, i, size=1000)) for i in range(5)]
+        await asyncio.sleep(0.05)
+        # Две задачи в пуле, остальные ждут места, цикл событий свободен
+        assert executor.stats()["waiting"] == 3
+        release.set()
+        assert await asyncio.gather(*tasks) == [0, 2, 4, 6, 8]
+        assert peak == 2
+
+        assert await executor.run(digest, b"abc", size=3) == digest(b"abc")
+        stats = executor.stats()
+        assert stats["submitted"] == 5
+        assert stats["inline"] == 1
+        assert stats["waiting"] == 0
+    finally:
+        await executor.stop()
+
+
+@pytest.mark.asyncio
+async def test_executor_propagates_errors_and_inline_mode():
+    """
+    Проверяет проброс исключений из пула и режим без пула.
+    """
+    executor = CpuExecutor("thread", workers=1, max_pending=1)
+    executor.start()
+    try:
+        with pytest.raises(ValueError):
+            await executor.run(int, "not a number")
+        # Место в пуле освобождается и после ошибки
+        assert await executor.run(int, "42") == 42
+    finally:
+        await executor.stop()
+
+    inline = CpuExecutor("inline", workers=1, max_pending=1)
+    inline.start()
+    assert not inline.running
+    assert await inline.run(digest, b"x") == digest(b"x")
+
+    with pytest.raises(ValueError):
+        CpuExecutor("gpu", workers=1, max_pending=1)
+
+
+def test_loop_lag_stats():
+    """
+    Проверяет учёт задержек цикла событий.
+    """
+    lag = LoopLagMonitor(interval=0.5, warn_after=0.1, window=100)
+    for value in [0.001] * 98 + [0.05, 0.3]:
+        lag.record(value)
+    lag.record(-0.001)  # часы могут вернуть чуть меньше интервала
+
+    stats = lag.stats()
+    assert stats["last"] == 0.0
+    assert stats["max"] == 0.3
+    assert stats["slow"] == 1
+    assert stats["p99"] == 0.3
+    assert stats["avg"] == pytest.approx((0.001 * 97 + 0.05 + 0.3) / 100)
+
+
+@pytest.mark.asyncio
+async def test_loop_lag_sees_blocking_code():
+    """
+    Проверяет, что монитор замечает код, блокирующий цикл событий.
+    """
+    lag = LoopLagMonitor(interval=0.01, warn_after=10)
+    lag.start()
+    await asyncio.sleep(0.03)
+    threading.Event().wait(0.1)  # блокируем цикл
+    await asyncio.sleep(0.03)
+    await lag.stop()
+    assert lag.stats()["max"] >= 0.08
+
+
+def catastrophic(data: bytes) -> bool:
+    # Экспоненциальный перебор с возвратами: на длинной строке не закончится
+    return re.search(rb"(a+)+$", data) is not None
+
+
+@pytest.mark.asyncio
+async def test_process_pool_restarts_after_timeout():
+    """
+    Проверяет, что зависшая задача прерывается по таймауту,
+    а пул процессов после перезапуска продолжает работать.
+    """
+    executor = CpuExecutor("process", workers=1, max_pending=2)
+    executor.start()
+    try:
+        with pytest.raises(TimeoutError):
+            await executor.run(catastrophic, b"a" * 64 + b"!", timeout=0.5)
+        assert executor.stats()["timeouts"] == 1
+        assert await executor.run(digest, b"data", timeout=30) == digest(b"data")
+    finally:
+        await executor.stop()
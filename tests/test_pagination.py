@@ -0,0 +1,81 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.bot.keyboards import history_page_kb, parse_page_callback, sites_page_kb
+from app.bot.utils import decode_check_cursor, encode_check_cursor
+from app.db import crud
+from app.db.database import Base
+
+
+@pytest.mark.asyncio
+async def test_keyset_pages_of_sites_and_checks(tmp_path):
+    """
+    Проверяет листание сайтов и проверок вперёд и назад по курсорам.
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/pages.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with session_factory() as session:
+        for i in range(7):
+            await crud.create_site(session, f"http://site{i}.example.com", 60)
+
+        first, more = await crud.list_sites_page(session, 3)
+        assert [s.id for s in first] == [1, 2, 3] and more
+        second, more = await crud.list_sites_page(session, 3, after_id=3)
+        assert [s.id for s in second] == [4, 5, 6] and more
+        last, more = await crud.list_sites_page(session, 3, after_id=6)
+        assert [s.id for s in last] == [7] and not more
+        back, more = await crud.list_sites_page(session, 3, before_id=4)
+        assert [s.id for s in back] == [1, 2, 3] and not more
+
+        # Несколько проверок с одинаковым временем: порядок задаёт id
+        start = datetime(2024, 1, 1, 12, 0)
+        rows = [
+            {"site_id": 1, "status_code": 200, "response_time": 0.1,
+             "is_available": True, "checked_at": start + timedelta(minutes=i // 2)}
+            for i in range(5)
+        ]
+        await crud.create_checks(session, rows)
+
+        newest, more = await crud.checks_page(session, 1, 2)
+        assert [c.id for c in newest] == [5, 4] and more
+        older, more = await crud.checks_page(
+            session, 1, 2, before=(newest[-1].checked_at, newest[-1].id)
+        )
+        assert [c.id for c in older] == [3, 2] and more
+        oldest, more = await crud.checks_page(
+            session, 1, 2, before=(older[-1].checked_at, older[-1].id)
+        )
+        assert [c.id for c in oldest] == [1] and not more
+        newer, more = await crud.checks_page(
+            session, 1, 2, after=(older[0].checked_at, older[0].id)
+        )
+        assert [c.id for c in newer] == [5, 4] and not more
+
+    await engine.dispose()
+
+
+def test_page_keyboards_fit_callback_limit():
+    """
+    Проверяет кнопки листания и длину callback_data (не больше 64 байт).
+    """
+    kb = sites_page_kb([11, 12, 13], prev_cursor=None, next_cursor="13")
+    rows = kb.inline_keyboard
+    assert [b.callback_data for b in rows[0]] == ["del:11", "del:12"]
+    assert [b.callback_data for b in rows[-1]] == ["sites:n:13"]
+
+    checked_at = datetime(2024, 12, 31, 23, 59, 59, 999999)
+    cursor = encode_check_cursor(checked_at, 2_000_000_000)
+    assert decode_check_cursor(cursor) == (checked_at, 2_000_000_000)
+
+    kb = history_page_kb(2_000_000_000, cursor, cursor)
+    for button in kb.inline_keyboard[0]:
+        assert len(button.callback_data.encode()) <= 64
+        prefix, _, parsed = parse_page_callback(button.callback_data)
+        assert prefix == "hist:2000000000" and parsed == cursor
+
+    assert history_page_kb(1, None, None) is None
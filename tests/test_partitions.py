@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta
+
+from app.db import partitions
+
+
+def test_period_start_and_name():
+    """
+    Проверяет границы суточных и недельных секций и их имена.
+    """
+    moment = datetime(2026, 10, 18, 15, 30)  # воскресенье
+
+    assert partitions.period_start(moment, "daily") == datetime(2026, 10, 18)
+    assert partitions.period_start(moment, "weekly") == datetime(2026, 10, 12)
+    assert partitions.partition_name(datetime(2026, 10, 12)) == "checks_p20261012"
+
+
+def test_upper_bound_parsing():
+    """
+    Проверяет разбор верхней границы секции из pg_get_expr.
+    """
+    assert partitions.upper_bound(
+        "FOR VALUES FROM ('2026-10-18 00:00:00') TO ('2026-10-19 00:00:00')"
+    ) == datetime(2026, 10, 19)
+    assert partitions.upper_bound(
+        "FOR VALUES FROM (MINVALUE) TO ('2026-10-18 00:00:00')"
+    ) == datetime(2026, 10, 18)
+    assert partitions.upper_bound("DEFAULT") is None
+
+
+def test_lookup_windows_respect_retention():
+    """
+    Проверяет, что окна поиска расширяются и не выходят за срок хранения.
+    """
+    assert partitions.lookup_windows("daily", 0) == [
+        timedelta(days=1), timedelta(days=7), timedelta(days=31)
+    ]
+    assert partitions.lookup_windows("weekly", 30) == [
+        timedelta(days=7), timedelta(days=30)
+    ]
@@ -0,0 +1,118 @@
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db import crud
+from app.db.cache import SITES, QueryCache, checks_tag, query_cache
+from app.db.database import Base
+
+
+@pytest.mark.asyncio
+async def test_single_flight_and_ttl():
+    """
+    Проверяет объединение одновременных запросов и истечение TTL.
+    """
+    now = [0.0]
+    cache = QueryCache(ttl=10, max_size=100, clock=lambda: now[0])
+    calls = 0
+
+    async def load():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return ["site"]
+
+    results = await asyncio.gather(*(cache.get_or_load(("sites",), load) for _ in range(10)))
+    assert calls == 1
+    assert all(r is results[0] for r in results)
+
+    await cache.get_or_load(("sites",), load)
+    now[0] = 11
+    await cache.get_or_load(("sites",), load)
+    assert calls == 2
+    assert cache.stats() == {
+        "size": 1, "hits": 1, "misses": 2, "coalesced": 9, "invalidations": 0,
+    }
+
+
+@pytest.mark.asyncio
+async def test_invalidation_by_tag():
+    """
+    Проверяет сброс по тегам, в том числе во время выполнения запроса,
+    и то, что ошибки не кэшируются.
+    """
+    cache = QueryCache(ttl=60, max_size=100)
+    version = 0
+
+    async def load():
+        # Значение читается в начале запроса, как снимок БД
+        value = version
+        await asyncio.sleep(0.01)
+        return value
+
+    assert await cache.get_or_load("a", load, tags=(checks_tag(1),)) == 0
+    assert await cache.get_or_load("b", load, tags=(checks_tag(2),)) == 0
+    version = 1
+    assert cache.invalidate(checks_tag(1)) == 1
+    assert await cache.get_or_load("a", load, tags=(checks_tag(1),)) == 1
+    assert await cache.get_or_load("b", load, tags=(checks_tag(2),)) == 0
+
+    # Запись, сделанная во время запроса, не даёт сохранить устаревший результат
+    task = asyncio.create_task(cache.get_or_load("c", load, tags=(SITES,)))
+    await asyncio.sleep(0.005)
+    version = 2
+    cache.invalidate(SITES)
+    assert await task == 1
+    assert await cache.get_or_load("c", load, tags=(SITES,)) == 2
+
+    async def fail():
+        raise RuntimeError("db is down")
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_load("d", fail)
+    assert await cache.get_or_load("d", load) == 2
+
+
+@pytest.mark.asyncio
+async def test_crud_writes_invalidate_cached_reads(tmp_path):
+    """
+    Проверяет, что добавление и удаление сайта и запись проверок сбрасывают кэш.
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/cache.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    query_cache.clear()
+
+    async def sites():
+        async def load():
+            async with session_factory() as session:
+                return await crud.list_sites(session)
+        return await query_cache.get_or_load(("test_sites",), load, tags=(SITES,))
+
+    async def history(site_id):
+        async def load():
+            async with session_factory() as session:
+                return await crud.last_checks(session, site_id)
+        return await query_cache.get_or_load(
+            ("test_history", site_id), load, tags=(checks_tag(site_id),)
+        )
+
+    assert await sites() == []
+    async with session_factory() as session:
+        site = await crud.create_site(session, "http://example.com", 60)
+    assert [s.url for s in await sites()] == ["http://example.com"]
+
+    assert await history(site.id) == []
+    async with session_factory() as session:
+        await crud.create_check(session, site, 200, 0.1, True)
+    assert len(await history(site.id)) == 1
+
+    async with session_factory() as session:
+        await crud.delete_site(session, site.id)
+    assert await sites() == []
+    assert await history(site.id) == []
+
+    query_cache.clear()
+    await engine.dispose()
@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.db import crud
+from app.db.database import Base
+from app.db.models import Check, CheckRollup
+from app.services import retention
+
+
+@pytest.mark.asyncio
+async def test_purge_old_data_in_batches(tmp_path, monkeypatch):
+    """
+    Проверяет пакетное удаление старых проверок и корзин с сохранением свежих.
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/retention.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    monkeypatch.setattr(retention.settings, "RETENTION_RAW_DAYS", 7)
+    monkeypatch.setattr(retention.settings, "RETENTION_HOURLY_DAYS", 30)
+    monkeypatch.setattr(retention.settings, "RETENTION_DAILY_DAYS", 0)
+    monkeypatch.setattr(retention.settings, "RETENTION_BATCH_SIZE", 7)
+
+    now = datetime.now()
+    async with session_factory() as session:
+        site = await crud.create_site(session, "http://example.com", 60)
+        await crud.create_checks(session, [
+            {
+                "site_id": site.id,
+                "status_code": 200,
+                "response_time": 0.1,
+                "is_available": True,
+                "checked_at": now - timedelta(days=days),
+            }
+            for days in range(60)
+        ])
+
+    removed = await retention.purge_old_data(session_factory, now=now)
+
+    async with session_factory() as session:
+        checks = (await session.execute(select(func.count(Check.id)))).scalar_one()
+        hours = (await session.execute(
+            select(func.count()).where(CheckRollup.period == "hour")
+        )).scalar_one()
+        days = (await session.execute(
+            select(func.count()).where(CheckRollup.period == "day")
+        )).scalar_one()
+
+    assert removed["checks"] == 52
+    assert checks == 8
+    assert hours == 30
+    assert days == 60
+
+    await engine.dispose()
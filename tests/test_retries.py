@@ -0,0 +1,111 @@
+import asyncio
+import socket
+import ssl
+
+import httpx
+import pytest
+
+from app.services import monitor
+from app.services.dns import DnsError
+from app.services.http_client import classify_error
+from app.services.retries import RetryPolicy, parse_budgets, parse_failure_classes
+
+
+class DummySite:
+    """Простой объект-сайт для теста."""
+
+    def __init__(self, id, url):
+        self.id = id
+        self.url = url
+
+
+def wrapped(exc_type, cause):
+    """Исключение httpx с причиной, как его поднимает httpx при ошибке httpcore."""
+    try:
+        raise exc_type("request failed") from cause
+    except exc_type as err:
+        return err
+
+
+def test_classify_error_and_policy():
+    """
+    Проверяет причины неудач по цепочке исключений и решение о повторе.
+    """
+    assert classify_error(wrapped(httpx.ConnectError, DnsError("no such host"))) == "dns"
+    assert classify_error(wrapped(httpx.ConnectError, socket.gaierror(-2, "unknown"))) == "dns"
+    assert classify_error(wrapped(httpx.ConnectError, ssl.SSLError("handshake"))) == "tls"
+    assert classify_error(wrapped(httpx.ConnectError, ConnectionRefusedError())) == "connect"
+    assert classify_error(httpx.RemoteProtocolError("disconnected")) == "connect"
+    assert classify_error(httpx.ReadTimeout("slow")) == "timeout"
+    assert classify_error(TimeoutError()) == "timeout"
+    assert classify_error(ValueError("bug")) == "error"
+
+    policy = RetryPolicy(
+        budgets=parse_budgets("1, 2"),
+        connect_timeout=5,
+        delay=0,
+        retry_on=parse_failure_classes("connect,timeout,http"),
+    )
+    assert policy.should_retry(1, "timeout", None)
+    assert policy.should_retry(2, "http", 503)
+    assert not policy.should_retry(3, "timeout", None)
+    assert not policy.should_retry(1, "http", 404)
+    assert not policy.should_retry(1, "dns", None)
+    assert not policy.should_retry(1, None, 200)
+    assert policy.timeout(1).connect == 1 and policy.timeout(2).read == 2
+    with pytest.raises(ValueError):
+        parse_failure_classes("dns,bogus")
+
+
+@pytest.mark.asyncio
+async def test_check_site_retries_before_declaring_down(monkeypatch):
+    """
+    Проверяет, что сбой подтверждается повторами с коротким бюджетом,
+    а число попыток и причина неудачи попадают в запись проверки.
+    """
+    requests = 0
+
+    async def handle(reader, writer):
+        nonlocal requests
+        await reader.readuntil(b"\r\n\r\n")
+        requests += 1
+        if requests == 1:
+            writer.write(b"HTTP/1.1 503 Service Unavailable\r\nContent-Length: 0\r\n\r\n")
+        elif requests == 2:
+            # Зависший ответ: повтор должен уложиться в свой бюджет
+            await asyncio.sleep(5)
+        else:
+            writer.write(b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok")
+        await writer.drain()
+        writer.close()
+
+    saved = []
+
+    async def fake_save_check(session, site, status_code, response_time, is_available, **fields):
+        saved.append((status_code, is_available, fields["attempts"], fields["failure_class"]))
+
+    monkeypatch.setattr(monitor, "save_check", fake_save_check)
+    monkeypatch.setattr(monitor, "retry_policy", RetryPolicy(
+        budgets=(0.2, 0.2), connect_timeout=0.1, delay=0,
+        retry_on=frozenset({"timeout", "http"}),
+    ))
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    url = f"http://127.0.0.1:{server.sockets[0].getsockname()[1]}/"
+
+    try:
+        result = await monitor.check_site(None, DummySite(1, url))
+        assert result["is_available"] and result["attempts"] == 3
+        assert saved == [(200, True, 3, None)]
+
+        # Повторы исчерпаны: сохраняется неудача последней попытки
+        requests = 0
+        monkeypatch.setattr(monitor, "retry_policy", RetryPolicy(
+            budgets=(0.2,), connect_timeout=0.1, delay=0,
+            retry_on=frozenset({"timeout", "http"}),
+        ))
+        result = await monitor.check_site(None, DummySite(1, url))
+        assert not result["is_available"]
+        assert saved[-1] == (None, False, 2, "timeout")
+    finally:
+        await monitor.http.aclose()
+        server.close()
@@ -0,0 +1,154 @@
+import random
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.db.database import Base
+from app.db import crud
+
+
+@pytest.mark.asyncio
+async def test_rollup_stats_match_raw_stats(tmp_path):
+    """
+    Проверяет, что статистика по корзинам и сгруппированный запрос
+    совпадают с подсчётом по сырым проверкам.
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/rollups.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    rnd = random.Random(42)
+    now = datetime.now()
+    async with session_factory() as session:
+        sites = [
+            await crud.create_site(session, f"http://site{i}.test", 60)
+            for i in range(3)
+        ]
+        rows = []
+        for site in sites:
+            for n in range(200):
+                is_available = rnd.random() > 0.2
+                rows.append({
+                    "site_id": site.id,
+                    "status_code": 200 if is_available else None,
+                    "response_time": rnd.uniform(0.05, 2) if is_available else None,
+                    "is_available": is_available,
+                    "checked_at": now - timedelta(minutes=n * 5),
+                })
+        # Часть проверок пишем пачкой, часть — по одной
+        await crud.create_checks(session, rows[:-5])
+        for row in rows[-5:]:
+            site = next(s for s in sites if s.id == row["site_id"])
+            await crud.create_check(
+                session, site, row["status_code"], row["response_time"], row["is_available"]
+            )
+
+        since = now - timedelta(days=2)
+        hourly = await crud.rollup_stats(session, since)
+        daily = await crud.rollup_stats(session, since, period="day")
+        bulk = await crud.stats_for_sites(session, since=since)
+
+        for site in sites:
+            raw = await crud.stats_for_site(session, site.id)
+            assert hourly[site.id]["uptime"] == pytest.approx(raw["uptime"])
+            assert hourly[site.id]["average_response"] == pytest.approx(raw["average_response"])
+            assert daily[site.id] == pytest.approx(hourly[site.id])
+            assert bulk[site.id] == pytest.approx(hourly[site.id])
+
+        selected = await crud.rollup_stats(session, since, site_ids=[sites[0].id])
+        assert list(selected) == [sites[0].id]
+        selected = await crud.stats_for_sites(session, site_ids=[sites[1].id])
+        assert list(selected) == [sites[1].id]
+
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_report_window_edge_matches_in_both_modes(tmp_path):
+    """
+    Проверяет, что отчёт по корзинам и по сырым проверкам считает одно
+    и то же окно, когда проверки лежат по обе стороны его границы.
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/window.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    now = datetime(2026, 5, 10, 12, 40)
+    since = crud.report_since(24, now)
+    assert since == datetime(2026, 5, 9, 12, 0)
+
+    async with session_factory() as session:
+        site = await crud.create_site(session, "http://edge.test", 60)
+        rows = [
+            # До границы окна: не учитываются
+            (since - timedelta(minutes=5), False, None),
+            (since - timedelta(microseconds=1), False, None),
+            # Внутри окна, в том числе в первые минуты первого часа
+            (since, True, 0.2),
+            (since + timedelta(minutes=20), True, 0.4),
+            (now - timedelta(hours=24), False, None),
+            (now, True, 0.6),
+        ]
+        await crud.create_checks(session, [
+            {
+                "site_id": site.id,
+                "status_code": 200 if up else None,
+                "response_time": response,
+                "is_available": up,
+                "checked_at": checked_at,
+            }
+            for checked_at, up, response in rows
+        ])
+
+        hourly = await crud.rollup_stats(session, since)
+        raw = await crud.stats_for_sites(session, since=since)
+
+    assert raw[site.id]["uptime"] == pytest.approx(75.0)
+    assert raw[site.id]["average_response"] == pytest.approx(0.3)
+    assert hourly[site.id] == pytest.approx(raw[site.id])
+
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_report_window_counts_more_than_1000_checks(tmp_path):
+    """
+    Проверяет, что отчёт по окну учитывает все проверки окна, даже если
+    их больше 1000, одинаково в обоих режимах, и отличается от прежнего
+    расчёта по последним 1000 проверкам.
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/busy.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    now = datetime.now()
+    since = crud.report_since(24, now)
+    async with session_factory() as session:
+        site = await crud.create_site(session, "http://busy.test", 30)
+        # 1500 проверок за последние 12,5 часа: первые 500 (самые старые) неудачные
+        await crud.create_checks(session, [
+            {
+                "site_id": site.id,
+                "status_code": 200 if n < 1000 else None,
+                "response_time": 0.5 if n < 1000 else None,
+                "is_available": n < 1000,
+                "checked_at": now - timedelta(seconds=30 * n),
+            }
+            for n in range(1500)
+        ])
+
+        hourly = (await crud.rollup_stats(session, since))[site.id]
+        raw = (await crud.stats_for_sites(session, since=since))[site.id]
+        last_1000 = await crud.stats_for_site(session, site.id)
+
+    assert hourly["uptime"] == pytest.approx(1000 / 1500 * 100)
+    assert hourly["average_response"] == pytest.approx(500 / 1500)
+    assert raw == pytest.approx(hourly)
+    # Прежний расчёт видел только последние 1000 (все удачные)
+    assert last_1000["uptime"] == pytest.approx(100.0)
+
+    await engine.dispose()
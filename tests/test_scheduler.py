@@ -0,0 +1,218 @@
+import asyncio
+import time
+
+import pytest
+
+from app.core import scheduler as sched
+from app.core.scheduler import HeapScheduler
+from app.services import monitor
+from app.services.adaptive import AdaptiveIntervals
+
+
+class DummySite:
+    """Простой объект-сайт для теста."""
+
+    def __init__(self, id, url, interval=60, is_active=True):
+        self.id = id
+        self.url = url
+        self.interval = interval
+        self.is_active = is_active
+
+
+class DummySession:
+    """Пустая асинхронная сессия."""
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+class FakeClock:
+    """Управляемые часы для планировщика."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+async def noop_dispatch(site_id, due):
+    return None
+
+
+def test_pop_due_orders_and_reschedules():
+    """
+    Проверяет порядок извлечения по сроку и назначение следующего срока.
+    """
+    clock = FakeClock()
+    heap = HeapScheduler(noop_dispatch, clock=clock)
+    heap.add(1, 10, delay=5)
+    heap.add(2, 20, delay=1)
+    heap.add(3, 30, delay=50)
+
+    clock.now += 6
+    assert [site_id for site_id, _ in heap.pop_due(clock.now)] == [2, 1]
+
+    # Следующие сроки — через интервал от предыдущего срока
+    clock.now += 10
+    assert [site_id for site_id, _ in heap.pop_due(clock.now)] == [1]
+    clock.now += 5
+    assert [site_id for site_id, _ in heap.pop_due(clock.now)] == [2]
+
+
+def test_remove_and_reschedule_skip_stale_entries():
+    """
+    Проверяет, что удалённые и перенесённые сайты не срабатывают по старому сроку.
+    """
+    clock = FakeClock()
+    heap = HeapScheduler(noop_dispatch, clock=clock)
+    heap.add(1, 10, delay=1)
+    heap.add(2, 10, delay=1)
+    heap.remove(1)
+    heap.reschedule(2, 8)
+
+    clock.now += 2
+    assert heap.pop_due(clock.now) == []
+    clock.now += 7
+    assert [site_id for site_id, _ in heap.pop_due(clock.now)] == [2]
+    assert len(heap) == 1
+
+
+def test_adaptive_intervals_confirm_and_back_off():
+    """
+    Проверяет частые проверки после смены состояния, удвоение интервала
+    у долго лежащего сайта и увеличение интервала у стабильного.
+    """
+    policy = AdaptiveIntervals(
+        confirm_interval=15, confirm_checks=2, max_interval=600, stable_after=3, stable_factor=4
+    )
+    results = [True, False, False, False, False, False, False, True, True, True, True, True]
+    intervals = [policy.observe(1, 60, ok) for ok in results]
+    assert intervals == [None, 15, 15, 120, 240, 480, 600, 15, 15, 240, 240, 240]
+
+    # Базовый интервал больше границы не увеличивается
+    assert policy.observe(2, 3600, True) is None
+    assert policy.observe(2, 3600, False) == 15
+    policy.forget(1)
+    policy.forget(2)
+    assert len(policy) == 0
+
+
+def test_adjust_overrides_interval_until_reset():
+    """
+    Проверяет, что временный интервал переносит следующую проверку
+    и сбрасывается при смене базового интервала.
+    """
+    clock = FakeClock()
+    heap = HeapScheduler(noop_dispatch, clock=clock)
+    heap.add(1, 60, delay=60)
+    heap.adjust(1, 15)
+    assert heap.stats()["adjusted"] == 1
+    assert heap.interval_of(1) == 60
+
+    clock.now += 15
+    assert [site_id for site_id, _ in heap.pop_due(clock.now)] == [1]
+    clock.now += 15
+    assert [site_id for site_id, _ in heap.pop_due(clock.now)] == [1]
+
+    heap.add(1, 90)
+    assert heap.stats()["adjusted"] == 0
+    heap.adjust(1, 30)
+    heap.remove(1)
+    assert heap.stats()["adjusted"] == 0
+
+
+@pytest.mark.asyncio
+async def test_run_dispatches_due_sites():
+    """
+    Проверяет, что цикл планировщика вызывает dispatch со сроком проверки.
+    """
+    fired = []
+
+    async def dispatch(site_id, due):
+        fired.append(site_id)
+        heap.observe_lag(time.monotonic() - due)
+
+    heap = HeapScheduler(dispatch)
+    heap.start()
+    heap.add(1, 60, delay=0.01)
+    heap.add(2, 60, delay=0.02)
+    await asyncio.sleep(0.1)
+    await heap.stop()
+
+    assert fired == [1, 2]
+    assert heap.stats()["dispatched"] == 2
+    assert heap.stats()["lag_max"] >= 0
+    assert heap.lag_observed == 2
+
+
+@pytest.mark.asyncio
+async def test_sync_sites_adds_and_removes_sites(monkeypatch):
+    """
+    Проверяет, что сверка заводит новые сайты и снимает удалённые.
+    """
+    sites = [DummySite(1, "http://a.test", 60), DummySite(2, "http://b.test", 120)]
+
+    async def fake_list_sites(session):
+        return sites
+
+    monkeypatch.setattr(sched, "AsyncSessionLocal", DummySession)
+    monkeypatch.setattr(sched.crud, "list_sites", fake_list_sites)
+    monkeypatch.setattr(sched, "_scheduling", True)
+
+    await sched.sync_sites()
+    assert 1 in sched.scheduler and 2 in sched.scheduler
+
+    # Сайт 1 удалён, сайт 3 добавлен, у сайта 2 изменился интервал
+    sites = [DummySite(2, "http://b.test", 90), DummySite(3, "http://c.test", 30)]
+    await sched.sync_sites()
+    assert 1 not in sched.scheduler
+    assert 3 in sched.scheduler
+    assert sched.scheduler.interval_of(2) == 90
+
+    for site_id in list(sched._sites):
+        sched.unschedule_site(site_id)
+    assert len(sched.scheduler) == 0
+
+
+def test_validators_are_dropped_with_site(monkeypatch):
+    """
+    Проверяет, что ETag и Last-Modified сайта удаляются при снятии
+    с расписания и при передаче его секции другому воркеру.
+    """
+    monkeypatch.setattr(sched, "_scheduling", True)
+    sched.schedule_site(DummySite(1, "http://a.test", 60))
+    sched.schedule_site(DummySite(2, "http://b.test", 60))
+    monitor._validators.clear()
+    monitor._validators.update({1: ('"a"', None), 2: ('"b"', None), 3: ('"c"', None)})
+
+    sched.unschedule_site(1)
+    # Сайт 3 не в расписании, но его валидаторы тоже удаляются
+    sched.unschedule_site(3)
+    assert set(monitor._validators) == {2}
+
+    try:
+        sched.set_partitions(frozenset({1}), 2)
+        assert monitor._validators == {}
+    finally:
+        sched.set_partitions(None)
+        sched.unschedule_site(2)
+
+
+def test_schedule_site_is_noop_without_scheduler(monkeypatch):
+    """
+    Проверяет, что процесс, который не ведёт расписание (бот в режиме
+    WORKER_MODE), не заполняет кучу планировщика из команд бота.
+    """
+    monkeypatch.setattr(sched, "_scheduling", False)
+    sched.schedule_site(DummySite(1, "http://a.test", 60))
+    assert 1 not in sched.scheduler and 1 not in sched._sites
+
+    monkeypatch.setattr(sched, "_scheduling", True)
+    sched.schedule_site(DummySite(1, "http://a.test", 60))
+    assert 1 in sched.scheduler
+    sched.unschedule_site(1)
+    assert 1 not in sched.scheduler
@@ -0,0 +1,156 @@
+import ssl
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db import crud
+from app.db.database import Base
+from app.services.tls import (
+    CertAlerts,
+    CertificateCache,
+    expiry_threshold,
+    find_verification_error,
+    parse_thresholds,
+)
+
+NOW = datetime(2026, 10, 1, 12, 0)
+
+
+class FakeSSLObject:
+    """SSLObject с заданным сертификатом и счётчиком разборов."""
+
+    def __init__(self, der: bytes, not_after: str):
+        self.der = der
+        self.not_after = not_after
+        self.parsed = 0
+
+    def getpeercert(self, binary_form=False):
+        if binary_form:
+            return self.der
+        self.parsed += 1
+        return {
+            "subject": ((("commonName", "example.com"),),),
+            "issuer": ((("organizationName", "Test CA"),), (("commonName", "Test R1"),)),
+            "notAfter": self.not_after,
+        }
+
+
+class FakeStream:
+    def __init__(self, ssl_object):
+        self.ssl_object = ssl_object
+
+    def get_extra_info(self, name):
+        return self.ssl_object if name == "ssl_object" else None
+
+
+def test_cache_parses_certificate_once_per_lifetime():
+    """
+    Проверяет, что сертификат разбирается только при первом появлении и смене.
+    """
+    clock = [NOW]
+    cache = CertificateCache(max_size=10, clock=lambda: clock[0])
+    old = FakeSSLObject(b"old-der", "Oct 20 12:00:00 2026 GMT")
+
+    for _ in range(5):
+        info = cache.observe("example.com", 443, FakeStream(old))
+    assert old.parsed == 1
+    assert info.subject == "example.com"
+    assert info.issuer == "Test R1"
+    assert info.not_after == datetime(2026, 10, 20, 12, 0)
+    assert info.days_left(NOW) == pytest.approx(19)
+
+    # Продлённый сертификат на том же хосте разбирается заново
+    new = FakeSSLObject(b"new-der", "Jan 18 12:00:00 2027 GMT")
+    info = cache.observe("example.com", 443, FakeStream(new))
+    assert new.parsed == 1
+    assert info.not_after == datetime(2027, 1, 18, 12, 0)
+
+    # После окончания срока запись не считается свежей
+    clock[0] = datetime(2027, 2, 1)
+    cache.observe("example.com", 443, FakeStream(new))
+    assert new.parsed == 2
+
+    assert cache.observe("example.com", 443, FakeStream(None)) is None
+    assert cache.stats() == {"size": 1, "hits": 4, "parsed": 3, "errors": 0}
+
+
+def test_verification_error_is_found_in_exception_chain():
+    """
+    Проверяет распознавание ошибки цепочки в исключении httpx.
+    """
+    verify = ssl.SSLCertVerificationError(1, "certificate verify failed")
+    verify.verify_message = "certificate has expired"
+    try:
+        try:
+            raise verify
+        except ssl.SSLError as err:
+            raise httpx.ConnectError(str(err)) from err
+    except httpx.ConnectError as err:
+        assert find_verification_error(err) == "certificate has expired"
+
+    assert find_verification_error(httpx.ConnectTimeout("timeout")) is None
+
+
+def test_expiry_thresholds():
+    """
+    Проверяет разбор порогов и выбор достигнутого порога.
+    """
+    thresholds = parse_thresholds("7, 30,1,14")
+    assert thresholds == (30, 14, 7, 1)
+    assert expiry_threshold(45, thresholds) is None
+    assert expiry_threshold(29.5, thresholds) == 30
+    assert expiry_threshold(6, thresholds) == 7
+    assert expiry_threshold(-1, thresholds) == 1
+
+
+@pytest.mark.asyncio
+async def test_cert_alerts_fire_once_per_threshold(tmp_path):
+    """
+    Проверяет оповещения о сроке: одно на порог, без повторов после
+    перезапуска, сброс порогов при новом сертификате и оповещение об ошибке.
+    """
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/certs.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_factory() as session:
+        site = await crud.create_site(session, "https://example.com", 60)
+
+    sent = []
+
+    async def notify(site, text):
+        sent.append(text)
+
+    clock = [NOW]
+    cache = CertificateCache(max_size=10, clock=lambda: clock[0])
+    alerts = CertAlerts(notify, session_factory, (30, 14, 7), clock=lambda: clock[0])
+    cert = FakeSSLObject(b"der", "Oct 20 12:00:00 2026 GMT")
+
+    # 19 дней: сразу порог 30, повторных оповещений нет
+    for _ in range(3):
+        await alerts.process(site, cache.observe("example.com", 443, FakeStream(cert)))
+    assert len(sent) == 1 and "expires in 19 days" in sent[0]
+
+    # Перезапуск: состояние читается из БД
+    async with session_factory() as session:
+        site = await crud.get_site(session, site.id)
+    assert site.cert_alerted_days == 30
+    alerts = CertAlerts(notify, session_factory, (30, 14, 7), clock=lambda: clock[0])
+    clock[0] = NOW + timedelta(days=6)
+    await alerts.process(site, cache.observe("example.com", 443, FakeStream(cert)))
+    assert len(sent) == 2 and "expires in 13 days" in sent[1]
+
+    # Новый сертификат сбрасывает пороги
+    renewed = FakeSSLObject(b"der2", "Jan 18 12:00:00 2027 GMT")
+    await alerts.process(site, cache.observe("example.com", 443, FakeStream(renewed)))
+    assert len(sent) == 2
+    assert site.cert_alerted_days is None
+
+    # Ошибка цепочки — одно оповещение, пока она не изменится
+    for _ in range(2):
+        await alerts.process(site, cache.record_error("example.com", 443, "hostname mismatch"))
+    assert len(sent) == 3 and sent[2].startswith("[CERT]") and "hostname mismatch" in sent[2]
+
+    await engine.dispose()
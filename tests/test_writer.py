@@ -0,0 +1,112 @@
+import pytest
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app.db import crud
+from app.db.database import Base
+from app.db.models import Check
+from app.db.writer import CheckWriter
+
+
+async def make_session_factory(tmp_path, foreign_keys: bool = False):
+    """Создаёт отдельную SQLite-базу для теста."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/writer.db")
+    if foreign_keys:
+        # SQLite проверяет внешние ключи, только если это включено для соединения
+        event.listen(
+            engine.sync_engine, "connect",
+            lambda conn, record: conn.execute("PRAGMA foreign_keys=ON"),
+        )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine, async_sessionmaker(engine, expire_on_commit=False)
+
+
+async def count_checks(session_factory) -> int:
+    async with session_factory() as session:
+        return (await session.execute(select(func.count(Check.id)))).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_flush_on_stop_and_counters(tmp_path):
+    """
+    Проверяет пакетную запись, сброс при остановке и счётчики.
+    """
+    engine, session_factory = await make_session_factory(tmp_path)
+    writer = CheckWriter(session_factory, batch_size=10, flush_interval=60, max_buffer=25)
+    writer.start()
+
+    for i in range(30):
+        writer.add(1, 200, 0.1, True)
+
+    await writer.stop()
+
+    stats = writer.stats()
+    assert stats["buffered"] == 25
+    assert stats["dropped"] == 5
+    assert stats["flushed"] == 25
+    assert stats["pending"] == 0
+    assert await count_checks(session_factory) == 25
+
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_flush_writes_in_batches(tmp_path):
+    """
+    Проверяет, что буфер записывается пачками заданного размера.
+    """
+    engine, session_factory = await make_session_factory(tmp_path)
+    writer = CheckWriter(session_factory, batch_size=4, flush_interval=60, max_buffer=100)
+
+    for i in range(10):
+        writer.add(i, None, None, False)
+
+    assert await writer.flush() == 10
+    assert writer.flushes == 3
+    assert await count_checks(session_factory) == 10
+
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_poison_rows_are_rejected(tmp_path):
+    """
+    Проверяет, что строка, нарушающая внешний ключ (сайт удалён во время
+    проверки), отбрасывается, а остальные строки пачки записываются.
+    """
+    engine, session_factory = await make_session_factory(tmp_path, foreign_keys=True)
+    async with session_factory() as session:
+        site = await crud.create_site(session, "http://example.com", 60)
+
+    writer = CheckWriter(session_factory, batch_size=8, flush_interval=60, max_buffer=100)
+    for i in range(10):
+        writer.add(site.id + 1 if i == 5 else site.id, 200, 0.1, True)
+
+    assert await writer.flush() == 9
+    stats = writer.stats()
+    assert (stats["pending"], stats["flushed"], stats["rejected"]) == (0, 9, 1)
+    assert await count_checks(session_factory) == 9
+
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_failing_batch_is_retried_limited_times():
+    """
+    Проверяет, что пачка, которую не удаётся записать, возвращается
+    в буфер не больше max_retries раз и затем отбрасывается.
+    """
+    def broken_factory():
+        raise RuntimeError("database is unavailable")
+
+    writer = CheckWriter(broken_factory, batch_size=4, flush_interval=60, max_buffer=100, max_retries=2)
+    for i in range(6):
+        writer.add(1, 200, 0.1, True)
+
+    for _ in range(2):
+        assert await writer.flush() == 0
+        assert writer.stats()["pending"] == 6
+    assert await writer.flush() == 0
+    assert writer.stats()["pending"] == 2
+    assert writer.rejected == 4